@@ -4,6 +4,7 @@ from datetime import datetime
 
 from src.ui_components.utils import format_enum_value
 from src.ui_components.forms import dynamic_list_input
+from src.agent.checkpointing import discard_checkpoints
 from src.agent.state import (CampaignGoal, AdPlatform, Product, SupportedPlatform,
                              CreativeDirection, ScriptTone, Gender, Countries,
                              IncomeRange, EducationLevel, AudiencePersona, AgentState, )
@@ -670,6 +671,8 @@ def initial_input_ui():
                     # Store in session state
                     st.session_state['agent_state'] = agent_state
                     st.session_state['workflow_status'] = 'ready'
+                    # New inputs never resume an earlier failed run; drop its checkpoints
+                    discard_checkpoints(st.session_state.pop('run_thread_id', None))
 
                 st.success("✅ Campaign configured successfully! Redirecting to AI processing...")
 
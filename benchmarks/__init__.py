@@ -0,0 +1,20 @@
+"""
+Benchmark scripts, run as `python -m benchmarks.<name>`.
+
+They only use the fake provider, so no real keys are needed: any setting missing
+from the environment and from `.env` is taken from `.env.example` before the
+config is loaded.
+"""
+# Import libraries
+import os
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+ROOT = Path(__file__).parent.parent
+
+# Settings in `.env` take precedence over the environment defaults set here
+_env = dotenv_values(ROOT / ".env") if (ROOT / ".env").exists() else {}
+for key, value in dotenv_values(ROOT / ".env.example").items():
+    if key not in _env and value is not None:
+        os.environ.setdefault(key, value)
@@ -0,0 +1,33 @@
+"""
+Fake-provider setup shared by the benchmark scripts.
+
+Routes every node to the local `fake` chat-model provider so a benchmark measures
+the orchestration overhead of the graphs (state copies, prompt building, routing,
+parsing, retries) instead of network and model time.
+"""
+# Import libraries
+from src.config.config import config, LLMProvider, FakeLatencyDistribution
+from src.agent.llm.registry import get_llm_registry
+
+
+def use_fake_llm(latency: float, distribution: FakeLatencyDistribution = FakeLatencyDistribution.CONSTANT,
+                 stddev: float = 0.0, error_rate: float = 0.0, approval_probability: float = 1.0) -> None:
+    """Point every node at the fake provider with the given latency and behaviour."""
+    config.llm_provider_override = LLMProvider.FAKE
+    config.fake_llm_latency_distribution = distribution
+    config.fake_llm_latency_mean = latency
+    config.fake_llm_latency_stddev = stddev
+    config.fake_llm_error_rate = error_rate
+    config.fake_llm_approval_probability = approval_probability
+
+    # Every run sends identical prompts; measure real calls rather than cache or store hits
+    config.llm_cache_enabled = False
+    config.llm_single_flight_enabled = False
+    config.audience_insight_store_enabled = False
+
+    # Provider limits and tail-latency hedging do not apply to a local fake
+    config.llm_rate_limit_enabled = False
+    config.llm_hedging_enabled = False
+
+    # Drop clients created for the real providers
+    get_llm_registry().clear()
@@ -0,0 +1,60 @@
+"""
+Cost of compiling the workflow graphs per run versus reusing the process-wide compiled graphs.
+
+Times `build_*_graph` (what every run paid before) against `get_*_graph` (a cache
+lookup after the first call), then starts many runs at once from a thread pool
+both ways, as concurrent Streamlit sessions do. Runs use the fake LLM provider with
+zero latency, so the difference is the compile cost alone.
+
+Usage:
+    python -m benchmarks.graph_compile --repeats 50 --runs 32 --workers 8
+"""
+# Import libraries
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from src.agent.graph import (build_pre_review_graph, build_variation_graph, get_pre_review_graph, get_variation_graph,
+                             clear_graph_cache)
+from benchmarks.fake_llm import use_fake_llm
+from benchmarks.samples import sample_agent_state
+
+
+def per_call_ms(factory, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        factory()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def concurrent_runs_seconds(factory, runs: int, workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: factory().invoke(sample_agent_state()), range(runs)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=50, help="Graphs obtained per timing")
+    parser.add_argument("--runs", type=int, default=32, help="Concurrent pre-review runs")
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads starting the runs")
+    args = parser.parse_args()
+
+    use_fake_llm(0.0)
+    clear_graph_cache()
+
+    print(f"{'graph':<12}{'compile ms':>12}{'cached ms':>12}")
+    for name, build, get in (("pre_review", build_pre_review_graph, get_pre_review_graph),
+                             ("variation", build_variation_graph, get_variation_graph)):
+        print(f"{name:<12}{per_call_ms(build, args.repeats):>12.2f}{per_call_ms(get, args.repeats):>12.4f}")
+
+    compiled = concurrent_runs_seconds(build_pre_review_graph, args.runs, args.workers)
+    cached = concurrent_runs_seconds(get_pre_review_graph, args.runs, args.workers)
+    print(f"\n{args.runs} concurrent pre-review runs ({args.workers} workers)")
+    print(f"compile per run: {compiled:7.2f}s")
+    print(f"shared graph:    {cached:7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
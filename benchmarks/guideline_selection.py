@@ -0,0 +1,37 @@
+"""
+Input tokens per node with the whole copywriting guideline vs the indexed sections.
+
+Builds every node's messages for the sample states of `benchmarks.prompt_tokens`
+with `guideline_section_selection` off (the whole guideline in every prompt) and
+on (only the sections tagged for the ad format and prompt role), and reports the
+tokens saved. Static placements drop the scene flow, timing and audio sections.
+
+Usage:
+    python -m benchmarks.guideline_selection
+"""
+# Import libraries
+from src.config.config import config
+from src.agent.llm.tokens import approximate_bpe_tokens
+from benchmarks.prompt_tokens import NODE_BUILDERS, sample_states
+
+
+def main() -> None:
+    # Measure the guideline selection itself, not the budget truncation
+    config.prompt_token_budgets = {}
+
+    totals = {False: 0, True: 0}
+    print(f"{'node':<28}{'state':<24}{'whole':>9}{'indexed':>9}{'saved':>8}")
+    for node, builder in NODE_BUILDERS.items():
+        for label, state in sample_states():
+            tokens = {}
+            for selection in (False, True):
+                config.guideline_section_selection = selection
+                tokens[selection] = sum(approximate_bpe_tokens(message.content) for message in builder(state))
+                totals[selection] += tokens[selection]
+            print(f"{node:<28}{label:<24}{tokens[False]:>9}{tokens[True]:>9}{1 - tokens[True] / tokens[False]:>8.1%}")
+
+    print(f"{'total':<52}{totals[False]:>9}{totals[True]:>9}{1 - totals[True] / totals[False]:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
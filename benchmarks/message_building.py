@@ -0,0 +1,62 @@
+"""
+Cost of building the prompt messages of every LLM node.
+
+`cached` builds the messages with the guideline asset as used by the nodes (parsed
+and rendered once per file version). `per-call` replays the previous behaviour of
+re-reading and re-dumping the guideline YAML inside every builder call.
+
+Usage:
+    python -m benchmarks.message_building --iterations 500
+"""
+# Import libraries
+import time
+import argparse
+from typing import Callable, Dict
+from unittest import mock
+
+import src.agent.utils as prompt_utils
+import src.agent.prompt_layout as prompt_layout
+from src.agent.guideline import GUIDELINE_PATH, GuidelineAsset
+from src.agent.state import AgentState
+from benchmarks.samples import sample_processed_state
+
+
+BUILDERS: Dict[str, Callable] = {
+    "creative_strategy": prompt_utils.build_creative_strategy_message,
+    "script_generation": prompt_utils.build_script_generation_message,
+    "evaluation": prompt_utils.build_evaluation_message,
+    "refinement": prompt_utils.build_script_refinement_message,
+}
+
+
+def render_per_call(encoding=None, **selection) -> str:
+    # A fresh asset re-reads, re-parses and re-dumps the file on every call
+    return GuidelineAsset(GUIDELINE_PATH).render(encoding, **selection)
+
+
+def time_builder(builder: Callable, state: AgentState, iterations: int) -> float:
+    """Mean microseconds per builder call."""
+    builder(state)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        builder(state)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500, help="Builder calls per measurement")
+    args = parser.parse_args()
+
+    state = sample_processed_state()
+
+    print(f"{'builder':<20}{'per-call (us)':>16}{'cached (us)':>14}{'speedup':>10}")
+    for name, builder in BUILDERS.items():
+        with mock.patch.object(prompt_layout, "rendered_guideline", render_per_call):
+            before = time_builder(builder, state, args.iterations)
+        after = time_builder(builder, state, args.iterations)
+        print(f"{name:<20}{before:>16.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Which prompt parts dominate input tokens, aggregated over several runs.
+
+Runs the pre-review and variation graphs on the fake provider (no API key
+needed) for a video and a static placement, then prints the largest
+(node, prompt part) combinations recorded by `src.agent.prompt_sizes` and the
+totals per part. Sizes are the ~4 characters per token estimate.
+
+Usage:
+    python -m benchmarks.prompt_sections --runs 2
+"""
+# Import libraries
+import argparse
+
+from src.agent.state import AgentState, AdPlatform
+from src.agent.graph import build_pre_review_graph, build_variation_graph
+from src.agent.prompt_sizes import get_prompt_size_recorder
+from benchmarks.fake_llm import use_fake_llm
+from benchmarks.samples import sample_agent_state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=2, help="Runs per ad platform")
+    parser.add_argument("--top", type=int, default=10, help="Rows of the largest node/part table")
+    args = parser.parse_args()
+
+    use_fake_llm(0.0, approval_probability=0.3)
+    recorder = get_prompt_size_recorder()
+    recorder.clear()
+
+    pre_review, variation = build_pre_review_graph(), build_variation_graph()
+    for ad_platform in (AdPlatform.instagram_reels, AdPlatform.instagram_feeds):
+        for _ in range(args.runs):
+            result = AgentState.model_validate(pre_review.invoke(sample_agent_state(ad_platform)))
+            variation.invoke(result.model_copy(update={"is_variation_workflow": True}))
+
+    print(f"{'node':<34}{'part':<20}{'tokens':>10}{'share':>8}")
+    for node, part, size, share in recorder.largest_parts(args.top):
+        print(f"{node:<34}{part:<20}{size.estimated_tokens:>10}{share:>8.1%}")
+
+    parts = recorder.by_part()
+    total = sum(size.estimated_tokens for size in parts.values()) or 1
+    print(f"\n{'part':<54}{'tokens':>10}{'share':>8}")
+    for part, size in parts.items():
+        print(f"{part:<54}{size.estimated_tokens:>10}{size.estimated_tokens / total:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
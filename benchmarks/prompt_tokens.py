@@ -0,0 +1,73 @@
+"""
+Input tokens per node under the pretty and compact prompt encodings.
+
+Builds every node's messages for a fixed set of sample states (video and static
+platforms, early and late in the refinement loop) in both encodings and reports
+the tokens saved. Counts use the offline BPE approximation from
+`src.agent.llm.tokens` (or the ~4 characters per token estimate with --chars),
+so no tokenizer download or API key is needed.
+
+Usage:
+    python -m benchmarks.prompt_tokens
+"""
+# Import libraries
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+from src.config.config import config, PromptEncoding
+from src.agent.state import AgentState, AdPlatform
+from src.agent.llm.tokens import approximate_bpe_tokens, estimate_tokens
+from src.agent.utils import (build_audience_insight_message, build_creative_strategy_message,
+                             build_script_generation_message, build_evaluation_message,
+                             build_script_refinement_message, build_variation_generation_message)
+from benchmarks.samples import sample_processed_state
+
+
+NODE_BUILDERS: Dict[str, Callable] = {
+    "audience_insight_node": build_audience_insight_message,
+    "creative_strategy_node": build_creative_strategy_message,
+    "script_generation_node": build_script_generation_message,
+    "script_evaluation_node": build_evaluation_message,
+    "script_refinement_node": build_script_refinement_message,
+    "variation_generation_node": build_variation_generation_message,
+}
+
+
+def sample_states() -> List[Tuple[str, AgentState]]:
+    return [
+        ("reels, 1st iteration", sample_processed_state(AdPlatform.instagram_reels, refinements=0, seed=1)),
+        ("reels, 3rd iteration", sample_processed_state(AdPlatform.instagram_reels, refinements=2, seed=2)),
+        ("feed, 3rd iteration", sample_processed_state(AdPlatform.instagram_feeds, refinements=2, seed=3)),
+    ]
+
+
+def prompt_tokens(builder: Callable, state: AgentState, encoding: PromptEncoding, count: Callable[[str], int]) -> int:
+    config.prompt_encoding = encoding
+    return sum(count(message.content) for message in builder(state))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", action="store_true", help="Count ~4 characters per token instead of BPE pieces")
+    args = parser.parse_args()
+
+    count = estimate_tokens if args.chars else approximate_bpe_tokens
+    # Measure the encodings themselves, not the budget truncation
+    config.prompt_token_budgets = {}
+
+    totals = {encoding: 0 for encoding in PromptEncoding}
+    print(f"{'node':<28}{'state':<24}{'pretty':>9}{'compact':>9}{'saved':>8}")
+    for node, builder in NODE_BUILDERS.items():
+        for label, state in sample_states():
+            pretty = prompt_tokens(builder, state, PromptEncoding.PRETTY, count)
+            compact = prompt_tokens(builder, state, PromptEncoding.COMPACT, count)
+            totals[PromptEncoding.PRETTY] += pretty
+            totals[PromptEncoding.COMPACT] += compact
+            print(f"{node:<28}{label:<24}{pretty:>9}{compact:>9}{1 - compact / pretty:>8.1%}")
+
+    pretty, compact = totals[PromptEncoding.PRETTY], totals[PromptEncoding.COMPACT]
+    print(f"{'total':<52}{pretty:>9}{compact:>9}{1 - compact / pretty:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
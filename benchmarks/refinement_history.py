@@ -0,0 +1,112 @@
+"""
+Refinement prompt tokens with full vs delta script refinement history.
+
+Simulates refinement rounds that, like real ones, rewrite only a few fields of the
+previous draft (a scene's on-screen text, the CTA, ...) and are re-scored on only
+a few criteria, records the history in both `refinement_history_mode`s and reports
+the input tokens of the next `script_refinement_node` prompt after each round. Token budgets are disabled so
+the numbers show the history itself rather than its truncation.
+
+Usage:
+    python -m benchmarks.refinement_history
+"""
+# Import libraries
+import random
+from datetime import datetime
+from typing import Dict, List
+
+from src.config.config import config, RefinementHistoryMode
+from src.agent.state import AgentState, AdPlatform, EvaluationReport, ScriptDraft
+from src.agent.llm.fake import fake_payload
+from src.agent.llm.tokens import approximate_bpe_tokens
+from src.agent.script_diff import diff_scripts, apply_script_diff, evaluation_delta
+from src.agent.utils import build_script_refinement_message
+from benchmarks.samples import sample_processed_state
+
+
+ROUNDS = 6
+EDITS_PER_ROUND = 3
+
+
+def refine(draft: ScriptDraft, rng: random.Random) -> ScriptDraft:
+    """`draft` with a few fields replaced by fresh fake content, as a refinement round would."""
+    data = draft.model_dump()
+    rewrite = fake_payload(type(draft), rng)
+    targets = [(None, field) for field in ("call_to_action_text", "key_takeaway", "suggested_hashtags",
+                                           "headline", "body_copy", "on_image_text") if field in data]
+    for index, scene in enumerate(data.get("scenes", [])):
+        targets += [(index, field) for field in ("visual_description", "on_screen_text", "voiceover_dialogue")]
+
+    for index, field in rng.sample(targets, min(EDITS_PER_ROUND, len(targets))):
+        if index is None:
+            data[field] = rewrite[field]
+        else:
+            replacement = rewrite["scenes"][index % len(rewrite["scenes"])] if rewrite["scenes"] else {}
+            data["scenes"][index][field] = replacement.get(field, data["scenes"][index][field])
+    return type(draft).model_validate(data)
+
+
+def reevaluate(report: Dict, rng: random.Random) -> Dict:
+    """`report` re-scored on a few criteria with fresh feedback and one new recommendation, as a re-evaluation would."""
+    rescore = fake_payload(EvaluationReport, rng, approval_probability=0.0)
+    data = {**report, "detailed_scores": dict(report["detailed_scores"]),
+            "summary_feedback": rescore["summary_feedback"], "overall_score": rescore["overall_score"]}
+    for criterion in rng.sample(sorted(data["detailed_scores"]), EDITS_PER_ROUND):
+        data["detailed_scores"][criterion] = rescore["detailed_scores"][criterion]
+    data["actionable_recommendations"] = report["actionable_recommendations"][1:] + rescore["actionable_recommendations"][:1]
+    return data
+
+
+def history_entry(mode: RefinementHistoryMode, history: List[Dict], before: ScriptDraft, after: ScriptDraft,
+                  report: Dict) -> Dict:
+    entry = {"timestamp": datetime(2025, 1, 1).isoformat(), "action": "script_refined"}
+    if mode == RefinementHistoryMode.DELTA:
+        entry["previous_evaluation_delta"] = evaluation_delta(report, history)
+        entry["output_script_diff"] = diff_scripts(before, after)
+    else:
+        entry["previous_evaluation_report"] = report
+        entry["output_refined_script"] = after.model_dump()
+    return entry
+
+
+def run(ad_platform: AdPlatform, seed: int) -> List[Dict[RefinementHistoryMode, int]]:
+    rng = random.Random(seed)
+    base = sample_processed_state(ad_platform, refinements=0, seed=seed)
+    histories: Dict[RefinementHistoryMode, List[Dict]] = {mode: [] for mode in RefinementHistoryMode}
+    draft = base.script_draft
+    report = fake_payload(EvaluationReport, rng, approval_probability=0.0)
+    rows = []
+
+    for round_number in range(ROUNDS):
+        if round_number:
+            report = reevaluate(report, rng)
+        refined = refine(draft, rng)
+        assert apply_script_diff(draft, diff_scripts(draft, refined)) == refined
+        for mode, history in histories.items():
+            history.append(history_entry(mode, history, draft, refined, report))
+        draft = refined
+
+        state: AgentState = base.model_copy(update={
+            "script_draft": draft,
+            "evaluation_report": EvaluationReport.model_validate(report),
+        })
+        row = {}
+        for mode, history in histories.items():
+            messages = build_script_refinement_message(state.model_copy(update={"script_iteration_history": history}))
+            row[mode] = sum(approximate_bpe_tokens(message.content) for message in messages)
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    config.prompt_token_budgets = {}
+
+    print(f"{'platform':<20}{'round':>6}{'full':>9}{'delta':>9}{'saved':>8}")
+    for ad_platform, seed in ((AdPlatform.instagram_reels, 1), (AdPlatform.instagram_feeds, 2)):
+        for round_number, row in enumerate(run(ad_platform, seed), start=1):
+            full, delta = row[RefinementHistoryMode.FULL], row[RefinementHistoryMode.DELTA]
+            print(f"{ad_platform.value:<20}{round_number:>6}{full:>9}{delta:>9}{1 - delta / full:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
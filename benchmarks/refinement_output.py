@@ -0,0 +1,59 @@
+"""
+Refinement output tokens with full vs patch `refinement_output_mode`.
+
+Simulates refinement rounds that rewrite only a few fields of the draft (see
+`benchmarks.refinement_history`) and compares the size of the response each mode
+needs for the same change: the whole refined script, or the `ScriptPatchSet` that
+produces it when applied locally. Output tokens dominate refinement latency, since
+they are generated one by one. Counts use the offline BPE approximation.
+
+Usage:
+    python -m benchmarks.refinement_output
+"""
+# Import libraries
+import json
+import random
+from typing import List
+
+from src.agent.state import AdPlatform, ScriptDraft, ScriptPatch, ScriptPatchSet
+from src.agent.llm.tokens import approximate_bpe_tokens
+from src.agent.script_diff import diff_scripts, apply_script_patches
+from benchmarks.refinement_history import refine
+from benchmarks.samples import sample_processed_state
+
+
+ROUNDS = 20
+
+
+def patches_for(before: ScriptDraft, after: ScriptDraft) -> ScriptPatchSet:
+    """The patch set a refiner would return to turn `before` into `after`."""
+    diff = diff_scripts(before, after)
+    patches: List[ScriptPatch] = [
+        ScriptPatch(field=field, new_value=change["to"]) for field, change in diff.get("changed", {}).items()
+    ]
+    for scene_change in diff.get("scenes", {}).get("changed", []):
+        patches += [ScriptPatch(scene_number=scene_change["scene_number"], field=field, new_value=change["to"])
+                    for field, change in scene_change["changed"].items()]
+    return ScriptPatchSet(patches=patches)
+
+
+def main() -> None:
+    print(f"{'platform':<20}{'full':>9}{'patch':>9}{'saved':>8}")
+    for ad_platform, seed in ((AdPlatform.instagram_reels, 1), (AdPlatform.instagram_feeds, 2)):
+        rng = random.Random(seed)
+        draft = sample_processed_state(ad_platform, refinements=0, seed=seed).script_draft
+        full = patch = 0
+        for _ in range(ROUNDS):
+            refined = refine(draft, rng)
+            patch_set = patches_for(draft, refined)
+            assert apply_script_patches(draft, patch_set) == refined
+
+            full += approximate_bpe_tokens(json.dumps(refined.model_dump()))
+            patch += approximate_bpe_tokens(patch_set.model_dump_json(exclude_none=True))
+            draft = refined
+
+        print(f"{ad_platform.value:<20}{full // ROUNDS:>9}{patch // ROUNDS:>9}{1 - patch / full:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
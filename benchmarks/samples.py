@@ -0,0 +1,89 @@
+"""
+Sample campaign inputs shared by the benchmark scripts.
+"""
+# Import libraries
+import random
+from datetime import datetime
+
+from src.agent.llm.fake import fake_payload
+from src.agent.nodes.creative_strategy import CreativeStrategyResponse
+from src.agent.state import (AgentState, CampaignGoal, AdPlatform, Product, SupportedPlatform,
+                             AudiencePersona, Gender, Countries, IncomeRange, EducationLevel,
+                             CreativeDirection, ScriptTone, AudienceInsight, VideoScriptDraft,
+                             StaticAdDraft, EvaluationReport)
+
+
+def sample_product() -> Product:
+    return Product(
+        product_name="Delisio",
+        product_description="An AI personal chef that turns any meal photo into a healthy recipe tailored to your diet.",
+        product_features={
+            "photo_to_recipe": "Snap a photo of any dish and get a step-by-step recipe that fits your goals.",
+            "allergy_filters": "Automatically removes ingredients you are allergic to or want to avoid.",
+            "macro_tracking": "Every recipe comes with calories and macros matched to your fitness plan.",
+        },
+        supported_platforms=[SupportedPlatform.ios, SupportedPlatform.android],
+        unique_selling_point=[
+            "Personalized recipes from a single photo",
+            "Respects allergies and diet plans out of the box",
+        ],
+        problems_solved=[
+            "Not knowing what to cook that fits a diet",
+            "Boring, repetitive meal preps",
+        ],
+    )
+
+
+def sample_audience_persona() -> AudiencePersona:
+    return AudiencePersona(
+        age_range="25-34",
+        gender=Gender.all,
+        location=[Countries.usa, Countries.canada],
+        income_range=IncomeRange.middle,
+        education_level=EducationLevel.bachelors,
+        lifestyle=["Works out 3-4 times a week", "Busy office job", "Cooks at home most evenings"],
+        pain_points=["No time to plan healthy meals", "Gets bored of the same dishes"],
+        aspiration=["Hit fitness goals without giving up tasty food"],
+    )
+
+
+def sample_agent_state(ad_platform: AdPlatform = AdPlatform.instagram_reels) -> AgentState:
+    """Return a fresh, not-yet-processed AgentState for benchmarking."""
+    return AgentState(
+        campaign_goal=CampaignGoal.app_installs,
+        ad_platform=ad_platform,
+        product=sample_product(),
+        product_feature_focus="photo_to_recipe",
+        audience_persona=sample_audience_persona(),
+        creative_direction=CreativeDirection.problem_solution,
+        script_tone=ScriptTone.energetic,
+        timestamp=datetime.now(),
+    )
+
+
+def sample_processed_state(ad_platform: AdPlatform = AdPlatform.instagram_reels, refinements: int = 2,
+                           seed: int = 0) -> AgentState:
+    """
+    Return an AgentState midway through the refinement loop (insight, strategy, draft,
+    evaluation and `refinements` history entries), filled with fake provider payloads.
+    """
+    rng = random.Random(seed)
+    state = sample_agent_state(ad_platform)
+    draft_schema = StaticAdDraft if ad_platform in (AdPlatform.instagram_feeds, AdPlatform.facebook_feeds) \
+        else VideoScriptDraft
+
+    history = [{
+        "timestamp": datetime(2025, 1, 1, 12, i).isoformat(),
+        "action": "script_refined",
+        "previous_evaluation_report": fake_payload(EvaluationReport, rng, approval_probability=0.0),
+        "output_refined_script": fake_payload(draft_schema, rng),
+    } for i in range(refinements)]
+
+    return state.model_copy(update={
+        "audience_insight": AudienceInsight.model_validate(fake_payload(AudienceInsight, rng)),
+        **fake_payload(CreativeStrategyResponse, rng),
+        "script_draft": draft_schema.model_validate(fake_payload(draft_schema, rng)),
+        "evaluation_report": EvaluationReport.model_validate(fake_payload(EvaluationReport, rng, approval_probability=0.0)),
+        "script_iteration_history": history or None,
+        "iteration_count": refinements,
+    })
@@ -0,0 +1,48 @@
+"""
+Wall-clock time of the variation graph for 1..K variants fanned out in parallel.
+
+Every variant branch runs its own generate -> evaluate -> refine loop. With an
+approval probability of 0 each branch goes through the full refinement loop, so
+all branches make the same number of calls and K variants should take about as
+long as one. Uses the fake LLM provider with a constant latency per call.
+
+Usage:
+    python -m benchmarks.variation_fanout --latency 0.2
+"""
+# Import libraries
+import time
+import asyncio
+import argparse
+
+from src.agent.state import AgentState, AdPlatform
+from src.agent.graph import get_variation_graph
+from benchmarks.fake_llm import use_fake_llm
+from benchmarks.samples import sample_processed_state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call in seconds")
+    parser.add_argument("--max-variants", type=int, default=3, help="Largest number of variants")
+    args = parser.parse_args()
+
+    use_fake_llm(args.latency, approval_probability=0.0)
+    base = sample_processed_state(AdPlatform.instagram_reels, refinements=1, seed=1)
+
+    print(f"{'variants':<10}{'sync s':>9}{'async s':>9}{'calls':>7}")
+    for count in range(1, args.max_variants + 1):
+        start = time.perf_counter()
+        result = AgentState.model_validate(get_variation_graph(variation_count=count).invoke(base))
+        sync_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(get_variation_graph(use_async=True, variation_count=count).ainvoke(base))
+        async_seconds = time.perf_counter() - start
+
+        calls = sum(variation.llm_call_stats.node_usage[node].calls
+                    for variation in result.variation_results for node in variation.llm_call_stats.node_usage)
+        print(f"{count:<10}{sync_seconds:>9.2f}{async_seconds:>9.2f}{calls:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,75 @@
 import streamlit as st
 import time
 
-from src.agent.graph import build_pre_review_graph
-from src.agent.state import AgentState
+from src.config.config import config
+from src.agent.graph import get_pre_review_graph
+from src.agent.checkpointing import (get_checkpointer, new_thread_id, thread_config, pending_nodes, discard_run,
+                                     discard_checkpoints)
+from src.agent.streaming import WorkflowEventType, stream_workflow
+from src.agent.partial_json import VideoScriptStreamParser
+from src.ui_components.display import display_video_script, display_streaming_video_scenes
+
+
+# Workflow steps keyed by the graph node that performs them
+STEPS = [
+    ("audience_insight_node", "🔍 Analyzing Audience", "Understanding your target audience psychology and behaviour"),
+    ("creative_strategy_node", "💡 Creating Strategy", "Developing effective strategy for your target audience"),
+    ("script_generation_node", "✍️ Writing Script", "Generating your ad script"),
+    ("script_evaluation_node", "⚖️ Evaluating Quality", "Checking script quality and effectiveness"),
+    ("script_refinement_node", "🔧 Refining Script", "Improving script based on evaluation"),
+]
+
+# Best-of-N nodes are shown as the step they replace
+STEP_ALIASES = {
+    "script_candidate_generation_node": "script_generation_node",
+    "script_candidate_evaluation_node": "script_evaluation_node",
+}
+
+# Node that always runs next; evaluation is routed by its report, so it is left out
+NEXT_NODE = {
+    "audience_insight_node": "creative_strategy_node",
+    "creative_strategy_node": "script_generation_node",
+    "script_generation_node": "script_evaluation_node",
+    "script_refinement_node": "script_evaluation_node",
+}
+
+# Nodes that stream a script draft; video scenes are rendered as soon as each one is complete
+SCRIPT_NODES = {"script_generation_node", "script_refinement_node"}
+
+# Seconds between redraws of the live output while tokens arrive
+LIVE_OUTPUT_REFRESH = 0.1
+
+
+@st.cache_resource(show_spinner=False)
+def pre_review_graph(best_of_n: int):
+    """Compiled pre-review graph, shared by every session served by this process."""
+    return get_pre_review_graph(best_of_n=best_of_n, checkpointer=get_checkpointer())
+
+
+def render_live_output(placeholder, parser: VideoScriptStreamParser, is_script_node: bool):
+    """Render streamed output: completed scenes of a video script, otherwise the raw JSON so far."""
+    if is_script_node and parser.items and not parser.malformed:
+        with placeholder.container():
+            display_streaming_video_scenes(parser.items)
+    else:
+        placeholder.code(parser.text, language="json")
+
+
+def render_step(placeholder, title: str, description: str, status: str, runs: int = 0):
+    """Render one step row ('done', 'running' or 'pending') into its placeholder."""
+    icon = {"done": "✅", "running": "🔄"}.get(status, "⏳")
+    label = f"**{title}**..." if status == "running" else f"**{title}**"
+    if runs > 1:
+        label += f" (round {runs})"
+
+    with placeholder.container():
+        col1, col2, col3 = st.columns([1, 3, 6])
+        with col1:
+            st.write(icon)
+        with col2:
+            st.write(label)
+        with col3:
+            st.write(description)
 
 
 def processing_ui():
@@ -36,7 +103,7 @@ def processing_ui():
         """, unsafe_allow_html=True)
 
     st.title("🤖 Generating Your Ad Script...")
-    st.markdown("Please wait while our AI agents work on your script. This may take 2-5 minutes.")
+    st.markdown("Please wait while our AI agents work on your script. Their output appears below as soon as they start writing.")
 
     # Check if we have the required state
     if 'agent_state' not in st.session_state:
@@ -50,121 +117,132 @@ def processing_ui():
         st.session_state['processing_started'] = False
         st.session_state['processing_complete'] = False
         st.session_state['processing_error'] = None
-        st.session_state['current_step'] = 0
         st.session_state['workflow_result'] = None
 
-    # Progress tracking
-    steps = [
-        ("🔍 Analyzing Audience", "Understanding your target audience psychology and behaviour"),
-        ("💡 Creating Strategy", "Developing effective strategy for your target audience"),
-        ("✍️ Writing Script", "Generating your ad script"),
-        ("⚖️ Evaluating Quality", "Checking script quality and effectiveness"),
-        ("🔧 Refining Script", "Improving script based on evaluation")
-    ]
-
     # Create progress container
     progress_container = st.container()
     with progress_container:
         st.subheader("Workflow Progress")
 
-        current_step = st.session_state.get('current_step', 0)
-
-        # Overall progress bar
-        if st.session_state.get('processing_complete'):
-            overall_progress = 1.0
-        else:
-            overall_progress = current_step / len(steps)
-
-        st.progress(overall_progress)
-
-        # Individual step status
-        for i, (title, description) in enumerate(steps):
-            col1, col2, col3 = st.columns([1, 3, 6])
-
-            with col1:
-                if i < current_step:
-                    st.write("✅")
-                elif i == current_step and st.session_state.get('processing_started'):
-                    st.write("🔄")
-                else:
-                    st.write("⏳")
-
-            with col2:
-                if i == current_step and st.session_state.get('processing_started'):
-                    st.write(f"**{title}**...")
-                else:
-                    st.write(f"**{title}**")
+        progress_bar = st.progress(1.0 if st.session_state.get('processing_complete') else 0.0)
+        step_placeholders = {node: st.empty() for node, _, _ in STEPS}
 
-            with col3:
-                st.write(description)
+        finished = st.session_state.get('processing_complete')
+        for node, title, description in STEPS:
+            render_step(step_placeholders[node], title, description, "done" if finished else "pending")
 
     # Status messages
     status_container = st.container()
 
-    # Start processing if not started
-    if not st.session_state['processing_started']:
-        with st.spinner("Initializing workflow..."):
-            time.sleep(30)
+    # Run the workflow, driving the step indicators and live output from real graph events
+    if not st.session_state['processing_complete'] and not st.session_state['processing_error']:
         st.session_state['processing_started'] = True
-        st.rerun()
 
-    # Run the workflow with simulated progress
-    if st.session_state['processing_started'] and not st.session_state['processing_complete'] and not st.session_state[
-        'processing_error']:
+        with status_container:
+            status = st.info("🚀 Workflow is running...")
+
+        st.subheader("📝 Live Output")
+        live_caption = st.empty()
+        live_output = st.empty()
 
         try:
-            with status_container:
-                st.info("🚀 Workflow is running... This may take several minutes.")
-
-            # Step 1: Analyzing Audience
-            if st.session_state['current_step'] == 0:
-                st.session_state['current_step'] = 1
-                st.rerun()
-
-            # Step 2: Creating Strategy
-            elif st.session_state['current_step'] == 1:
-                time.sleep(30)  # Show progress for a moment
-                st.session_state['current_step'] = 2
-                st.rerun()
-
-            # Step 3: Writing Script
-            elif st.session_state['current_step'] == 2:
-                time.sleep(30)
-                st.session_state['current_step'] = 3
-                st.rerun()
-
-            # Step 4: Evaluating Quality
-            elif st.session_state['current_step'] == 3:
-                time.sleep(30)
-                st.session_state['current_step'] = 4
-                st.rerun()
-
-            # Final step: Run the actual workflow
-            elif st.session_state['current_step'] == 4:
-                with st.spinner("Finalizing your ad script..."):
-                    # Build and run the graph
-                    graph = build_pre_review_graph()
-                    agent_state = st.session_state['agent_state']
-
-                    # Run the workflow
-                    result_dict = graph.invoke(agent_state)
-
-                    # Convert dictionary back to AgentState object
-                    try:
-                        result = AgentState(**result_dict)
-                    except Exception:
-                        result = result_dict
-
-                    # Store result
-                    st.session_state['workflow_result'] = result
-                    st.session_state['processing_complete'] = True
-                    st.session_state['current_step'] = len(steps)
-
-                st.rerun()
+            graph = pre_review_graph(config.script_best_of_n)
+            agent_state = st.session_state['agent_state']
+
+            # A run that failed part-way under this id resumes from the node that failed
+            thread_id = st.session_state.setdefault('run_thread_id', new_thread_id())
+            resume_at = pending_nodes(graph, thread_id)
+
+            completed = set()
+            runs = {node: 0 for node, _, _ in STEPS}
+            running = None
+            # Parser of each LLM response (retries and hedges stream as separate responses)
+            live_parsers = {}
+            last_redraw = 0.0
+            result = None
+
+            def set_running(node):
+                nonlocal running
+                if node == running:
+                    return
+                running = node
+                if node is None:
+                    return
+                runs[node] += 1
+                live_parsers.clear()
+                title, description = next((t, d) for n, t, d in STEPS if n == node)
+                render_step(step_placeholders[node], title, description, "running", runs[node])
+                status.info(f"🚀 {title}...")
+
+            if resume_at:
+                resume_node = STEP_ALIASES.get(resume_at[0], resume_at[0])
+                resume_index = next((i for i, (n, _, _) in enumerate(STEPS) if n == resume_node), 0)
+                for node, title, description in STEPS[:resume_index]:
+                    completed.add(node)
+                    render_step(step_placeholders[node], title, description, "done")
+                set_running(STEPS[resume_index][0])
+            else:
+                set_running(STEPS[0][0])
+
+            run_input = None if resume_at else agent_state
+            for event in stream_workflow(graph, run_input, thread_config(thread_id)):
+                if event.node in STEP_ALIASES:
+                    event = event.model_copy(update={"node": STEP_ALIASES[event.node]})
+
+                if event.type == WorkflowEventType.TOKEN:
+                    if event.node not in runs:
+                        continue
+                    set_running(event.node)
+                    parser = live_parsers.setdefault(event.message_id, VideoScriptStreamParser())
+                    new_scenes = parser.feed(event.text)
+
+                    now = time.monotonic()
+                    if new_scenes or now - last_redraw >= LIVE_OUTPUT_REFRESH:
+                        last_redraw = now
+                        title = next(t for n, t, _ in STEPS if n == event.node)
+                        live_caption.caption(f"Streaming from {title}")
+                        best = max(live_parsers.values(), key=lambda p: (len(p.items), len(p.text)))
+                        render_live_output(live_output, best, event.node in SCRIPT_NODES)
+
+                elif event.type == WorkflowEventType.NODE_COMPLETED:
+                    if event.node not in runs:
+                        continue
+                    if running != event.node:
+                        set_running(event.node)
+                    completed.add(event.node)
+
+                    # Show the finished video script, validated as a whole document
+                    if event.node in SCRIPT_NODES and live_parsers:
+                        best = max(live_parsers.values(), key=lambda p: (len(p.items), len(p.text)))
+                        script = best.finish_script() if best.items or best.malformed else None
+                        if script is not None:
+                            with live_output.container():
+                                display_video_script(script)
+
+                    title, description = next((t, d) for n, t, d in STEPS if n == event.node)
+                    render_step(step_placeholders[event.node], title, description, "done", runs[event.node])
+
+                    # Refinement is optional, so it does not count towards the bar until it runs
+                    expected_steps = len(STEPS) if runs["script_refinement_node"] else len(STEPS) - 1
+                    progress_bar.progress(min(1.0, len(completed) / expected_steps))
+
+                    running = None
+                    set_running(NEXT_NODE.get(event.node))
+
+                elif event.type == WorkflowEventType.FINAL:
+                    result = event.state
+
+            # Store result; the run's checkpoints are no longer needed
+            st.session_state['workflow_result'] = result
+            st.session_state['processing_complete'] = True
+            discard_run(graph, st.session_state.pop('run_thread_id'))
+            # Variants of an earlier base script are not resumed
+            discard_checkpoints(st.session_state.pop('variation_thread_id', None))
 
         except Exception as e:
             st.session_state['processing_error'] = str(e)
-            st.rerun()
+
+        st.rerun()
 
     # Handle completion (rest of your existing code...)
     if st.session_state['processing_complete']:
@@ -216,11 +294,10 @@ def processing_ui():
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("Try Again"):
-                    # Reset processing state
+                    # Reset processing state; the run resumes from the node that failed
                     st.session_state['processing_started'] = False
                     st.session_state['processing_complete'] = False
                     st.session_state['processing_error'] = None
-                    st.session_state['current_step'] = 0
                     st.rerun()
 
             with col2:
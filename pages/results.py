@@ -211,7 +211,7 @@ def results_ui():
 
         # Iteration history
         iteration_history = safe_get_attribute(result, 'script_iteration_history')
-        display_iteration_history(iteration_history)
+        display_iteration_history(iteration_history, safe_get_attribute(result, 'refinement_lessons'))
 
     with tab4:
         st.subheader("💾 Export Your Script")
@@ -1,9 +1,79 @@
 import streamlit as st
 import time
-from src.agent.graph import build_variation_graph
+from src.agent.graph import get_variation_graph
+from src.agent.checkpointing import get_checkpointer, new_thread_id, run_workflow, discard_checkpoints
 from src.agent.state import AgentState
 from src.ui_components.display import display_video_script, display_static_script
 
+@st.cache_resource(show_spinner=False)
+def variation_graph():
+    """Compiled variation graph, shared by every session served by this process."""
+    return get_variation_graph(checkpointer=get_checkpointer())
+
+
+def display_variation(single_variation):
+    """Renders one generated variant: stats, focus, notes and script."""
+    if hasattr(single_variation, 'variation_name'):
+        variation_name = single_variation.variation_name
+        variation_type = single_variation.variation_type
+        comparison = single_variation.base_script_comparison
+        notes = single_variation.notes
+        iteration_count = single_variation.variation_iteration_count
+        eval_report = single_variation.variation_evaluation_report
+        variant_script = single_variation.ad_script_variation
+    else:
+        variation_name = single_variation.get('variation_name', 'Enhanced A/B Variant')
+        variation_type = single_variation.get('variation_type', 'Enhanced Variant')
+        comparison = single_variation.get('base_script_comparison', '')
+        notes = single_variation.get('notes', '')
+        iteration_count = single_variation.get('variation_iteration_count', 0)
+        eval_report = single_variation.get('variation_evaluation_report')
+        variant_script = single_variation.get('ad_script_variation')
+
+    # Stats
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Refinement Iterations", iteration_count)
+    with col2:
+        if eval_report:
+            if isinstance(eval_report, dict):
+                overall_score = eval_report.get('overall_score', 0)
+            else:
+                overall_score = eval_report.overall_score
+            st.metric("Final Quality Score", f"{overall_score:.1f}/5.0")
+        else:
+            st.metric("Final Quality Score", "N/A")
+    with col3:
+        st.metric("Status", "✅ Ready for A/B Testing")
+
+    st.markdown(f"""
+    <div class="variant-card">
+        <div class="variant-header">
+            <div class="variant-badge">{variation_type}</div>
+            <h3 class="variant-title">{variation_name}</h3>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    if comparison:
+        st.markdown(f"**🔄 Changes Made:** {comparison}")
+    if notes:
+        st.markdown(f"**📝 Quality Notes:** {notes}")
+    st.markdown("---")
+    # Display the variation script
+    if variant_script:
+        if isinstance(variant_script, dict):
+            script_type = variant_script.get('script_type', 'Video')
+        else:
+            script_type = getattr(variant_script, 'script_type', 'Video')
+        if script_type == "Video":
+            display_video_script(variant_script)
+        else:
+            display_static_script(variant_script)
+    else:
+        st.error("❌ No variant script found to display.")
+    st.markdown("---")
+
+
 def variations_ui():
     st.set_page_config(
         page_title="A/B Testing Variant",
@@ -195,7 +265,7 @@ def variations_ui():
                 <h3 style="color: #f1f5f9; margin: 0; font-size: 1.4rem; font-weight: 600;">Base Script (Approved)</h3>
             </div>
             <div style="background: rgba(15, 23, 42, 0.6); padding: 1rem; border-radius: 12px; border: 1px solid rgba(34, 197, 94, 0.3);">
-                <p style="color: #94a3b8; margin: 0; font-size: 0.9rem; text-align: center;">📊 This is your original approved script that will be used as the base for generating and evaluating a single A/B test variant</p>
+                <p style="color: #94a3b8; margin: 0; font-size: 0.9rem; text-align: center;">📊 This is your original approved script that will be used as the base for generating and evaluating the A/B test variants</p>
             </div>
         </div>
         """, unsafe_allow_html=True)
@@ -216,11 +286,11 @@ def variations_ui():
     # Info box about the new A/B test workflow
     st.markdown("""
     <div class="info-box">
-        <strong>🎯 Enhanced A/B Testing Strategy:</strong> We'll generate <b>ONE high-quality variant</b> of your approved script, making all changes in a single, cohesive draft:
+        <strong>🎯 Enhanced A/B Testing Strategy:</strong> We'll generate <b>several high-quality variants</b> of your approved script in parallel, each led by a different focus:
         <br><br>
-        <b>• Multi-Faceted Enhancement:</b> Hook modification, CTA upgrade, and emotional tone shift, all together<br>
-        <b>• Quality Refinement:</b> The AI will evaluate and refine this variant until maximum quality is achieved (up to 3 iterations)<br>
-        <b>• Easy Comparison:</b> Directly compare your final variant with the original script, side-by-side
+        <b>• Distinct Angles:</b> Pain point, aspiration and curiosity hooks, each with its own CTA and emotional tone<br>
+        <b>• Quality Refinement:</b> The AI will evaluate and refine every variant until maximum quality is achieved (up to 3 iterations each)<br>
+        <b>• Easy Comparison:</b> Directly compare each final variant with the original script, side-by-side
     </div>
     """, unsafe_allow_html=True)
 
@@ -230,7 +300,7 @@ def variations_ui():
     if not st.session_state['variations_generated'] and not st.session_state['generating_variations']:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            if st.button("🧪 Generate Enhanced A/B Test Variant", type="primary", use_container_width=True):
+            if st.button("🧪 Generate A/B Test Variants", type="primary", use_container_width=True):
                 st.session_state['generating_variations'] = True
                 st.rerun()
 
@@ -239,14 +309,14 @@ def variations_ui():
         st.markdown("""
         <div class="generating-animation">
             <div class="spinner"></div>
-            <h3>🤖 AI is creating and refining your enhanced variant...</h3>
-            <p>Generating variant → Evaluating quality → Refining script (up to 3 iterations)</p>
+            <h3>🤖 AI is creating and refining your variants in parallel...</h3>
+            <p>Generating variants → Evaluating quality → Refining scripts (up to 3 iterations each)</p>
         </div>
         """, unsafe_allow_html=True)
         try:
-            with st.spinner("Generating and refining your A/B test variant..."):
-                # Build and run the variation graph
-                variation_graph = build_variation_graph()
+            with st.spinner("Generating and refining your A/B test variants..."):
+                # Run the shared compiled variation graph
+                graph = variation_graph()
                 if isinstance(base_result, dict):
                     try:
                         agent_state = AgentState(**base_result)
@@ -254,11 +324,14 @@ def variations_ui():
                         agent_state = base_result
                 else:
                     agent_state = base_result
-                result = variation_graph.invoke(agent_state)
+                # A run that failed part-way under this id resumes from the node that failed
+                thread_id = st.session_state.setdefault('variation_thread_id', new_thread_id())
+                result = run_workflow(graph, agent_state, thread_id)
+                del st.session_state['variation_thread_id']
                 st.session_state['variations_result'] = result
                 st.session_state['variations_generated'] = True
                 st.session_state['generating_variations'] = False
-                st.success("✅ Enhanced variant generated and refined successfully!")
+                st.success("✅ Variants generated and refined successfully!")
                 time.sleep(1)
                 st.rerun()
         except Exception as e:
@@ -268,78 +341,31 @@ def variations_ui():
 
     # --- VARIANT RESULT DISPLAY ---
     if st.session_state['variations_generated'] and st.session_state['variations_result']:
-        st.subheader("🎭 Generated Enhanced A/B Test Variant")
+        st.subheader("🎭 Generated A/B Test Variants")
         variations_result = st.session_state['variations_result']
-        # Get single variation result
+        # Every variant generated in parallel; older results only carry the single variation
         if isinstance(variations_result, dict):
+            variations = variations_result.get('variation_results') or []
             single_variation = variations_result.get('single_variation_result')
         else:
+            variations = getattr(variations_result, 'variation_results', None) or []
             single_variation = getattr(variations_result, 'single_variation_result', None)
-        if single_variation:
-            if hasattr(single_variation, 'variation_name'):
-                variation_name = single_variation.variation_name
-                variation_type = single_variation.variation_type
-                comparison = single_variation.base_script_comparison
-                notes = single_variation.notes
-                iteration_count = single_variation.variation_iteration_count
-                eval_report = single_variation.variation_evaluation_report
-                variant_script = single_variation.ad_script_variation
-            else:
-                variation_name = single_variation.get('variation_name', 'Enhanced A/B Variant')
-                variation_type = single_variation.get('variation_type', 'Enhanced Variant')
-                comparison = single_variation.get('base_script_comparison', '')
-                notes = single_variation.get('notes', '')
-                iteration_count = single_variation.get('variation_iteration_count', 0)
-                eval_report = single_variation.get('variation_evaluation_report')
-                variant_script = single_variation.get('ad_script_variation')
-
-            # Stats
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Refinement Iterations", iteration_count)
-            with col2:
-                if eval_report:
-                    if isinstance(eval_report, dict):
-                        overall_score = eval_report.get('overall_score', 0)
-                    else:
-                        overall_score = eval_report.overall_score
-                    st.metric("Final Quality Score", f"{overall_score:.1f}/5.0")
-                else:
-                    st.metric("Final Quality Score", "N/A")
-            with col3:
-                st.metric("Status", "✅ Ready for A/B Testing")
-
-            st.markdown(f"""
-            <div class="variant-card">
-                <div class="variant-header">
-                    <div class="variant-badge">{variation_type}</div>
-                    <h3 class="variant-title">{variation_name}</h3>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            if comparison:
-                st.markdown(f"**🔄 Changes Made:** {comparison}")
-            if notes:
-                st.markdown(f"**📝 Quality Notes:** {notes}")
-            st.markdown("---")
-            # Display the variation script
-            if variant_script:
-                if isinstance(variant_script, dict):
-                    script_type = variant_script.get('script_type', 'Video')
-                else:
-                    script_type = getattr(variant_script, 'script_type', 'Video')
-                if script_type == "Video":
-                    display_video_script(variant_script)
-                else:
-                    display_static_script(variant_script)
+        if not variations and single_variation:
+            variations = [single_variation]
+        if variations:
+            if len(variations) == 1:
+                display_variation(variations[0])
             else:
-                st.error("❌ No variant script found to display.")
-            st.markdown("---")
+                tabs = st.tabs([v.variation_name if hasattr(v, 'variation_name') else v.get('variation_name', 'Variant')
+                                for v in variations])
+                for tab, variation in zip(tabs, variations):
+                    with tab:
+                        display_variation(variation)
             # Actions
             st.subheader("🚀 Next Steps")
             col1, col2, col3 = st.columns(3)
             with col1:
-                if st.button("🔄 Generate New Variant", use_container_width=True):
+                if st.button("🔄 Generate New Variants", use_container_width=True):
                     st.session_state['variations_generated'] = False
                     st.session_state['variations_result'] = None
                     st.rerun()
@@ -348,13 +374,15 @@ def variations_ui():
                     st.switch_page("pages/results.py")
             with col3:
                 if st.button("🏠 New Campaign", use_container_width=True):
-                    keys_to_clear = ['agent_state', 'workflow_result', 'variations_generated', 'variations_result']
+                    discard_checkpoints(st.session_state.get('variation_thread_id'))
+                    keys_to_clear = ['agent_state', 'workflow_result', 'variations_generated', 'variations_result',
+                                     'variation_thread_id']
                     for key in keys_to_clear:
                         if key in st.session_state:
                             del st.session_state[key]
                     st.switch_page("app.py")
         else:
-            st.error("❌ No enhanced variant was generated. Please try again.")
+            st.error("❌ No variants were generated. Please try again.")
             if st.button("🔄 Try Again"):
                 st.session_state['variations_generated'] = False
                 st.session_state['generating_variations'] = False
@@ -0,0 +1,181 @@
+"""
+Workflow checkpoints, so a failed run resumes from its last successful node.
+
+Graphs compiled with a checkpointer save the state after every node under the
+run's thread id. When a node fails (e.g. the third refinement call), calling
+`resume_workflow` with the same thread id continues from that node: the audience
+insight, strategy and drafts already paid for are not regenerated.
+
+The store is selected with `checkpointer_backend` (off by default): MongoDB in
+production, an in-memory or SQLite store for development and tests. The
+checkpoints of a run are deleted once it completes or is superseded by new
+input (`discard_run`). Abandoned runs are evicted by the in-memory store beyond
+`checkpoint_memory_max_threads` runs, and expired by MongoDB after
+`checkpoint_ttl_seconds`; SQLite keeps them until the file is removed.
+"""
+# Import libraries
+import uuid
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.config.config import config, CheckpointerBackend
+from src.config.logging_config import get_logger
+from src.agent.state import AgentState
+
+logger = get_logger(__name__)
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """
+    In-memory checkpointer that keeps the checkpoints of at most `max_threads` runs,
+    evicting the least recently written run first.
+    """
+
+    def __init__(self, max_threads: int):
+        super().__init__()
+        self.max_threads = max_threads
+        self._threads: "OrderedDict[str, None]" = OrderedDict()
+        self._threads_lock = threading.Lock()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+
+        thread_id = config["configurable"]["thread_id"]
+        with self._threads_lock:
+            self._threads[thread_id] = None
+            self._threads.move_to_end(thread_id)
+            evicted = [self._threads.popitem(last=False)[0] for _ in range(len(self._threads) - self.max_threads)]
+        for old_thread in evicted:
+            logger.info(f"Evicting the checkpoints of run {old_thread}")
+            super().delete_thread(old_thread)
+        return saved
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._threads_lock:
+            self._threads.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+
+def create_checkpointer(backend: Optional[CheckpointerBackend] = None) -> Optional[BaseCheckpointSaver]:
+    """
+    A new checkpointer for `backend` (default: `config.checkpointer_backend`), or None when disabled.
+    """
+    backend = backend or config.checkpointer_backend
+
+    if backend == CheckpointerBackend.NONE:
+        return None
+
+    if backend == CheckpointerBackend.MEMORY:
+        return BoundedInMemorySaver(config.checkpoint_memory_max_threads)
+
+    if backend == CheckpointerBackend.SQLITE:
+        import sqlite3
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError as e:
+            raise ImportError("The sqlite checkpoint backend needs `pip install langgraph-checkpoint-sqlite`") from e
+
+        path = Path(config.checkpoint_sqlite_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+    if backend == CheckpointerBackend.MONGODB:
+        from pymongo import MongoClient
+        from langgraph.checkpoint.mongodb import MongoDBSaver
+
+        if not config.checkpoint_mongodb_uri:
+            raise ValueError("CHECKPOINT_MONGODB_URI must be set for the mongodb checkpoint backend")
+        return MongoDBSaver(
+            MongoClient(config.checkpoint_mongodb_uri),
+            db_name=config.checkpoint_mongodb_db_name,
+            ttl=config.checkpoint_ttl_seconds,
+        )
+
+    raise ValueError(f"Unsupported checkpointer backend: {backend}")
+
+
+# Global instance, created on first use
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_checkpointer_created = False
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Get the shared checkpointer of the configured backend (None when checkpointing is disabled)"""
+    global _checkpointer, _checkpointer_created
+    if not _checkpointer_created:
+        with _checkpointer_lock:
+            if not _checkpointer_created:
+                _checkpointer = create_checkpointer()
+                _checkpointer_created = True
+                logger.info(f"Workflow checkpoints: {config.checkpointer_backend.value}")
+    return _checkpointer
+
+
+def new_thread_id() -> str:
+    """A new run (thread) id."""
+    return uuid.uuid4().hex
+
+
+def thread_config(thread_id: str) -> Dict[str, Any]:
+    """Run config addressing the checkpoints of `thread_id`."""
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def pending_nodes(graph, thread_id: str) -> Tuple[str, ...]:
+    """
+    Nodes a checkpointed run of `graph` still has to execute: empty when the run
+    completed, never started, or the graph has no checkpointer.
+    """
+    if graph.checkpointer is None:
+        return ()
+    return tuple(graph.get_state(thread_config(thread_id)).next)
+
+
+def resume_workflow(graph, thread_id: str) -> AgentState:
+    """
+    Continue a failed run of `graph` from the node that failed, reusing the state
+    saved after its last successful node.
+    """
+    pending = pending_nodes(graph, thread_id)
+    if not pending:
+        raise ValueError(f"Run {thread_id} has nothing to resume")
+
+    logger.info(f"Resuming run {thread_id} at {', '.join(pending)}")
+    return AgentState.model_validate(graph.invoke(None, config=thread_config(thread_id)))
+
+
+def run_workflow(graph, agent_state: AgentState, thread_id: str) -> AgentState:
+    """
+    Run `graph` under `thread_id`, resuming the run instead if an earlier attempt
+    under that id failed part-way. The checkpoints are discarded once it completes.
+    """
+    if pending_nodes(graph, thread_id):
+        result = resume_workflow(graph, thread_id)
+    else:
+        result = AgentState.model_validate(graph.invoke(agent_state, config=thread_config(thread_id)))
+    discard_run(graph, thread_id)
+    return result
+
+
+def discard_run(graph, thread_id: str) -> None:
+    """Delete the checkpoints of a finished or abandoned run."""
+    if graph.checkpointer is not None:
+        graph.checkpointer.delete_thread(thread_id)
+
+
+def discard_checkpoints(thread_id: Optional[str]) -> None:
+    """Delete the checkpoints a run left in the shared checkpointer, e.g. when new input supersedes it."""
+    checkpointer = get_checkpointer()
+    if thread_id and checkpointer is not None:
+        checkpointer.delete_thread(thread_id)
+
+
+# Export public interface
+__all__ = ['BoundedInMemorySaver', 'create_checkpointer', 'get_checkpointer', 'new_thread_id', 'thread_config',
+           'pending_nodes', 'resume_workflow', 'run_workflow', 'discard_run', 'discard_checkpoints']
@@ -0,0 +1,145 @@
+"""
+Memoized, pre-serialized context blocks shared by the prompt builders.
+
+The campaign brief, product details, demographic profile, creative strategy and
+audience insight appear in almost every prompt of a run but only depend on inputs
+that do not change once the insight has been generated. Each block is serialized once per
+distinct source (keyed by a fingerprint of the `AgentState` fields it is built
+from, so editing a field yields a new block) and the builders splice the cached
+strings into their sections with `json_object`, which produces exactly what
+encoding the enclosing dict as a whole would (see `prompt_encoding`). Repeated calls are
+cheaper and every prompt embeds byte-identical blocks, which keeps provider
+prompt-cache prefixes stable.
+"""
+# Import libraries
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from src.agent.state import AgentState
+from src.agent.prompt_encoding import current_encoding, encode_json, encode_members
+
+
+# Max distinct sources remembered per block kind
+MAX_ENTRIES_PER_BLOCK = 256
+
+
+class ContextBlockCache:
+    """
+    Thread-safe LRU of serialized blocks keyed by (block name, prompt encoding, source fingerprint).
+    """
+
+    def __init__(self, max_entries_per_block: int = MAX_ENTRIES_PER_BLOCK):
+        self.max_entries_per_block = max_entries_per_block
+        self._lock = threading.Lock()
+        self._blocks: Dict[str, "OrderedDict[Hashable, str]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, fingerprint: Hashable, build: Callable[[], Any]) -> str:
+        """Serialized block for `fingerprint`, building and serializing it on first use."""
+        encoding = current_encoding()
+        fingerprint = (encoding, fingerprint)
+        with self._lock:
+            entries = self._blocks.setdefault(name, OrderedDict())
+            serialized = entries.get(fingerprint)
+            if serialized is not None:
+                entries.move_to_end(fingerprint)
+                self.hits += 1
+                return serialized
+
+        serialized = encode_json(build(), encoding)
+        with self._lock:
+            self.misses += 1
+            entries[fingerprint] = serialized
+            if len(entries) > self.max_entries_per_block:
+                entries.popitem(last=False)
+        return serialized
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+            self.hits = self.misses = 0
+
+
+# Global instance
+context_block_cache = ContextBlockCache()
+
+
+def get_context_block_cache() -> ContextBlockCache:
+    """Get the shared context block cache"""
+    return context_block_cache
+
+
+def json_object(members: Dict[str, Optional[str]]) -> str:
+    """Serialize a dict whose values are already serialized blocks without re-encoding them."""
+    return encode_members(members)
+
+
+def serialized(value: Any) -> str:
+    """A run-specific value serialized like the cached blocks."""
+    return encode_json(value)
+
+
+def campaign_brief(state: AgentState) -> str:
+    """Campaign goal, platform, creative direction and tone."""
+    fingerprint: Tuple = (state.campaign_goal, state.ad_platform, state.creative_direction, state.script_tone)
+    return context_block_cache.get("campaign_brief", fingerprint, lambda: {
+        "campaign_goal": state.campaign_goal.value,
+        "ad_platform": state.ad_platform.value,
+        "creative_direction": state.creative_direction.value,
+        "script_tone": state.script_tone.value,
+    })
+
+
+def product_details(state: AgentState) -> str:
+    """The product with its focused feature."""
+    p = state.product
+    fingerprint = (p.model_dump_json(), state.product_feature_focus)
+    return context_block_cache.get("product_details", fingerprint, lambda: {
+        "name": p.product_name,
+        "overview": p.product_description,
+        "focused_feature": {
+            "name": state.product_feature_focus,
+            "description": p.product_features.get(state.product_feature_focus)
+        },
+        "unique_selling_points": p.unique_selling_point,
+        "problems_solved": p.problems_solved,
+        "supported_platforms": [sp.value for sp in p.supported_platforms]
+    })
+
+
+def demographic_profile(state: AgentState) -> str:
+    """Persona demographics, without the free-text fields the audience insight elaborates on."""
+    a = state.audience_persona
+    fingerprint = (a.age_range, a.gender, tuple(a.location), a.income_range, a.education_level)
+    return context_block_cache.get("demographic_profile", fingerprint, lambda: {
+        "age_range": a.age_range,
+        "gender": a.gender.value,
+        "location": [c.value for c in a.location],
+        "income_range": a.income_range.value,
+        "education_level": a.education_level.value if a.education_level else 'Not specified'
+    })
+
+
+def creative_strategy(state: AgentState, full: bool = False) -> str:
+    """Strategy pillars, hooks, CTAs and triggers; `full` adds the visual concept and audio strategy."""
+    fields = ["core_message_pillars", "brainstormed_hooks", "generated_ctas", "emotional_triggers"]
+    if full:
+        fields += ["primary_visual_concept", "audio_strategy"]
+    values = {field: getattr(state, field) for field in fields}
+    fingerprint = tuple((field, tuple(value) if isinstance(value, list) else value) for field, value in values.items())
+    return context_block_cache.get("creative_strategy", fingerprint, lambda: values)
+
+
+def audience_insight(state: AgentState) -> Optional[str]:
+    """The generated audience insight, or None before it exists."""
+    ai = state.audience_insight
+    if ai is None:
+        return None
+    return context_block_cache.get("audience_insight", ai.model_dump_json(), ai.model_dump)
+
+
+# Export public interface
+__all__ = ['ContextBlockCache', 'context_block_cache', 'get_context_block_cache', 'json_object', 'serialized',
+           'campaign_brief', 'product_details', 'demographic_profile', 'creative_strategy', 'audience_insight']
@@ -1,88 +1,145 @@
+import threading
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
 from langgraph.graph import StateGraph, START, END
+from langgraph.graph.state import CompiledStateGraph
+
+from src.config.config import config
 
 from src.config.logging_config import get_logger
 from src.agent.state import AgentState, SingleVariation
 
-from src.agent.nodes.audience_insight import audience_insight_node
-from src.agent.nodes.creative_strategy import creative_strategy_node
-from src.agent.nodes.script_generator import script_generation_node
-from src.agent.nodes.script_evaluator import script_evaluation_node
-from src.agent.nodes.script_refiner import script_refinement_node
-from src.agent.nodes.variation_generator import variation_generation_node
-from src.agent.nodes.variation_evaluator import variation_evaluation_node
-from src.agent.nodes.variation_refiner import variation_refinement_node
+from src.agent.nodes.audience_insight import audience_insight_node, audience_insight_node_async
+from src.agent.nodes.creative_strategy import creative_strategy_node, creative_strategy_node_async
+from src.agent.nodes.script_generator import script_generation_node, script_generation_node_async
+from src.agent.nodes.script_evaluator import script_evaluation_node, script_evaluation_node_async
+from src.agent.nodes.script_refiner import script_refinement_node, script_refinement_node_async
+from src.agent.nodes.history_compaction import history_compaction_node
+from src.agent.nodes.script_candidates import (
+    script_candidate_generation_node, script_candidate_generation_node_async,
+    script_candidate_evaluation_node, script_candidate_evaluation_node_async
+)
+from src.agent.nodes.variation_generator import variation_generation_node, variation_generation_node_async
+from src.agent.nodes.variation_evaluator import variation_evaluation_node, variation_evaluation_node_async
+from src.agent.nodes.variation_refiner import variation_refinement_node, variation_refinement_node_async
+from src.agent.nodes.variation_generator import DEFAULT_VARIATION_REQUEST
+from src.agent.nodes.variation_fanout import (
+    variation_fan_out_node, route_variations, variation_branch_node, variation_branch_node_async,
+    collect_variations_node, BRANCH_NODE
+)
 
 logger = get_logger(__name__)
 
 MAX_REFINEMENT_ITERATIONS = 3
 MAX_VARIATION_REFINEMENT_ITERATIONS = 3
 
-def route_after_evaluation(state: AgentState) -> str:
+def route_after_evaluation(state: AgentState, max_iterations: int = MAX_REFINEMENT_ITERATIONS) -> str:
     if state.evaluation_report and state.evaluation_report.is_approved_for_next_stage:
         logger.info("Script approved by AI. Moving to next node.")
         return END
-    if state.iteration_count >= MAX_REFINEMENT_ITERATIONS:
-        logger.warning(f"Max refinement iterations ({MAX_REFINEMENT_ITERATIONS}) reached. Ending workflow.")  # Fixed this line
+    if state.iteration_count >= max_iterations:
+        logger.warning(f"Max refinement iterations ({max_iterations}) reached. Ending workflow.")  # Fixed this line
         return END
     else:
-        logger.info(f"Script not approved by AI. Iteration {state.iteration_count+1}/{MAX_REFINEMENT_ITERATIONS}. Sending to script_refinement_node for revision.")
+        logger.info(f"Script not approved by AI. Iteration {state.iteration_count+1}/{max_iterations}. Sending to script_refinement_node for revision.")
         return "script_refinement_node"
 
 # First graph (pre-review)
-def build_pre_review_graph():
+def build_pre_review_graph(use_async: bool = False, best_of_n: Optional[int] = None,
+                           max_iterations: int = MAX_REFINEMENT_ITERATIONS, checkpointer: Any = None):
+    """
+    Build the pre-review workflow graph.
+
+    With `use_async=True` every node is registered as its native asyncio counterpart,
+    so the compiled graph must be driven with `ainvoke`/`astream` and many runs can
+    share one event loop instead of pinning a worker thread each.
+
+    With `best_of_n > 1` (default: `config.script_best_of_n`) the single generation
+    step is replaced by a wave of N parallel drafts across both generator models,
+    scored in one parallel evaluation wave; only the best draft enters the
+    evaluate -> refine loop.
+
+    Compiling takes a while and the compiled graph holds no per-run state, so callers
+    serving many runs should use `get_pre_review_graph` instead.
+    """
+    best_of_n = best_of_n or config.script_best_of_n
+
     builder = StateGraph(AgentState)
-    builder.add_node("audience_insight_node", audience_insight_node)
-    builder.add_node("creative_strategy_node", creative_strategy_node)
-    builder.add_node("script_generation_node", script_generation_node)
-    builder.add_node("script_evaluation_node", script_evaluation_node)
-    builder.add_node("script_refinement_node", script_refinement_node)
+    builder.add_node("audience_insight_node", audience_insight_node_async if use_async else audience_insight_node)
+    builder.add_node("creative_strategy_node", creative_strategy_node_async if use_async else creative_strategy_node)
+    builder.add_node("script_evaluation_node", script_evaluation_node_async if use_async else script_evaluation_node)
+    builder.add_node("script_refinement_node", script_refinement_node_async if use_async else script_refinement_node)
+    builder.add_node("history_compaction_node", history_compaction_node)
 
     builder.add_edge(START, "audience_insight_node")
     builder.add_edge("audience_insight_node", "creative_strategy_node")
-    builder.add_edge("creative_strategy_node", "script_generation_node")
-    builder.add_edge("script_generation_node", "script_evaluation_node")
-    builder.add_conditional_edges(
-        "script_evaluation_node",
-        route_after_evaluation,
-        {
-            "script_refinement_node": "script_refinement_node",
-            END: END
-        }
-    )
-    builder.add_edge("script_refinement_node", "script_evaluation_node")
 
-    return builder.compile()
+    if best_of_n > 1:
+        candidate_generation = script_candidate_generation_node_async if use_async else script_candidate_generation_node
+        builder.add_node("script_candidate_generation_node", partial(candidate_generation, best_of_n=best_of_n))
+        builder.add_node(
+            "script_candidate_evaluation_node",
+            script_candidate_evaluation_node_async if use_async else script_candidate_evaluation_node
+        )
+
+        builder.add_edge("creative_strategy_node", "script_candidate_generation_node")
+        builder.add_edge("script_candidate_generation_node", "script_candidate_evaluation_node")
+        first_evaluation = "script_candidate_evaluation_node"
+    else:
+        builder.add_node("script_generation_node", script_generation_node_async if use_async else script_generation_node)
+
+        builder.add_edge("creative_strategy_node", "script_generation_node")
+        builder.add_edge("script_generation_node", "script_evaluation_node")
+        first_evaluation = "script_evaluation_node"
 
+    for evaluation_node in dict.fromkeys([first_evaluation, "script_evaluation_node"]):
+        builder.add_conditional_edges(
+            evaluation_node,
+            partial(route_after_evaluation, max_iterations=max_iterations),
+            {
+                "script_refinement_node": "script_refinement_node",
+                END: END
+            }
+        )
+    builder.add_edge("script_refinement_node", "history_compaction_node")
+    builder.add_edge("history_compaction_node", "script_evaluation_node")
 
-def route_after_variation_evaluation(state: AgentState) -> str:
+    return builder.compile(checkpointer=checkpointer)
+
+
+def route_after_variation_evaluation(state: AgentState,
+                                     max_iterations: int = MAX_VARIATION_REFINEMENT_ITERATIONS) -> str:
     """Route after variation evaluation - similar to main workflow routing."""
     if state.variation_evaluation_report and state.variation_evaluation_report.is_approved_for_next_stage:
         logger.info("Variation script approved by AI. Moving to finalization.")
         return "finalize_variation_node"
 
-    if state.variation_iteration_count >= MAX_VARIATION_REFINEMENT_ITERATIONS:
+    if state.variation_iteration_count >= max_iterations:
         logger.warning(
-            f"Max variation refinement iterations ({MAX_VARIATION_REFINEMENT_ITERATIONS}) reached. Finalizing variation.")
+            f"Max variation refinement iterations ({max_iterations}) reached. Finalizing variation.")
         return "finalize_variation_node"
     else:
         logger.info(
-            f"Variation script not approved. Iteration {state.variation_iteration_count + 1}/{MAX_VARIATION_REFINEMENT_ITERATIONS}. Sending to refinement.")
+            f"Variation script not approved. Iteration {state.variation_iteration_count + 1}/{max_iterations}. Sending to refinement.")
         return "variation_refinement_node"
 
 
 def finalize_variation_node(state: AgentState) -> AgentState:
     """Final node to package the variation result."""
-    logger.info("Finalizing single variation result...")
+    request = state.variation_request or DEFAULT_VARIATION_REQUEST
+    logger.info(f"Finalizing variation result: {request.variation_name}")
 
-    # Create the final single variation result
+    # Create the final single variation result, with the tokens its own loop spent
     single_variation = SingleVariation(
-        variation_name="Enhanced A/B Test Variant",
-        variation_type="Hook + CTA + Emotional Tone Enhancement",
-        base_script_comparison="Modified opening hook, enhanced call-to-action, and shifted emotional tone for A/B testing against the original script",
+        variation_name=request.variation_name,
+        variation_type=request.variation_focus,
+        base_script_comparison="; ".join(request.target_changes) + " - for A/B testing against the original script",
         ad_script_variation=state.variation_script_draft,
         variation_evaluation_report=state.variation_evaluation_report,
         variation_iteration_count=state.variation_iteration_count,
-        notes=f"Refined through {state.variation_iteration_count} iterations with final quality score of {state.variation_evaluation_report.overall_score:.1f}/5.0" if state.variation_evaluation_report else "Generated single variation for A/B testing"
+        notes=f"Refined through {state.variation_iteration_count} iterations with final quality score of {state.variation_evaluation_report.overall_score:.1f}/5.0" if state.variation_evaluation_report else "Generated single variation for A/B testing",
+        total_llm_tokens=state.total_llm_tokens,
+        llm_call_stats=state.llm_call_stats,
     )
 
     return state.model_copy(update={
@@ -90,14 +147,19 @@ def finalize_variation_node(state: AgentState) -> AgentState:
     })
 
 
-def build_variation_graph():
-    """Build the variation workflow graph with evaluation and refinement loop."""
+def build_variant_graph(use_async: bool = False, max_iterations: int = MAX_VARIATION_REFINEMENT_ITERATIONS):
+    """
+    Build the graph of one variation: generation, then the evaluation and refinement loop.
+
+    The variation graph runs it once per variant, in parallel. It is compiled without
+    a checkpointer, so it uses the variation graph's when run inside it.
+    """
     builder = StateGraph(AgentState)
 
     # Add nodes
-    builder.add_node("variation_generation_node", variation_generation_node)
-    builder.add_node("variation_evaluation_node", variation_evaluation_node)
-    builder.add_node("variation_refinement_node", variation_refinement_node)
+    builder.add_node("variation_generation_node", variation_generation_node_async if use_async else variation_generation_node)
+    builder.add_node("variation_evaluation_node", variation_evaluation_node_async if use_async else variation_evaluation_node)
+    builder.add_node("variation_refinement_node", variation_refinement_node_async if use_async else variation_refinement_node)
     builder.add_node("finalize_variation_node", finalize_variation_node)
 
     # Linear flow: START -> generate -> evaluate
@@ -107,7 +169,7 @@ def build_variation_graph():
     # Conditional routing after evaluation
     builder.add_conditional_edges(
         "variation_evaluation_node",
-        route_after_variation_evaluation,
+        partial(route_after_variation_evaluation, max_iterations=max_iterations),
         {
             "variation_refinement_node": "variation_refinement_node",
             "finalize_variation_node": "finalize_variation_node"
@@ -121,3 +183,82 @@ def build_variation_graph():
     builder.add_edge("finalize_variation_node", END)
 
     return builder.compile()
+
+
+def build_variation_graph(use_async: bool = False, max_iterations: int = MAX_VARIATION_REFINEMENT_ITERATIONS,
+                          checkpointer: Any = None, variation_count: Optional[int] = None):
+    """
+    Build the variation workflow graph.
+
+    Fans out `variation_count` (default: `config.variation_count`) variants with
+    different hook/CTA/tone focuses via `Send`. Each branch runs its own
+    generate -> evaluate -> refine loop (`build_variant_graph`) concurrently with
+    the others, so K variants take about as long as one. The branches' results are
+    collected into `variation_results`, and the best one is kept as
+    `single_variation_result`.
+
+    With `use_async=True` the LLM nodes are registered as their asyncio counterparts
+    and the compiled graph must be driven with `ainvoke`/`astream`. Callers serving
+    many runs should use `get_variation_graph` instead.
+    """
+    variation_count = variation_count or config.variation_count
+    variant_graph = build_variant_graph(use_async, max_iterations)
+
+    builder = StateGraph(AgentState)
+    builder.add_node("variation_fan_out_node", variation_fan_out_node)
+    builder.add_node(BRANCH_NODE, partial(variation_branch_node_async if use_async else variation_branch_node,
+                                          variant_graph=variant_graph))
+    builder.add_node("collect_variations_node", collect_variations_node)
+
+    builder.add_edge(START, "variation_fan_out_node")
+    builder.add_conditional_edges("variation_fan_out_node", partial(route_variations, variation_count=variation_count),
+                                  [BRANCH_NODE])
+    builder.add_edge(BRANCH_NODE, "collect_variations_node")
+    builder.add_edge("collect_variations_node", END)
+
+    return builder.compile(checkpointer=checkpointer)
+
+
+# Compiled graphs shared by every run in the process, keyed by the configuration they were built with
+_compiled_graphs: Dict[Tuple, CompiledStateGraph] = {}
+_compiled_graphs_lock = threading.Lock()
+
+
+def _cached_graph(key: Tuple, build) -> CompiledStateGraph:
+    graph = _compiled_graphs.get(key)
+    if graph is None:
+        # Compile under the lock so concurrent first runs share one compilation
+        with _compiled_graphs_lock:
+            graph = _compiled_graphs.get(key)
+            if graph is None:
+                logger.info(f"Compiling {key[0]} graph {key[1:]}")
+                graph = _compiled_graphs[key] = build()
+    return graph
+
+
+def get_pre_review_graph(use_async: bool = False, best_of_n: Optional[int] = None,
+                         max_iterations: int = MAX_REFINEMENT_ITERATIONS, checkpointer: Any = None) -> CompiledStateGraph:
+    """
+    The pre-review graph for this configuration, compiled once per process and shared
+    across runs. Checkpointers are matched by identity.
+    """
+    best_of_n = best_of_n or config.script_best_of_n
+    key = ("pre_review", use_async, best_of_n, max_iterations, id(checkpointer) if checkpointer else None)
+    return _cached_graph(key, partial(build_pre_review_graph, use_async, best_of_n, max_iterations, checkpointer))
+
+
+def get_variation_graph(use_async: bool = False, max_iterations: int = MAX_VARIATION_REFINEMENT_ITERATIONS,
+                        checkpointer: Any = None, variation_count: Optional[int] = None) -> CompiledStateGraph:
+    """
+    The variation graph for this configuration, compiled once per process and shared
+    across runs. Checkpointers are matched by identity.
+    """
+    variation_count = variation_count or config.variation_count
+    key = ("variation", use_async, max_iterations, id(checkpointer) if checkpointer else None, variation_count)
+    return _cached_graph(key, partial(build_variation_graph, use_async, max_iterations, checkpointer, variation_count))
+
+
+def clear_graph_cache() -> None:
+    """Drop every cached compiled graph, e.g. after changing the node implementations in tests."""
+    with _compiled_graphs_lock:
+        _compiled_graphs.clear()
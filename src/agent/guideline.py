@@ -0,0 +1,191 @@
+"""
+Copywriting guideline asset shared by the prompt builders.
+
+Every creative strategy, generation, evaluation and refinement prompt embeds the
+copywriting guideline YAML as text. Instead of re-reading and re-dumping the file
+on each call (i.e. on every refinement loop iteration), the guideline is parsed
+once per file version, rendered once per prompt encoding, and the rendered string
+is served to all builders. A cheap `stat` detects edits; the content hash then
+decides whether the file really changed before it is parsed again.
+
+The guideline is split into sections with an `index` that tags each section with
+the ad formats, platforms, creative directions and prompt roles it applies to (see
+the file header). Each builder only embeds the sections matching its run and role,
+e.g. static-ad prompts leave out the scene flow, timing and audio directives.
+Every distinct selection is rendered once per file version and encoding.
+"""
+# Import libraries
+import os
+import hashlib
+import threading
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from src.config.config import config, PromptEncoding
+from src.config.logging_config import get_logger
+from src.agent.prompt_encoding import current_encoding, encode_document
+
+
+logger = get_logger(__name__)
+
+GUIDELINE_PATH = Path(__file__).parent / "copywriting_guideline.yaml"
+
+# Placements without scenes; every other ad platform gets a video script
+STATIC_AD_PLATFORMS = {"instagram_feeds", "facebook_feeds"}
+
+
+class GuidelineRole(str, Enum):
+    """Prompt that embeds the guideline, used to select its sections"""
+    CREATIVE_STRATEGY = "creative_strategy"
+    GENERATION = "generation"
+    EVALUATION = "evaluation"
+    REFINEMENT = "refinement"
+
+
+def ad_format(ad_platform: Any) -> str:
+    """'static' or 'video' for an `AdPlatform` (or its value)."""
+    return "static" if getattr(ad_platform, "value", ad_platform) in STATIC_AD_PLATFORMS else "video"
+
+
+# Selection key: (ad format, ad platform, creative direction, role); None matches any rule
+_Selection = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def _rule_matches(rule: Dict[str, List[str]], selection: _Selection) -> bool:
+    for key, value in zip(("formats", "platforms", "directions", "roles"), selection):
+        if key in rule and value is not None and value not in rule[key]:
+            return False
+    return True
+
+
+class _GuidelineVersion:
+    """Parsed and rendered content of one version of the guideline file."""
+
+    def __init__(self, stat_key: Tuple[int, int], digest: str, data: Any,
+                 renderings: Optional[Dict[Tuple[PromptEncoding, Tuple[str, ...]], str]] = None):
+        self.stat_key = stat_key
+        self.digest = digest
+        self.data = data
+        # A file without an index is one untagged section set
+        if isinstance(data, dict) and "sections" in data:
+            self.sections: Dict[str, Any] = data["sections"]
+            self.index: Dict[str, List[Dict[str, List[str]]]] = data.get("index") or {}
+        else:
+            self.sections, self.index = data or {}, {}
+        self.renderings: Dict[Tuple[PromptEncoding, Tuple[str, ...]], str] = \
+            renderings if renderings is not None else {}
+
+    def select(self, selection: _Selection) -> Tuple[str, ...]:
+        """Names of the sections whose rules match `selection`, in file order."""
+        return tuple(
+            name for name in self.sections
+            if name not in self.index or any(_rule_matches(rule or {}, selection) for rule in self.index[name])
+        )
+
+    def render(self, encoding: PromptEncoding, names: Tuple[str, ...]) -> str:
+        key = (encoding, names)
+        rendered = self.renderings.get(key)
+        if rendered is None:
+            # Rendering is deterministic, so a concurrent duplicate render is harmless
+            document = {name: self.sections[name] for name in names}
+            rendered = self.renderings.setdefault(key, encode_document(document, encoding))
+        return rendered
+
+
+class GuidelineAsset:
+    """
+    A YAML guideline file, parsed and rendered once per version.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._version: Optional[_GuidelineVersion] = None
+
+    def _current(self) -> _GuidelineVersion:
+        stat = os.stat(self.path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        version = self._version
+        if version is not None and version.stat_key == stat_key:
+            return version
+
+        with self._lock:
+            version = self._version
+            if version is not None and version.stat_key == stat_key:
+                return version
+
+            raw = self.path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if version is not None and version.digest == digest:
+                # Touched but unchanged (e.g. checkout or copy); keep the rendered text
+                version = _GuidelineVersion(stat_key, digest, version.data, version.renderings)
+            else:
+                data = yaml.safe_load(raw.decode("utf-8"))
+                version = _GuidelineVersion(stat_key, digest, data)
+                unknown = set(version.index) - set(version.sections)
+                if unknown:
+                    logger.warning(f"Copywriting guideline index lists unknown sections: {sorted(unknown)}")
+                logger.info("Loaded copywriting guideline", extra={"path": str(self.path), "digest": digest[:12]})
+
+            self._version = version
+            return version
+
+    @property
+    def data(self) -> Any:
+        """Parsed guideline YAML."""
+        return self._current().data
+
+    def section_names(self, ad_platform: Any = None, role: Optional[GuidelineRole] = None,
+                      creative_direction: Any = None) -> Tuple[str, ...]:
+        """
+        Sections that apply to a prompt. Unset criteria match every rule; with
+        `guideline_section_selection` disabled every section applies.
+        """
+        version = self._current()
+        if not config.guideline_section_selection:
+            return tuple(version.sections)
+        selection = (
+            ad_format(ad_platform) if ad_platform is not None else None,
+            getattr(ad_platform, "value", ad_platform),
+            getattr(creative_direction, "value", creative_direction),
+            getattr(role, "value", role),
+        )
+        return version.select(selection)
+
+    def render(self, encoding: Optional[PromptEncoding] = None, ad_platform: Any = None,
+               role: Optional[GuidelineRole] = None, creative_direction: Any = None) -> str:
+        """
+        Guideline as embedded in the prompts, in the given or configured prompt encoding,
+        restricted to the sections that apply to the platform, role and creative direction given.
+        """
+        names = self.section_names(ad_platform, role, creative_direction)
+        return self._current().render(encoding or current_encoding(), names)
+
+    @property
+    def rendered(self) -> str:
+        """Whole guideline as embedded in the prompts, in the configured prompt encoding."""
+        return self.render()
+
+
+# Global instance
+guideline_asset = GuidelineAsset(GUIDELINE_PATH)
+
+
+def get_guideline_asset() -> GuidelineAsset:
+    """Get the shared copywriting guideline asset"""
+    return guideline_asset
+
+
+def rendered_guideline(encoding: Optional[PromptEncoding] = None, ad_platform: Any = None,
+                       role: Optional[GuidelineRole] = None, creative_direction: Any = None) -> str:
+    """The current copywriting guideline, rendered for prompts (see `GuidelineAsset.render`)."""
+    return guideline_asset.render(encoding, ad_platform, role, creative_direction)
+
+
+# Export public interface
+__all__ = ['GuidelineAsset', 'GuidelineRole', 'GUIDELINE_PATH', 'STATIC_AD_PLATFORMS', 'ad_format',
+           'get_guideline_asset', 'guideline_asset', 'rendered_guideline']
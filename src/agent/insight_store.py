@@ -0,0 +1,275 @@
+"""
+Persistent store of audience insights keyed by persona and product.
+
+`audience_insight_node` depends only on `AudiencePersona` and `Product`, and
+marketers reuse a small set of personas across many tones, platforms and creative
+directions. Insights are stored under a canonical fingerprint of both models and,
+when no exact match exists, an insight generated for an effectively identical
+persona (same demographics, near-identical lifestyle / pain points / aspiration
+wording) is served instead of calling the LLM again.
+"""
+# Import libraries
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, FrozenSet, Iterator, Optional, Tuple
+
+from pydantic import ValidationError
+
+from src.config.config import config, LangChainConfig
+from src.config.logging_config import get_logger
+from src.agent.state import AudiencePersona, Product, AudienceInsight
+
+
+logger = get_logger(__name__)
+
+# Persona fields compared by token-set similarity; every other field must match exactly
+FREE_TEXT_PERSONA_FIELDS = ("lifestyle", "pain_points", "aspiration")
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "the", "their", "they", "to", "too", "with", "who", "that", "this",
+})
+
+
+def _normalize_text(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _canonical(value: Any) -> Any:
+    # Order-insensitive, case/whitespace-insensitive form of a dumped model
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return sorted((_canonical(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, str):
+        return _normalize_text(value)
+    return value
+
+
+def _fingerprint(value: Any) -> str:
+    canonical_json = json.dumps(_canonical(value), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+
+def persona_fingerprint(persona: AudiencePersona) -> str:
+    """Canonical fingerprint of a persona, insensitive to list order, case and spacing."""
+    return _fingerprint(persona.model_dump(mode="json"))
+
+
+def product_fingerprint(product: Product) -> str:
+    """Canonical fingerprint of a product, insensitive to list order, case and spacing."""
+    return _fingerprint(product.model_dump(mode="json"))
+
+
+def demographic_fingerprint(persona: AudiencePersona) -> str:
+    """Fingerprint of the persona fields that must match exactly for a near-duplicate."""
+    return _fingerprint(persona.model_dump(mode="json", exclude=set(FREE_TEXT_PERSONA_FIELDS)))
+
+
+def persona_token_set(persona: AudiencePersona) -> FrozenSet[str]:
+    """Normalized token set of the persona's free-text fields."""
+    tokens = set()
+    for field in FREE_TEXT_PERSONA_FIELDS:
+        for item in getattr(persona, field) or []:
+            for token in re.findall(r"[a-z0-9]+", item.lower()):
+                if token in _STOPWORDS:
+                    continue
+                # Cheap plural folding so 'meals' and 'meal' compare equal
+                if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+                    token = token[:-1]
+                tokens.add(token)
+    return frozenset(tokens)
+
+
+def token_set_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class AudienceInsightStore:
+    """
+    SQLite-backed store of generated audience insights with near-duplicate lookup.
+    """
+
+    def __init__(self, path: Path, similarity_threshold: float):
+        self.path = Path(path)
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS audience_insights ("
+                " persona_fingerprint TEXT NOT NULL, product_fingerprint TEXT NOT NULL,"
+                " demographic_fingerprint TEXT NOT NULL, persona_tokens TEXT NOT NULL,"
+                " insight TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (persona_fingerprint, product_fingerprint))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_audience_insights_candidates"
+                " ON audience_insights (product_fingerprint, demographic_fingerprint)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def find(self, persona: AudiencePersona, product: Product) -> Optional[Tuple[AudienceInsight, float]]:
+        """
+        Return (insight, similarity) for an exact or near-duplicate persona of the same product.
+        """
+        persona_fp = persona_fingerprint(persona)
+        product_fp = product_fingerprint(product)
+        tokens = persona_token_set(persona)
+
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT insight FROM audience_insights WHERE persona_fingerprint = ? AND product_fingerprint = ?",
+                (persona_fp, product_fp)
+            ).fetchone()
+            if row is not None:
+                insight = self._load(conn, persona_fp, product_fp, row[0])
+                if insight is not None:
+                    return insight, 1.0
+
+            candidates = conn.execute(
+                "SELECT persona_fingerprint, persona_tokens, insight FROM audience_insights"
+                " WHERE product_fingerprint = ? AND demographic_fingerprint = ?",
+                (product_fp, demographic_fingerprint(persona))
+            ).fetchall()
+
+            # Most similar first; stale rows are skipped (and removed)
+            ranked = sorted(
+                ((token_set_similarity(tokens, frozenset(json.loads(candidate_tokens))), candidate_fp, insight_json)
+                 for candidate_fp, candidate_tokens, insight_json in candidates),
+                key=lambda candidate: -candidate[0]
+            )
+            for similarity, candidate_fp, insight_json in ranked:
+                if similarity < self.similarity_threshold:
+                    break
+                insight = self._load(conn, candidate_fp, product_fp, insight_json)
+                if insight is not None:
+                    return insight, similarity
+
+        return None
+
+    @staticmethod
+    def _load(conn: sqlite3.Connection, persona_fp: str, product_fp: str, insight_json: str) -> Optional[AudienceInsight]:
+        """
+        The stored insight, or None when it no longer validates against `AudienceInsight`
+        (e.g. after a schema change); such rows are deleted.
+        """
+        try:
+            return AudienceInsight.model_validate_json(insight_json)
+        except ValidationError as e:
+            logger.warning(f"Dropping a stored audience insight that no longer validates: {e.error_count()} errors")
+            conn.execute(
+                "DELETE FROM audience_insights WHERE persona_fingerprint = ? AND product_fingerprint = ?",
+                (persona_fp, product_fp)
+            )
+            return None
+
+    def save(self, persona: AudiencePersona, product: Product, insight: AudienceInsight) -> None:
+        """Store the insight generated for a persona/product pair."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO audience_insights"
+                " (persona_fingerprint, product_fingerprint, demographic_fingerprint, persona_tokens, insight, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    persona_fingerprint(persona),
+                    product_fingerprint(product),
+                    demographic_fingerprint(persona),
+                    json.dumps(sorted(persona_token_set(persona))),
+                    insight.model_dump_json(),
+                    time.time(),
+                )
+            )
+
+    def clear(self) -> None:
+        """Remove every stored insight."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM audience_insights")
+
+
+class _InsightStoreProvider:
+    """Lazily opens the configured store so importing the module never touches the filesystem."""
+
+    def __init__(self, settings: LangChainConfig):
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._store: Optional[AudienceInsightStore] = None
+
+    def get(self) -> Optional[AudienceInsightStore]:
+        if not self.settings.audience_insight_store_enabled:
+            return None
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = AudienceInsightStore(
+                        self.settings.audience_insight_store_path,
+                        self.settings.audience_insight_similarity_threshold,
+                    )
+        return self._store
+
+
+# Global instance
+_insight_store_provider = _InsightStoreProvider(config)
+
+
+def get_insight_store() -> Optional[AudienceInsightStore]:
+    """Get the process-wide audience insight store, or None when it is disabled"""
+    return _insight_store_provider.get()
+
+
+def lookup_audience_insight(persona: AudiencePersona, product: Product) -> Optional[AudienceInsight]:
+    """Serve a stored insight for this persona/product, logging exact vs near-duplicate hits"""
+    store = get_insight_store()
+    if store is None:
+        return None
+
+    try:
+        found = store.find(persona, product)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Audience insight store lookup failed: {e}")
+        return None
+
+    if found is None:
+        return None
+
+    insight, similarity = found
+    logger.info(
+        "Serving audience insight from store",
+        extra={"match": "exact" if similarity == 1.0 else "near_duplicate", "similarity": round(similarity, 3)}
+    )
+    return insight
+
+
+def remember_audience_insight(persona: AudiencePersona, product: Product, insight: AudienceInsight) -> None:
+    """Persist a freshly generated insight for later runs"""
+    store = get_insight_store()
+    if store is None:
+        return
+
+    try:
+        store.save(persona, product, insight)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Audience insight store write failed: {e}")
+
+
+# Export public interface
+__all__ = ['AudienceInsightStore', 'get_insight_store', 'lookup_audience_insight', 'remember_audience_insight',
+           'persona_fingerprint', 'product_fingerprint', 'persona_token_set', 'token_set_similarity']
@@ -0,0 +1,297 @@
+"""
+Content-addressed response cache for structured node calls.
+
+Retrying a run from the processing page or resubmitting the same form re-sends
+byte-identical prompts to the provider. Responses are cached under a hash of
+(provider, model, temperature, output schema, rendered messages) in an in-memory
+LRU tier, optionally backed by an on-disk SQLite tier (`llm_cache_disk_enabled`),
+both with size and TTL eviction.
+
+The best-of-N candidate and variation generators are excluded by default
+(`llm_cache_excluded_nodes`), since their drafts are meant to differ. The audience
+insight, creative strategy and script generation calls are cached, because a
+retry after a failed run should not pay for them again; exclude them too to
+re-sample them on every retry or resubmission.
+"""
+# Import libraries
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from functools import lru_cache
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+from pydantic import BaseModel, Field
+from langchain_core.messages import BaseMessage
+
+from src.config.config import config, LangChainConfig
+from src.config.logging_config import get_logger
+from src.agent.llm.registry import NodeLLMSettings
+
+
+logger = get_logger(__name__)
+
+
+class CachedResponse(BaseModel):
+    """
+    A cached structured response and the tokens the original call consumed.
+    """
+    payload: str = Field(..., description="JSON of the parsed structured response.")
+    total_tokens: int = Field(default=0, description="Tokens the original provider call consumed.")
+    created_at: float = Field(default_factory=time.time, description="Unix time the response was cached.")
+
+
+class CacheStats(BaseModel):
+    """
+    Hit/miss counters of the response cache.
+    """
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    tokens_saved: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCacheBackend:
+    """
+    Interface of a single cache tier.
+    """
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryLRUCache(ResponseCacheBackend):
+    """
+    Thread-safe in-memory LRU tier with TTL expiry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            if time.time() - value.created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCacheBackend):
+    """
+    On-disk tier stored in a single SQLite file, evicting expired then least recently used entries.
+    """
+
+    def __init__(self, path: Path, max_entries: int, ttl_seconds: float):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, payload TEXT NOT NULL, total_tokens INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, total_tokens, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return CachedResponse(payload=row[0], total_tokens=row[1], created_at=row[2])
+
+    def set(self, key: str, value: CachedResponse) -> None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, total_tokens, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value.payload, value.total_tokens, value.created_at, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+@lru_cache(maxsize=None)
+def _schema_fingerprint(schema: Type[BaseModel]) -> str:
+    # Changing the schema definition invalidates every response cached for it
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True)
+    return f"{schema.__module__}.{schema.__qualname__}:{hashlib.sha256(schema_json.encode('utf-8')).hexdigest()[:16]}"
+
+
+def response_cache_key(settings: NodeLLMSettings, schema: Type[BaseModel], messages: List[BaseMessage]) -> str:
+    """
+    Hash of everything that determines a structured response.
+    """
+    key_material = json.dumps({
+        "provider": settings.provider.value,
+        "model": settings.model,
+        "temperature": settings.temperature,
+        "schema": _schema_fingerprint(schema),
+        "messages": [[message.type, message.content] for message in messages],
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Tiered response cache: a memory LRU in front of an optional on-disk tier.
+    """
+
+    def __init__(self, settings: LangChainConfig, disk_backend: Optional[ResponseCacheBackend] = None):
+        self.settings = settings
+        self._stats_lock = threading.Lock()
+        self._stats = CacheStats()
+        self.memory = InMemoryLRUCache(settings.llm_cache_max_entries, settings.llm_cache_ttl_seconds)
+        self._disk = disk_backend
+        self._disk_lock = threading.Lock()
+
+    @property
+    def disk(self) -> Optional[ResponseCacheBackend]:
+        # The default SQLite tier is created lazily so importing the module never touches the filesystem
+        if not self.settings.llm_cache_disk_enabled:
+            return None
+        if self._disk is None:
+            with self._disk_lock:
+                if self._disk is None:
+                    self._disk = SQLiteResponseCache(
+                        self.settings.llm_cache_disk_path,
+                        self.settings.llm_cache_disk_max_entries,
+                        self.settings.llm_cache_ttl_seconds,
+                    )
+        return self._disk
+
+    def is_enabled_for(self, node: str) -> bool:
+        """Whether responses of a graph node may be served from the cache."""
+        return self.settings.llm_cache_enabled and node not in self.settings.llm_cache_excluded_nodes
+
+    def lookup(self, key: str, schema: Type[BaseModel]) -> Optional[Tuple[BaseModel, int]]:
+        """Return (parsed response, tokens saved) on a hit, or None on a miss."""
+        cached = self.memory.get(key)
+        tier = "memory"
+
+        if cached is None and self.disk is not None:
+            try:
+                cached = self.disk.get(key)
+                tier = "disk"
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Disk response cache lookup failed: {e}")
+            if cached is not None:
+                self.memory.set(key, cached)
+
+        with self._stats_lock:
+            if cached is None:
+                self._stats.misses += 1
+                return None
+            if tier == "memory":
+                self._stats.memory_hits += 1
+            else:
+                self._stats.disk_hits += 1
+            self._stats.tokens_saved += cached.total_tokens
+
+        return schema.model_validate_json(cached.payload), cached.total_tokens
+
+    def store(self, key: str, response: BaseModel, total_tokens: int) -> None:
+        """Cache a fresh structured response in every tier."""
+        cached = CachedResponse(payload=response.model_dump_json(), total_tokens=total_tokens)
+        self.memory.set(key, cached)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, cached)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Disk response cache write failed: {e}")
+
+    def stats(self) -> CacheStats:
+        """Snapshot of the hit/miss counters."""
+        with self._stats_lock:
+            return self._stats.model_copy()
+
+    def clear(self) -> None:
+        """Drop every cached response and reset the counters."""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        with self._stats_lock:
+            self._stats = CacheStats()
+
+
+# Global instance
+_response_cache = ResponseCache(config)
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache"""
+    return _response_cache
+
+
+def get_cache_stats() -> Dict[str, float]:
+    """Hit/miss counters and tokens saved by the response cache"""
+    stats = _response_cache.stats()
+    return {**stats.model_dump(), "hits": stats.hits, "hit_rate": stats.hit_rate}
+
+
+# Export public interface
+__all__ = ['ResponseCache', 'ResponseCacheBackend', 'InMemoryLRUCache', 'SQLiteResponseCache',
+           'CachedResponse', 'CacheStats', 'response_cache_key', 'get_response_cache', 'get_cache_stats']
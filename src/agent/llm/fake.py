@@ -0,0 +1,337 @@
+"""
+Deterministic local fake chat-model provider.
+
+`FakeChatModel` stands in for OpenAI/Gemini when a node role's provider (or
+`llm_provider_override`) is `fake`, so both workflow graphs can be run and
+benchmarked in CI or on air-gapped machines. Structured calls return schema-valid
+payloads for any node schema (`AudienceInsight`, `CreativeStrategyResponse`,
+`VideoScriptDraft`, `StaticAdDraft`, `EvaluationReport`, ...) after a latency
+drawn from the configured distribution, report token usage like a real provider,
+stream their JSON in chunks, fail at the configured error rate and approve
+evaluated scripts with the configured probability. Like OpenAI's automatic prompt
+caching, prompt prefixes of at least 1024 tokens that were sent before are reported
+as cached input tokens (in 128-token blocks).
+
+Responses are seeded from `fake_llm_seed`, the model, the temperature, the schema,
+the prompt and how often that prompt was sent before, so the same prompts replayed
+in a fresh process get the same payloads, latencies and errors.
+"""
+# Import libraries
+import math
+import time
+import json
+import random
+import asyncio
+import hashlib
+import threading
+from enum import Enum
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Type, Union, get_args, get_origin
+from pydantic import BaseModel, PrivateAttr
+from langchain_core.runnables import Runnable
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+
+from src.config.config import FakeLatencyDistribution
+from src.agent.llm.tokens import CHARS_PER_TOKEN, estimate_message_tokens
+from src.agent.state import EvaluationReport, VideoScriptDraft, StaticAdDraft, ScriptPatchSet
+
+
+class FakeProviderError(Exception):
+    """Injected provider failure; carries the HTTP status a real provider would have returned."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Max number of chunks a streamed response is split into
+MAX_STREAM_CHUNKS = 40
+
+# Simulated provider prompt cache: min cacheable prefix and cache granularity in tokens
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_BLOCK_TOKENS = 128
+PROMPT_CACHE_MAX_ENTRIES = 100_000
+
+# Distinct prompts whose call count is kept; the least recently sent are forgotten first
+CALL_COUNTER_MAX_ENTRIES = 10_000
+
+
+def sample_latency(rng: random.Random, distribution: FakeLatencyDistribution, mean: float, stddev: float) -> float:
+    """Draw a non-negative latency in seconds."""
+    if mean <= 0:
+        return 0.0
+    if distribution == FakeLatencyDistribution.CONSTANT or stddev <= 0:
+        return mean
+    if distribution == FakeLatencyDistribution.UNIFORM:
+        # Uniform distribution with the given mean and standard deviation
+        half_width = min(mean, stddev * math.sqrt(3))
+        return rng.uniform(mean - half_width, mean + half_width)
+    if distribution == FakeLatencyDistribution.NORMAL:
+        return max(0.0, rng.gauss(mean, stddev))
+
+    # Log-normal with the given mean and standard deviation (long right tail)
+    sigma = math.sqrt(math.log(1 + (stddev / mean) ** 2))
+    mu = math.log(mean) - sigma ** 2 / 2
+    return rng.lognormvariate(mu, sigma)
+
+
+def _number_bounds(metadata: List[Any]) -> tuple:
+    low, high = 1, 5
+    for constraint in metadata:
+        low = getattr(constraint, "ge", low)
+        high = getattr(constraint, "le", high)
+    return low, high
+
+
+def _fake_value(annotation: Any, name: str, metadata: List[Any], rng: random.Random) -> Any:
+    origin = get_origin(annotation)
+
+    if origin is Union:
+        return _fake_value(next(arg for arg in get_args(annotation) if arg is not type(None)), name, metadata, rng)
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (str,)
+        return [_fake_value(item_type, name, [], rng) for _ in range(3)]
+    if origin in (dict, Dict):
+        key_type, value_type = get_args(annotation) or (str, str)
+        keys = [member.value for member in key_type] if isinstance(key_type, type) and issubclass(key_type, Enum) \
+            else [f"{name}_{i}" for i in range(1, 4)]
+        return {key: _fake_value(value_type, name, [], rng) for key in keys}
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return fake_payload(annotation, rng)
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return rng.choice(list(annotation)).value
+    if annotation is bool:
+        return rng.random() < 0.5
+    if annotation is int:
+        return rng.randint(*_number_bounds(metadata))
+    if annotation is float:
+        return round(rng.uniform(*_number_bounds(metadata)), 1)
+    return f"fake {name.replace('_', ' ')} {rng.randint(1000, 9999)}"
+
+
+def _evaluation_payload(payload: Dict, rng: random.Random, approval_probability: float) -> Dict:
+    approved = rng.random() < approval_probability
+    overall_score = round(rng.uniform(4.0, 5.0) if approved else rng.uniform(2.0, 3.9), 1)
+
+    for metric in payload["detailed_scores"].values():
+        metric["score"] = min(5, max(1, round(overall_score + rng.uniform(-1, 1))))
+    payload["overall_score"] = overall_score
+    payload["is_approved_for_next_stage"] = approved
+    if approved:
+        payload["actionable_recommendations"] = []
+    return payload
+
+
+def _video_script_payload(payload: Dict, rng: random.Random) -> Dict:
+    scenes = [
+        {**payload["scenes"][0], "scene_number": number, "duration_seconds": float(rng.randint(2, 6))}
+        for number in range(1, rng.randint(3, 6) + 1)
+    ]
+    payload["scenes"] = scenes
+    payload["script_type"] = "Video"
+    payload["duration_estimate_seconds"] = sum(scene["duration_seconds"] for scene in scenes)
+    return payload
+
+
+def _script_patch_payload(rng: random.Random) -> Dict:
+    # Script-level fields valid on every draft type, so the patches apply to any current draft
+    fields = rng.sample(["call_to_action_text", "key_takeaway", "suggested_hashtags"], rng.randint(1, 3))
+    return {"patches": [
+        {"field": field, "new_value": _fake_value(List[str] if field == "suggested_hashtags" else str, field, [], rng)}
+        for field in fields
+    ]}
+
+
+def fake_payload(schema: Type[BaseModel], rng: random.Random, approval_probability: float = 0.7) -> Dict:
+    """Schema-valid JSON payload for `schema` drawn from `rng`."""
+    if schema is ScriptPatchSet:
+        return _script_patch_payload(rng)
+
+    payload = {
+        name: _fake_value(field.annotation, name, field.metadata, rng)
+        for name, field in schema.model_fields.items()
+    }
+
+    if schema is EvaluationReport:
+        return _evaluation_payload(payload, rng, approval_probability)
+    if schema is VideoScriptDraft:
+        return _video_script_payload(payload, rng)
+    if schema is StaticAdDraft:
+        payload["script_type"] = "Static"
+    return payload
+
+
+class _FakeResponse:
+    """Everything about one fake call, decided up front from its seed."""
+
+    def __init__(self, text: str, latency: float, time_to_first_token: float, error: Optional[FakeProviderError],
+                 usage: Dict[str, int]):
+        self.text = text
+        self.latency = latency
+        self.time_to_first_token = time_to_first_token
+        self.error = error
+        self.usage = usage
+
+    def chunks(self) -> List[str]:
+        size = max(1, math.ceil(len(self.text) / MAX_STREAM_CHUNKS))
+        return [self.text[i:i + size] for i in range(0, len(self.text), size)]
+
+    def chunk_delay(self) -> float:
+        return (self.latency - self.time_to_first_token) / max(1, len(self.chunks()))
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers locally with seeded, schema-valid JSON.
+    """
+    model: str = "fake"
+    temperature: float = 0.0
+    seed: int = 0
+    latency_distribution: FakeLatencyDistribution = FakeLatencyDistribution.LOGNORMAL
+    latency_mean: float = 1.0
+    latency_stddev: float = 0.5
+    time_to_first_token_ratio: float = 0.2
+    output_tokens_mean: int = 800
+    error_rate: float = 0.0
+    rate_limit_error_share: float = 0.5
+    approval_probability: float = 0.7
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: "OrderedDict[str, int]" = PrivateAttr(default_factory=OrderedDict)
+    _prompt_prefixes: set = PrivateAttr(default_factory=set)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def with_structured_output(self, schema: Type[BaseModel], *, method: str = "json_mode",
+                               include_raw: bool = False, **kwargs: Any) -> Runnable:
+        """Structured runnable that parses the fake JSON response into `schema`."""
+        return self.bind(response_schema=schema) | PydanticOutputParser(pydantic_object=schema)
+
+    def _rng(self, messages: List[BaseMessage], schema: Optional[Type[BaseModel]]) -> random.Random:
+        prompt = "\n".join(str(message.content) for message in messages)
+        key = hashlib.sha256(
+            f"{self.model}|{self.temperature}|{schema.__name__ if schema else ''}|{prompt}".encode("utf-8")
+        ).hexdigest()
+
+        # Repeated identical prompts (e.g. best-of-N drafts) get the next draw of the same sequence;
+        # a prompt evicted from the bounded counter starts its sequence over
+        with self._lock:
+            call_number = self._calls.pop(key, 0)
+            self._calls[key] = call_number + 1
+            while len(self._calls) > CALL_COUNTER_MAX_ENTRIES:
+                self._calls.popitem(last=False)
+        return random.Random(f"{self.seed}|{key}|{call_number}")
+
+    def _cached_input_tokens(self, messages: List[BaseMessage]) -> int:
+        # Hash the prompt in blocks; the longest prefix seen before counts as cached
+        prompt = "".join(f"<{message.type}>{message.content}" for message in messages)
+        block_chars = PROMPT_CACHE_BLOCK_TOKENS * CHARS_PER_TOKEN
+        min_chars = PROMPT_CACHE_MIN_TOKENS * CHARS_PER_TOKEN
+
+        digest = hashlib.sha256()
+        prefixes = []
+        for end in range(block_chars, len(prompt) + 1, block_chars):
+            digest.update(prompt[end - block_chars:end].encode("utf-8"))
+            prefixes.append((end, digest.hexdigest()))
+
+        with self._lock:
+            cached_chars = max((end for end, prefix in prefixes if prefix in self._prompt_prefixes), default=0)
+            if len(self._prompt_prefixes) > PROMPT_CACHE_MAX_ENTRIES:
+                self._prompt_prefixes.clear()
+            self._prompt_prefixes.update(prefix for end, prefix in prefixes if end >= min_chars)
+
+        return cached_chars // CHARS_PER_TOKEN if cached_chars >= min_chars else 0
+
+    def _plan(self, messages: List[BaseMessage], schema: Optional[Type[BaseModel]]) -> _FakeResponse:
+        rng = self._rng(messages, schema)
+
+        text = json.dumps(fake_payload(schema, rng, self.approval_probability)) if schema else "fake response"
+        latency = sample_latency(rng, self.latency_distribution, self.latency_mean, self.latency_stddev)
+
+        error = None
+        if rng.random() < self.error_rate:
+            if rng.random() < self.rate_limit_error_share:
+                error = FakeProviderError("Fake provider rate limit exceeded", status_code=429)
+            else:
+                error = FakeProviderError("Fake provider unavailable", status_code=503)
+
+        input_tokens = estimate_message_tokens(messages)
+        output_tokens = max(1, round(rng.gauss(self.output_tokens_mean, self.output_tokens_mean * 0.2)))
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": min(input_tokens, self._cached_input_tokens(messages))},
+        }
+
+        return _FakeResponse(text, latency, latency * self.time_to_first_token_ratio, error, usage)
+
+    def _message(self, response: _FakeResponse) -> AIMessage:
+        return AIMessage(content=response.text, usage_metadata=response.usage, response_metadata={"model_name": self.model})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        response = self._plan(messages, kwargs.get("response_schema"))
+        if response.error is not None:
+            time.sleep(response.time_to_first_token)
+            raise response.error
+
+        time.sleep(response.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(response))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        response = self._plan(messages, kwargs.get("response_schema"))
+        if response.error is not None:
+            await asyncio.sleep(response.time_to_first_token)
+            raise response.error
+
+        await asyncio.sleep(response.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(response))])
+
+    def _final_chunk(self, response: _FakeResponse) -> ChatGenerationChunk:
+        return ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata=response.usage, response_metadata={"model_name": self.model}
+        ))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        response = self._plan(messages, kwargs.get("response_schema"))
+        time.sleep(response.time_to_first_token)
+        if response.error is not None:
+            raise response.error
+
+        for piece in response.chunks():
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            time.sleep(response.chunk_delay())
+        yield self._final_chunk(response)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        response = self._plan(messages, kwargs.get("response_schema"))
+        await asyncio.sleep(response.time_to_first_token)
+        if response.error is not None:
+            raise response.error
+
+        for piece in response.chunks():
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(response.chunk_delay())
+        yield self._final_chunk(response)
+
+
+# Export public interface
+__all__ = ['FakeChatModel', 'FakeProviderError', 'fake_payload', 'sample_latency']
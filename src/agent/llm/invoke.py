@@ -0,0 +1,458 @@
+"""
+Sync and async invocation helpers shared by all agent nodes.
+
+Every node calls its structured LLM through `invoke_structured` (thread-based
+graphs) or `ainvoke_structured` (asyncio graphs), which resolve the pooled
+runnable from the registry, serve identical requests from the response cache,
+coalesce concurrent identical requests into one provider call, throttle provider
+calls to the configured rate limits, retry transient errors, hedge slow calls
+and collect token usage (incl. prompt tokens read from the provider's prompt
+cache) for the run's accounting.
+"""
+# Import libraries
+import time
+import uuid
+import threading
+from functools import partial
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+from pydantic import BaseModel, ConfigDict, Field
+from langchain_core.messages import BaseMessage
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from src.config.config import config
+from src.config.logging_config import get_logger
+from src.agent.llm.single_flight import get_single_flight
+from src.agent.state import AgentState, NodeTokenUsage, PromptSizeStats
+from src.agent.prompt_sizes import get_prompt_size_recorder
+from src.agent.llm.tokens import estimate_message_tokens
+from src.agent.llm.rate_limit import rate_limited, arate_limited
+from src.agent.llm.resilience import (
+    HedgeOutcome, RaceOutcome, call_with_retries, acall_with_retries, hedged_call, ahedged_call, get_latency_tracker,
+    race, arace, call_with_fallback, acall_with_fallback
+)
+from src.agent.llm.registry import get_llm_registry, get_structured_llm
+from src.agent.llm.cache import get_response_cache, response_cache_key
+
+
+logger = get_logger(__name__)
+
+
+class LLMCallResult(BaseModel):
+    """
+    Parsed response of a structured LLM call together with its token usage.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    response: Any = Field(..., description="Parsed structured output of the call.")
+    node: Optional[str] = Field(default=None, description="Graph node that made the call.")
+    total_tokens: int = Field(default=0, description="Input + output tokens reported by the provider, incl. wasted hedge tokens.")
+    retries: int = Field(default=0, description="Provider calls retried after a transient error.")
+    hedged: bool = Field(default=False, description="Whether a duplicate request was fired for this call.")
+    hedge_won: bool = Field(default=False, description="Whether the duplicate request finished first.")
+    wasted_tokens: int = Field(default=0, description="Tokens spent on the losing request of a hedged call.")
+    cache_hit: bool = Field(default=False, description="Whether the response was served from the response cache.")
+    coalesced: bool = Field(default=False, description="Whether the response was shared from a concurrent identical call.")
+    usage: NodeTokenUsage = Field(
+        default_factory=NodeTokenUsage, description="Provider-reported usage of the winning request (cached prompt tokens included)."
+    )
+    prompt_sizes: Optional[PromptSizeStats] = Field(
+        default=None, description="Per-part size breakdown of the prompt, when it was built by `assemble_messages`."
+    )
+    pending_losers: List[str] = Field(
+        default_factory=list, description="Ids of losing requests that were still running; see `LateLoserUsage`."
+    )
+
+
+def _plus_losers(result: LLMCallResult, losers: Iterable[LLMCallResult]) -> LLMCallResult:
+    # Adds the usage of losing requests made for the same call; the response and hedge flags stay the winner's
+    for loser in losers:
+        prompt_sizes = result.prompt_sizes
+        if loser.prompt_sizes is not None:
+            prompt_sizes = prompt_sizes.merged(loser.prompt_sizes) if prompt_sizes is not None else loser.prompt_sizes
+        result = result.model_copy(update={
+            "total_tokens": result.total_tokens + loser.total_tokens,
+            "retries": result.retries + loser.retries,
+            "wasted_tokens": result.wasted_tokens + loser.wasted_tokens,
+            "usage": NodeTokenUsage(
+                calls=result.usage.calls + loser.usage.calls,
+                input_tokens=result.usage.input_tokens + loser.usage.input_tokens,
+                cached_input_tokens=result.usage.cached_input_tokens + loser.usage.cached_input_tokens,
+                output_tokens=result.usage.output_tokens + loser.usage.output_tokens,
+            ),
+            "prompt_sizes": prompt_sizes,
+            "pending_losers": result.pending_losers + loser.pending_losers,
+        })
+    return result
+
+
+class LateLoserUsage:
+    """
+    Actual usage of losing requests (hedges, raced or fallback calls) that were still
+    running in a worker thread when their call returned.
+
+    A running thread cannot be interrupted, so the call is accounted with an estimate
+    for the loser; a done-callback records how far the loser's real usage differs from
+    it, and the run's next `token_accounting` applies the difference.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._settled: "OrderedDict[str, LLMCallResult]" = OrderedDict()
+
+    def watch(self, loser: Future, estimate: LLMCallResult, actual: Callable[[Any], LLMCallResult]) -> str:
+        """
+        Track a running loser accounted with `estimate`; returns its loser id.
+
+        `actual` turns the loser's return value into its usage.
+        """
+        loser_id = uuid.uuid4().hex
+
+        def record(future: Future) -> None:
+            if future.cancelled() or future.exception() is not None:
+                # A failed request reports no usage; keep the estimate
+                correction = LLMCallResult(response=None, node=estimate.node)
+            else:
+                correction = _plus_losers(
+                    LLMCallResult(response=None, node=estimate.node, total_tokens=-estimate.total_tokens,
+                                  wasted_tokens=-estimate.wasted_tokens),
+                    [actual(future.result())],
+                )
+            with self._lock:
+                self._settled[loser_id] = correction
+                # Bound the entries of runs that never account again
+                while len(self._settled) > self.max_entries:
+                    self._settled.popitem(last=False)
+
+        loser.add_done_callback(record)
+        return loser_id
+
+    def settle(self, loser_ids: Iterable[str]) -> Dict[str, LLMCallResult]:
+        """Usage corrections of the given losers that have finished, removed from the ledger."""
+        with self._lock:
+            return {loser_id: self._settled.pop(loser_id) for loser_id in loser_ids if loser_id in self._settled}
+
+
+# Global instance
+_late_loser_usage = LateLoserUsage()
+
+
+def get_late_loser_usage() -> LateLoserUsage:
+    """Get the process-wide ledger of late loser usage"""
+    return _late_loser_usage
+
+
+class _LLMRequest:
+    """A single structured call and the policies that apply to it."""
+
+    def __init__(self, node: str, role: str, schema: Type[BaseModel], messages: List[BaseMessage],
+                 temperature: Optional[float] = None):
+        self.node = node
+        self.role = role
+        self.schema = schema
+        self.messages = messages
+        self.temperature = temperature
+        self.prompt_sizes: Optional[PromptSizeStats] = getattr(messages, "prompt_sizes", None)
+
+        # Caching and coalescing are excluded per node separately: a re-run may want a fresh
+        # sample while concurrent identical requests still share one call
+        self.use_cache = get_response_cache().is_enabled_for(node)
+        self.use_single_flight = (
+            config.llm_single_flight_enabled and node not in config.llm_single_flight_excluded_nodes
+        )
+
+        self.key: Optional[str] = None
+        if self.use_cache or self.use_single_flight:
+            self.key = response_cache_key(get_llm_registry().node_settings(role, temperature), schema, messages)
+
+    def cached_result(self) -> Optional[LLMCallResult]:
+        if not self.use_cache:
+            return None
+
+        cached = get_response_cache().lookup(self.key, self.schema)
+        if cached is None:
+            return None
+
+        response, tokens_saved = cached
+        logger.info(f"Served {self.node} from response cache", extra={"node": self.node, "tokens_saved": tokens_saved})
+        return LLMCallResult(response=response, node=self.node, total_tokens=0, cache_hit=True)
+
+    def store(self, result: LLMCallResult) -> LLMCallResult:
+        if self.use_cache:
+            get_response_cache().store(self.key, result.response, result.total_tokens - result.wasted_tokens)
+        return result
+
+    def shared(self, result: LLMCallResult, is_shared: bool) -> LLMCallResult:
+        if not is_shared:
+            return result
+
+        # The leading call already accounts for the provider tokens
+        logger.info(f"Coalesced {self.node} with an identical in-flight request", extra={"node": self.node})
+        return result.model_copy(update={
+            "total_tokens": 0, "retries": 0, "hedged": False, "hedge_won": False, "wasted_tokens": 0, "coalesced": True,
+            "usage": NodeTokenUsage(), "pending_losers": [],
+        })
+
+    def hedge_delay(self) -> Optional[float]:
+        return get_latency_tracker().hedge_delay(self.node)
+
+    def record_latency(self, started_at: float) -> None:
+        get_latency_tracker().record(self.node, time.monotonic() - started_at)
+
+    def log_usage(self, usage: NodeTokenUsage) -> None:
+        logger.info(
+            f"{self.node} call used {usage.input_tokens} input tokens ({usage.cached_input_tokens} cached)",
+            extra={"node": self.node, "input_tokens": usage.input_tokens,
+                   "cached_input_tokens": usage.cached_input_tokens, "output_tokens": usage.output_tokens}
+        )
+
+    def result(self, outcome: HedgeOutcome) -> LLMCallResult:
+        (response, usage, total_tokens), retries = outcome.result
+        wasted_tokens = 0
+        pending_losers = []
+        if outcome.hedged:
+            if outcome.loser_result is not None:
+                (_, _, wasted_tokens), loser_retries = outcome.loser_result
+                retries += loser_retries
+            else:
+                # The loser was cancelled mid-flight; its prompt was already sent
+                wasted_tokens = estimate_message_tokens(self.messages)
+                if outcome.loser_future is not None:
+                    # It keeps running in its worker thread; its actual usage replaces the estimate later
+                    estimate = LLMCallResult(response=None, node=self.node, total_tokens=wasted_tokens,
+                                             wasted_tokens=wasted_tokens)
+                    pending_losers.append(
+                        get_late_loser_usage().watch(outcome.loser_future, estimate, self.hedge_loser_usage)
+                    )
+
+        if self.prompt_sizes is not None:
+            get_prompt_size_recorder().record(self.node, self.prompt_sizes)
+
+        return LLMCallResult(
+            response=response,
+            node=self.node,
+            usage=usage,
+            total_tokens=total_tokens + wasted_tokens,
+            retries=retries,
+            hedged=outcome.hedged,
+            hedge_won=outcome.hedge_won,
+            wasted_tokens=wasted_tokens,
+            prompt_sizes=self.prompt_sizes,
+            pending_losers=pending_losers,
+        )
+
+    def hedge_loser_usage(self, loser_result: Any) -> LLMCallResult:
+        # Only the winning request's usage is reported per node; the loser counts as wasted
+        (_, _, tokens), retries = loser_result
+        return LLMCallResult(response=None, node=self.node, total_tokens=tokens, wasted_tokens=tokens, retries=retries)
+
+
+def _total_tokens(usage_metadata: Dict[str, Dict]) -> int:
+    return sum(usage.get('total_tokens', 0) for usage in usage_metadata.values())
+
+
+def _node_usage(usage_metadata: Dict[str, Dict]) -> NodeTokenUsage:
+    # `cache_read` is reported by OpenAI (cached_tokens) and Gemini (cached_content_token_count)
+    return NodeTokenUsage(
+        calls=1,
+        input_tokens=sum(usage.get('input_tokens', 0) for usage in usage_metadata.values()),
+        cached_input_tokens=sum(
+            (usage.get('input_token_details') or {}).get('cache_read', 0) for usage in usage_metadata.values()
+        ),
+        output_tokens=sum(usage.get('output_tokens', 0) for usage in usage_metadata.values()),
+    )
+
+
+def _merge_node_usage(node_usage: Dict[str, NodeTokenUsage], results: tuple) -> Dict[str, NodeTokenUsage]:
+    merged = dict(node_usage)
+    for result in results:
+        if result.node is None or result.usage.calls == 0:
+            continue
+        current = merged.get(result.node, NodeTokenUsage())
+        merged[result.node] = NodeTokenUsage(
+            calls=current.calls + result.usage.calls,
+            input_tokens=current.input_tokens + result.usage.input_tokens,
+            cached_input_tokens=current.cached_input_tokens + result.usage.cached_input_tokens,
+            output_tokens=current.output_tokens + result.usage.output_tokens,
+        )
+    return merged
+
+
+def _merge_prompt_sizes(prompt_sizes: Dict[str, PromptSizeStats], results: tuple) -> Dict[str, PromptSizeStats]:
+    merged = dict(prompt_sizes)
+    for result in results:
+        # Only prompts that reached the provider cost input tokens
+        if result.node is None or result.usage.calls == 0 or result.prompt_sizes is None:
+            continue
+        merged[result.node] = merged.get(result.node, PromptSizeStats()).merged(result.prompt_sizes)
+    return merged
+
+
+def token_accounting(state: AgentState, *results: LLMCallResult) -> Dict[str, Any]:
+    """
+    State updates that add the calls' tokens, per-node usage and prompt sizes and retry/hedging counters
+    to the run's accounting.
+
+    Losing requests of this or earlier calls that have finished since are settled:
+    their actual usage replaces the estimate they were accounted with.
+    """
+    stats = state.llm_call_stats
+    pending = stats.pending_losers + [loser_id for result in results for loser_id in result.pending_losers]
+    settled = get_late_loser_usage().settle(pending)
+    # A settled loser may itself have left a hedge running
+    results += tuple(settled.values())
+    pending = [loser_id for loser_id in pending if loser_id not in settled]
+    pending += [loser_id for correction in settled.values() for loser_id in correction.pending_losers]
+
+    return {
+        "total_llm_tokens": state.total_llm_tokens + sum(result.total_tokens for result in results),
+        "llm_call_stats": stats.model_copy(update={
+            "retries": stats.retries + sum(result.retries for result in results),
+            "hedges_fired": stats.hedges_fired + sum(int(result.hedged) for result in results),
+            "hedge_wins": stats.hedge_wins + sum(int(result.hedge_won) for result in results),
+            "hedge_wasted_tokens": stats.hedge_wasted_tokens + sum(result.wasted_tokens for result in results),
+            "pending_losers": pending,
+            "node_usage": _merge_node_usage(stats.node_usage, results),
+            "prompt_sizes": _merge_prompt_sizes(stats.prompt_sizes, results),
+        }),
+    }
+
+
+def invoke_structured(node: str, role: str, schema: Type[BaseModel], messages: List[BaseMessage],
+                      temperature: Optional[float] = None) -> LLMCallResult:
+    """
+    Call the pooled structured LLM of a node role and parse the response into `schema`.
+
+    `temperature` overrides the role's configured temperature (e.g. for diverse candidates).
+    """
+    request = _LLMRequest(node, role, schema, messages, temperature)
+
+    def call_provider() -> LLMCallResult:
+        # Another flight may have filled the cache while this caller was queued
+        cached = request.cached_result()
+        if cached is not None:
+            return cached
+
+        structured_llm = get_structured_llm(role, schema, temperature=temperature)
+
+        def attempt():
+            started_at = time.monotonic()
+            with rate_limited(role, messages) as permit, get_usage_metadata_callback() as cb:
+                response = structured_llm.invoke(messages)
+                total_tokens = _total_tokens(cb.usage_metadata)
+                if permit is not None:
+                    permit.actual_tokens = total_tokens
+            request.record_latency(started_at)
+            usage = _node_usage(cb.usage_metadata)
+            request.log_usage(usage)
+            return response, usage, total_tokens
+
+        outcome = hedged_call(lambda: call_with_retries(attempt), request.hedge_delay())
+        return request.store(request.result(outcome))
+
+    if not request.use_single_flight:
+        return call_provider()
+
+    result, is_shared = get_single_flight().do(request.key, call_provider)
+    return request.shared(result, is_shared)
+
+
+async def ainvoke_structured(node: str, role: str, schema: Type[BaseModel], messages: List[BaseMessage],
+                             temperature: Optional[float] = None) -> LLMCallResult:
+    """
+    Async counterpart of `invoke_structured`; awaits the provider without pinning a thread.
+    """
+    request = _LLMRequest(node, role, schema, messages, temperature)
+
+    async def call_provider() -> LLMCallResult:
+        # Another flight may have filled the cache while this caller was queued
+        cached = request.cached_result()
+        if cached is not None:
+            return cached
+
+        structured_llm = get_structured_llm(role, schema, temperature=temperature)
+
+        async def attempt():
+            started_at = time.monotonic()
+            async with arate_limited(role, messages) as permit:
+                with get_usage_metadata_callback() as cb:
+                    response = await structured_llm.ainvoke(messages)
+                total_tokens = _total_tokens(cb.usage_metadata)
+                if permit is not None:
+                    permit.actual_tokens = total_tokens
+            request.record_latency(started_at)
+            usage = _node_usage(cb.usage_metadata)
+            request.log_usage(usage)
+            return response, usage, total_tokens
+
+        outcome = await ahedged_call(lambda: acall_with_retries(attempt), request.hedge_delay())
+        return request.store(request.result(outcome))
+
+    if not request.use_single_flight:
+        return await call_provider()
+
+    result, is_shared = await get_single_flight().ado(request.key, call_provider)
+    return request.shared(result, is_shared)
+
+
+def _raced_result(node: str, roles: List[str], messages: List[BaseMessage], outcome: RaceOutcome) -> LLMCallResult:
+    # Losing calls that finished still spent their tokens; abandoned ones had already sent their prompt
+    estimate = LLMCallResult(response=None, node=node, total_tokens=estimate_message_tokens(messages))
+    losers = outcome.loser_results + [estimate] * outcome.abandoned
+    # Losers still running in a worker thread cannot be stopped; their real usage replaces the estimate later
+    running = [get_late_loser_usage().watch(loser, estimate, lambda result: result) for loser in outcome.running_losers]
+    result = _plus_losers(outcome.result, losers)
+    result = result.model_copy(update={"pending_losers": result.pending_losers + running})
+
+    losing_tokens = result.total_tokens - outcome.result.total_tokens
+    logger.info(f"{roles[outcome.winner]} won the {node} call", extra={"node": node, "losing_tokens": losing_tokens})
+    return result
+
+
+def race_structured(node: str, roles: List[str], schema: Type[BaseModel], messages: List[BaseMessage]) -> LLMCallResult:
+    """
+    Call several node roles concurrently and keep the first response that parses into `schema`.
+    """
+    outcome = race([partial(invoke_structured, node, role, schema, messages) for role in roles])
+    return _raced_result(node, roles, messages, outcome)
+
+
+async def arace_structured(node: str, roles: List[str], schema: Type[BaseModel], messages: List[BaseMessage]) -> LLMCallResult:
+    """
+    Async counterpart of `race_structured`; the losing calls are cancelled.
+    """
+    outcome = await arace([partial(ainvoke_structured, node, role, schema, messages) for role in roles])
+    return _raced_result(node, roles, messages, outcome)
+
+
+def fallback_structured(node: str, primary_role: str, fallback_role: str, schema: Type[BaseModel],
+                        messages: List[BaseMessage], deadline: float) -> LLMCallResult:
+    """
+    Call `primary_role`, falling back to `fallback_role` when it errors or misses `deadline` seconds.
+    """
+    outcome = call_with_fallback(
+        partial(invoke_structured, node, primary_role, schema, messages),
+        partial(invoke_structured, node, fallback_role, schema, messages),
+        deadline,
+    )
+    return _raced_result(node, [primary_role, fallback_role], messages, outcome)
+
+
+async def afallback_structured(node: str, primary_role: str, fallback_role: str, schema: Type[BaseModel],
+                               messages: List[BaseMessage], deadline: float) -> LLMCallResult:
+    """
+    Async counterpart of `fallback_structured`.
+    """
+    outcome = await acall_with_fallback(
+        partial(ainvoke_structured, node, primary_role, schema, messages),
+        partial(ainvoke_structured, node, fallback_role, schema, messages),
+        deadline,
+    )
+    return _raced_result(node, [primary_role, fallback_role], messages, outcome)
+
+
+# Export public interface
+__all__ = ['LLMCallResult', 'LateLoserUsage', 'get_late_loser_usage', 'invoke_structured', 'ainvoke_structured',
+           'token_accounting', 'race_structured', 'arace_structured', 'fallback_structured', 'afallback_structured']
@@ -0,0 +1,322 @@
+"""
+Client-side rate limiting of LLM calls per provider account and model.
+
+Concurrent sessions, batch jobs and parallel graph branches share the same
+provider quotas, so every call first takes a slot from the limiter of its
+(provider, model, API key). A limiter enforces the requests-per-minute and
+tokens-per-minute budgets configured next to the node's model settings with two
+token buckets (prompt tokens are estimated from the rendered messages and
+reconciled with the reported usage afterwards), and caps in-flight calls with an
+AIMD window: the window grows additively on every success and is halved whenever
+the provider still answers with a 429.
+"""
+# Import libraries
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from pydantic import BaseModel, Field
+from langchain_core.messages import BaseMessage
+
+from src.config.config import config, LangChainConfig
+from src.config.logging_config import get_logger
+from src.agent.llm.tokens import estimate_message_tokens
+from src.agent.llm.registry import NODE_ROLE_FIELDS, get_llm_registry
+
+
+logger = get_logger(__name__)
+
+# Upper bound of a single sleep while waiting for budget to refill
+MAX_POLL_INTERVAL = 0.25
+
+# Sleep while the concurrency window is full, so released slots are picked up quickly
+CONCURRENCY_POLL_INTERVAL = 0.02
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Whether a provider exception means the request was rejected for exceeding a rate limit."""
+    for candidate in (exc, getattr(exc, "__cause__", None)):
+        if candidate is None:
+            continue
+        if type(candidate).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests"):
+            return True
+        for attribute in ("status_code", "code"):
+            if getattr(candidate, attribute, None) == 429:
+                return True
+        response = getattr(candidate, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return True
+        if "RESOURCE_EXHAUSTED" in str(candidate):
+            return True
+    return False
+
+
+class _TokenBucket:
+    """Bucket refilled continuously at `capacity` units per minute (not thread-safe on its own)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = float(capacity)
+        self.rate = capacity / 60.0
+        self.level = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        # Over-estimates are refunded, under-estimates leave the bucket in debt
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimitPermit:
+    """
+    A slot taken from a limiter; the caller records the tokens the call actually used.
+    """
+
+    def __init__(self, reserved_tokens: int, waited_seconds: float):
+        self.reserved_tokens = reserved_tokens
+        self.waited_seconds = waited_seconds
+        self.actual_tokens: Optional[int] = None
+
+
+class RateLimiterStats(BaseModel):
+    """
+    Counters of a single provider/model limiter.
+    """
+    requests: int = Field(default=0, description="Calls that were granted a slot.")
+    throttled: int = Field(default=0, description="Calls that had to wait for a slot.")
+    waited_seconds: float = Field(default=0.0, description="Total time calls spent waiting for a slot.")
+    rate_limited: int = Field(default=0, description="Calls the provider still rejected with a 429.")
+    concurrency_limit: float = Field(default=0.0, description="Current AIMD in-flight window.")
+    in_flight: int = Field(default=0, description="Calls currently holding a slot.")
+
+
+class ProviderRateLimiter:
+    """
+    Token-bucket RPM/TPM limiter with an AIMD concurrency window for one provider/model.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, min_concurrency: int, max_concurrency: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.max_concurrency = max_concurrency
+
+        self._lock = threading.Lock()
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self._concurrency_limit = float(max_concurrency)
+        self._in_flight = 0
+        self._stats = RateLimiterStats()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take a slot and return 0, or return the seconds to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+
+            if self._in_flight >= int(self._concurrency_limit):
+                return CONCURRENCY_POLL_INTERVAL
+
+            wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+            if wait > 0:
+                return min(wait, MAX_POLL_INTERVAL)
+
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self._in_flight += 1
+            self._stats.requests += 1
+            return 0.0
+
+    def _reserve(self, estimated_tokens: int) -> int:
+        # A single prompt larger than the whole budget still has to go through eventually
+        return max(0, min(estimated_tokens, self.tokens_per_minute))
+
+    def _granted(self, reserved: int, started_at: float) -> RateLimitPermit:
+        waited = time.monotonic() - started_at
+        if waited > 0.001:
+            with self._lock:
+                self._stats.throttled += 1
+                self._stats.waited_seconds += waited
+        return RateLimitPermit(reserved, waited)
+
+    def acquire(self, estimated_tokens: int) -> RateLimitPermit:
+        """Block the calling thread until a slot with `estimated_tokens` is available."""
+        reserved = self._reserve(estimated_tokens)
+        started_at = time.monotonic()
+        while True:
+            wait = self._try_acquire(reserved)
+            if wait == 0:
+                return self._granted(reserved, started_at)
+            time.sleep(wait)
+
+    async def aacquire(self, estimated_tokens: int) -> RateLimitPermit:
+        """Async counterpart of `acquire`; waits without blocking the event loop."""
+        reserved = self._reserve(estimated_tokens)
+        started_at = time.monotonic()
+        while True:
+            wait = self._try_acquire(reserved)
+            if wait == 0:
+                return self._granted(reserved, started_at)
+            await asyncio.sleep(wait)
+
+    def release(self, permit: RateLimitPermit, rate_limited: bool = False) -> None:
+        """Return the slot, reconcile the token estimate and adapt the concurrency window."""
+        with self._lock:
+            self._in_flight -= 1
+
+            if permit.actual_tokens is not None:
+                self._tokens.give_back(permit.reserved_tokens - permit.actual_tokens)
+
+            if rate_limited:
+                self._stats.rate_limited += 1
+                self._concurrency_limit = max(float(self.min_concurrency), self._concurrency_limit / 2)
+            else:
+                self._concurrency_limit = min(
+                    float(self.max_concurrency), self._concurrency_limit + 1 / self._concurrency_limit
+                )
+            concurrency_limit = self._concurrency_limit
+
+        if rate_limited:
+            logger.warning("LLM provider rate limit hit, reducing concurrency", extra={"concurrency_limit": concurrency_limit})
+
+    @contextmanager
+    def slot(self, estimated_tokens: int) -> Iterator[RateLimitPermit]:
+        """Hold a slot for the duration of one provider call."""
+        permit = self.acquire(estimated_tokens)
+        try:
+            yield permit
+        except BaseException as e:
+            self.release(permit, rate_limited=is_rate_limit_error(e))
+            raise
+        else:
+            self.release(permit)
+
+    @asynccontextmanager
+    async def aslot(self, estimated_tokens: int) -> AsyncIterator[RateLimitPermit]:
+        """Async counterpart of `slot`."""
+        permit = await self.aacquire(estimated_tokens)
+        try:
+            yield permit
+        except BaseException as e:
+            self.release(permit, rate_limited=is_rate_limit_error(e))
+            raise
+        else:
+            self.release(permit)
+
+    def stats(self) -> RateLimiterStats:
+        """Snapshot of the limiter's counters."""
+        with self._lock:
+            return self._stats.model_copy(update={
+                "concurrency_limit": self._concurrency_limit,
+                "in_flight": self._in_flight,
+            })
+
+
+class RateLimiterRegistry:
+    """
+    One limiter per (provider, model, API key), shared by every node role that uses it.
+    """
+
+    def __init__(self, settings: LangChainConfig):
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._limiters: Dict[Tuple[str, str, str], ProviderRateLimiter] = {}
+
+    def _budgets(self, account_key: Tuple[str, str, str]) -> Tuple[int, int]:
+        # Roles sharing an account draw from the same quota, so the strictest budget wins
+        all_settings = [get_llm_registry().node_settings(role) for role in NODE_ROLE_FIELDS]
+        sharing = [node for node in all_settings if node.account_key() == account_key]
+        return (
+            min(node.requests_per_minute for node in sharing),
+            min(node.tokens_per_minute for node in sharing),
+        )
+
+    def get(self, role: str) -> Optional[ProviderRateLimiter]:
+        """Get the limiter of a node role, or None when rate limiting is disabled."""
+        if not self.settings.llm_rate_limit_enabled:
+            return None
+
+        account_key = get_llm_registry().node_settings(role).account_key()
+        with self._lock:
+            limiter = self._limiters.get(account_key)
+            if limiter is None:
+                requests_per_minute, tokens_per_minute = self._budgets(account_key)
+                limiter = ProviderRateLimiter(
+                    requests_per_minute,
+                    tokens_per_minute,
+                    self.settings.llm_min_concurrency,
+                    self.settings.llm_max_concurrency,
+                )
+                self._limiters[account_key] = limiter
+                logger.info(
+                    "Created LLM rate limiter",
+                    extra={"provider": account_key[0], "model": account_key[1],
+                           "requests_per_minute": requests_per_minute, "tokens_per_minute": tokens_per_minute}
+                )
+            return limiter
+
+    def stats(self) -> Dict[str, RateLimiterStats]:
+        """Counters of every limiter, keyed by 'provider/model'."""
+        with self._lock:
+            limiters = list(self._limiters.items())
+        return {f"{provider}/{model}": limiter.stats() for (provider, model, _), limiter in limiters}
+
+    def clear(self) -> None:
+        """Drop all limiters (e.g. after budgets were changed at runtime)."""
+        with self._lock:
+            self._limiters.clear()
+
+
+# Global instance
+_rate_limiters = RateLimiterRegistry(config)
+
+
+def get_rate_limiter_registry() -> RateLimiterRegistry:
+    """Get the process-wide rate limiter registry"""
+    return _rate_limiters
+
+
+def estimate_call_tokens(messages: List[BaseMessage]) -> int:
+    """Tokens to reserve for a call: the estimated prompt plus the expected completion"""
+    return estimate_message_tokens(messages) + config.llm_expected_output_tokens
+
+
+@contextmanager
+def rate_limited(role: str, messages: List[BaseMessage]) -> Iterator[Optional[RateLimitPermit]]:
+    """Hold a rate limiter slot of the node role around one provider call (no-op when disabled)"""
+    limiter = _rate_limiters.get(role)
+    if limiter is None:
+        yield None
+        return
+
+    with limiter.slot(estimate_call_tokens(messages)) as permit:
+        yield permit
+
+
+@asynccontextmanager
+async def arate_limited(role: str, messages: List[BaseMessage]) -> AsyncIterator[Optional[RateLimitPermit]]:
+    """Async counterpart of `rate_limited`"""
+    limiter = _rate_limiters.get(role)
+    if limiter is None:
+        yield None
+        return
+
+    async with limiter.aslot(estimate_call_tokens(messages)) as permit:
+        yield permit
+
+
+# Export public interface
+__all__ = ['ProviderRateLimiter', 'RateLimiterRegistry', 'RateLimitPermit', 'RateLimiterStats',
+           'get_rate_limiter_registry', 'rate_limited', 'arate_limited', 'is_rate_limit_error']
@@ -0,0 +1,272 @@
+"""
+Process-wide registry of pooled LLM clients shared by all agent nodes.
+
+Nodes used to build a fresh chat model and `with_structured_output(...)` wrapper
+on every invocation, which paid client construction and a cold HTTP/TLS handshake
+on each refinement loop iteration. The registry hands out long-lived clients keyed
+by (provider, model, temperature) and pre-bound structured runnables keyed by
+(provider, model, temperature, output schema), all backed by keep-alive HTTP pools
+sized from `LangChainConfig`.
+
+Async connections are bound to the event loop that opened them, and every
+`asyncio.run` (Streamlit, benchmarks) starts a new loop, so callers on an event loop
+get clients and an async HTTP pool of their own loop; they are dropped with it.
+"""
+# Import libraries
+import asyncio
+import hashlib
+import threading
+from weakref import WeakKeyDictionary
+from typing import Dict, Optional, Tuple, Type
+
+import httpx
+import openai
+from pydantic import BaseModel
+from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
+from langchain_core.language_models import BaseChatModel
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from src.config.config import config, LangChainConfig, LLMProvider
+from src.config.logging_config import get_logger
+from src.agent.llm.fake import FakeChatModel
+
+
+logger = get_logger(__name__)
+
+
+# Maps each node role to the (prefix, suffix) of its config fields, e.g. `script_generation_llm1`
+NODE_ROLE_FIELDS: Dict[str, Tuple[str, str]] = {
+    "audience_insight": ("audience_insight", ""),
+    "creative_strategy": ("creative_strategy", ""),
+    "script_generation1": ("script_generation", "1"),
+    "script_generation2": ("script_generation", "2"),
+    "script_evaluation_and_refinement": ("script_evaluation_and_refinement", ""),
+}
+
+
+class NodeLLMSettings(BaseModel, frozen=True):
+    """
+    Resolved LLM settings of a single node role.
+    """
+    provider: LLMProvider
+    model: str
+    api_key: str
+    temperature: float
+    requests_per_minute: int
+    tokens_per_minute: int
+
+    def client_key(self) -> Tuple[str, str, float, str]:
+        """Registry key of the raw chat client (the API key is only kept as a digest)."""
+        key_digest = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16]
+        return self.provider.value, self.model, self.temperature, key_digest
+
+    def account_key(self) -> Tuple[str, str, str]:
+        """Key of the provider account/model whose rate limits this role consumes."""
+        provider, model, _, key_digest = self.client_key()
+        return provider, model, key_digest
+
+
+class LLMClientRegistry:
+    """
+    Thread-safe registry of long-lived chat clients and structured runnables.
+    """
+
+    def __init__(self, settings: LangChainConfig):
+        self.settings = settings
+        self._lock = threading.Lock()
+        # Clients of sync callers, and per event loop those of async callers
+        self._clients: Dict[tuple, BaseChatModel] = {}
+        self._structured: Dict[tuple, Runnable] = {}
+        self._loop_caches: "WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[Dict, Dict]]" = WeakKeyDictionary()
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = WeakKeyDictionary()
+
+    def node_settings(self, role: str, temperature: Optional[float] = None) -> NodeLLMSettings:
+        """Resolve the LLM settings configured for a node role, optionally at another temperature."""
+        if role not in NODE_ROLE_FIELDS:
+            raise ValueError(f"Unknown LLM node role '{role}'. Expected one of {list(NODE_ROLE_FIELDS)}.")
+
+        prefix, suffix = NODE_ROLE_FIELDS[role]
+        return NodeLLMSettings(
+            provider=self.settings.llm_provider_override or getattr(self.settings, f"{prefix}_provider{suffix}"),
+            model=getattr(self.settings, f"{prefix}_llm{suffix}"),
+            api_key=getattr(self.settings, f"{prefix}_api_key{suffix}"),
+            temperature=temperature if temperature is not None else float(getattr(self.settings, f"{prefix}_temperature{suffix}")),
+            requests_per_minute=getattr(self.settings, f"{prefix}_requests_per_minute{suffix}"),
+            tokens_per_minute=getattr(self.settings, f"{prefix}_tokens_per_minute{suffix}"),
+        )
+
+    @staticmethod
+    def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    def _caches(self, loop: Optional[asyncio.AbstractEventLoop]) -> Tuple[Dict[tuple, BaseChatModel], Dict[tuple, Runnable]]:
+        # (clients, structured runnables) of sync callers or of an event loop
+        if loop is None:
+            return self._clients, self._structured
+        caches = self._loop_caches.get(loop)
+        if caches is None:
+            with self._lock:
+                caches = self._loop_caches.get(loop)
+                if caches is None:
+                    caches = self._loop_caches[loop] = ({}, {})
+        return caches
+
+    def get_client(self, role: str, temperature: Optional[float] = None) -> BaseChatModel:
+        """Return the pooled chat client for a node role, creating it on first use."""
+        node_settings = self.node_settings(role, temperature)
+        key = node_settings.client_key()
+        loop = self._running_loop()
+        clients, _ = self._caches(loop)
+
+        client = clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = clients.get(key)
+            if client is None:
+                client = self._create_client(node_settings, loop)
+                clients[key] = client
+                logger.info(
+                    "Created pooled LLM client",
+                    extra={"role": role, "provider": node_settings.provider.value, "model": node_settings.model}
+                )
+        return client
+
+    def get_structured_llm(self, role: str, schema: Type[BaseModel], method: str = "json_mode",
+                           temperature: Optional[float] = None) -> Runnable:
+        """Return a pre-bound structured-output runnable for a node role and output schema."""
+        node_settings = self.node_settings(role, temperature)
+        key = (*node_settings.client_key(), schema, method)
+
+        _, structured = self._caches(self._running_loop())
+
+        structured_llm = structured.get(key)
+        if structured_llm is not None:
+            return structured_llm
+
+        client = self.get_client(role, temperature)
+        with self._lock:
+            structured_llm = structured.get(key)
+            if structured_llm is None:
+                structured_llm = client.with_structured_output(schema, method=method)
+                structured[key] = structured_llm
+        return structured_llm
+
+    def clear(self) -> None:
+        """Drop every cached client and close the HTTP pools."""
+        with self._lock:
+            self._clients.clear()
+            self._structured.clear()
+            self._loop_caches.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            async_clients = list(self._http_async_clients.items())
+            self._http_async_clients.clear()
+
+        for loop, async_client in async_clients:
+            self._close_async_client(loop, async_client)
+
+    def _close_async_client(self, loop: asyncio.AbstractEventLoop, async_client: httpx.AsyncClient) -> None:
+        # An async pool can only be closed on its own loop; one of a closed loop is left to the garbage collector
+        if loop.is_closed():
+            return
+        if loop is self._running_loop():
+            loop.create_task(async_client.aclose())
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(async_client.aclose(), loop)
+        else:
+            loop.run_until_complete(async_client.aclose())
+
+    def _http_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.settings.llm_pool_max_connections,
+            max_keepalive_connections=self.settings.llm_pool_max_keepalive_connections,
+            keepalive_expiry=self.settings.llm_pool_keepalive_expiry,
+        )
+
+    def _shared_http_clients(self, loop: Optional[asyncio.AbstractEventLoop]) -> Tuple[httpx.Client, Optional[httpx.AsyncClient]]:
+        # Called with the registry lock held; the async pool is per event loop (None for sync callers)
+        if self._http_client is None:
+            self._http_client = openai.DefaultHttpxClient(
+                limits=self._http_limits(),
+                timeout=self.settings.llm_request_timeout,
+            )
+        if loop is None:
+            return self._http_client, None
+
+        http_async_client = self._http_async_clients.get(loop)
+        if http_async_client is None:
+            http_async_client = self._http_async_clients[loop] = openai.DefaultAsyncHttpxClient(
+                limits=self._http_limits(),
+                timeout=self.settings.llm_request_timeout,
+            )
+        return self._http_client, http_async_client
+
+    def _create_client(self, node_settings: NodeLLMSettings, loop: Optional[asyncio.AbstractEventLoop] = None) -> BaseChatModel:
+        # Called with the registry lock held
+        if node_settings.provider == LLMProvider.OPENAI:
+            http_client, http_async_client = self._shared_http_clients(loop)
+            return ChatOpenAI(
+                model=node_settings.model,
+                api_key=node_settings.api_key,
+                temperature=node_settings.temperature,
+                timeout=self.settings.llm_request_timeout,
+                # Retries are handled by the invocation wrapper (jittered backoff + rate limiter)
+                max_retries=0,
+                # Keep usage metadata when the UI streams tokens from the graph
+                stream_usage=True,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+
+        if node_settings.provider == LLMProvider.GOOGLE:
+            # The gRPC channel of a long-lived client multiplexes requests over one HTTP/2 connection
+            return ChatGoogleGenerativeAI(
+                model=node_settings.model,
+                api_key=node_settings.api_key,
+                temperature=node_settings.temperature,
+                timeout=self.settings.llm_request_timeout,
+                max_retries=0,
+            )
+
+        if node_settings.provider == LLMProvider.FAKE:
+            return FakeChatModel(
+                model=node_settings.model,
+                temperature=node_settings.temperature,
+                seed=self.settings.fake_llm_seed,
+                latency_distribution=self.settings.fake_llm_latency_distribution,
+                latency_mean=self.settings.fake_llm_latency_mean,
+                latency_stddev=self.settings.fake_llm_latency_stddev,
+                output_tokens_mean=self.settings.fake_llm_output_tokens,
+                error_rate=self.settings.fake_llm_error_rate,
+                rate_limit_error_share=self.settings.fake_llm_rate_limit_error_share,
+                approval_probability=self.settings.fake_llm_approval_probability,
+            )
+
+        raise ValueError(f"LLM provider {node_settings.provider.value} is not supported.")
+
+
+# Global instance
+_llm_registry = LLMClientRegistry(config)
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Get the process-wide LLM client registry"""
+    return _llm_registry
+
+
+def get_structured_llm(role: str, schema: Type[BaseModel], method: str = "json_mode",
+                       temperature: Optional[float] = None) -> Runnable:
+    """Get the pooled structured-output runnable for a node role and output schema"""
+    return _llm_registry.get_structured_llm(role, schema, method=method, temperature=temperature)
+
+
+# Export public interface
+__all__ = ['LLMClientRegistry', 'NodeLLMSettings', 'NODE_ROLE_FIELDS', 'get_llm_registry', 'get_structured_llm']
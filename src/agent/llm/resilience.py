@@ -0,0 +1,419 @@
+"""
+Retries, hedged requests and races for LLM calls.
+
+Transient provider failures (rate limits, timeouts, dropped connections, 5xx)
+are retried with full-jitter exponential backoff. For latency-critical nodes a
+hedged duplicate request is fired once the primary has been running longer than
+a configurable percentile of that node's recent latencies; whichever finishes
+first wins. `race` / `call_with_fallback` do the same for different calls (e.g.
+two generator models). Async losers are cancelled; a loser already running in a
+worker thread cannot be interrupted, so it is handed back to the caller, which
+accounts for its usage once it finishes.
+"""
+# Import libraries
+import time
+import random
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from src.config.config import config, LangChainConfig
+from src.config.logging_config import get_logger
+from src.agent.llm.rate_limit import is_rate_limit_error
+
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_TRANSIENT_ERROR_NAMES = frozenset({
+    "APITimeoutError", "APIConnectionError", "InternalServerError", "ServiceUnavailable",
+    "DeadlineExceeded", "TimeoutException", "ConnectError", "ReadError",
+    "RemoteProtocolError",
+})
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Whether a failed provider call is worth retrying."""
+    if isinstance(exc, (TimeoutError, ConnectionError)) or is_rate_limit_error(exc):
+        return True
+    for candidate in (exc, getattr(exc, "__cause__", None)):
+        if candidate is None:
+            continue
+        if type(candidate).__name__ in _TRANSIENT_ERROR_NAMES:
+            return True
+        status_code = getattr(candidate, "status_code", None)
+        if isinstance(status_code, int) and status_code >= 500:
+            return True
+    return False
+
+
+def backoff_delay(retry_number: int, settings: LangChainConfig = config) -> float:
+    """Full-jitter exponential backoff before the given retry (0-based)."""
+    ceiling = min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * (2 ** retry_number))
+    return random.uniform(0, ceiling)
+
+
+def call_with_retries(fn: Callable[[], T], settings: LangChainConfig = config) -> Tuple[T, int]:
+    """Run `fn`, retrying transient errors; returns (result, retries)."""
+    retries = 0
+    while True:
+        try:
+            return fn(), retries
+        except Exception as e:
+            if retries >= settings.llm_max_retries or not is_transient_error(e):
+                raise
+            delay = backoff_delay(retries, settings)
+            logger.warning(f"Transient LLM error, retrying in {delay:.2f}s: {e}", extra={"retry": retries + 1})
+            time.sleep(delay)
+            retries += 1
+
+
+async def acall_with_retries(fn: Callable[[], Awaitable[T]], settings: LangChainConfig = config) -> Tuple[T, int]:
+    """Async counterpart of `call_with_retries`."""
+    retries = 0
+    while True:
+        try:
+            return await fn(), retries
+        except Exception as e:
+            if retries >= settings.llm_max_retries or not is_transient_error(e):
+                raise
+            delay = backoff_delay(retries, settings)
+            logger.warning(f"Transient LLM error, retrying in {delay:.2f}s: {e}", extra={"retry": retries + 1})
+            await asyncio.sleep(delay)
+            retries += 1
+
+
+class LatencyTracker:
+    """
+    Sliding window of successful call latencies per graph node.
+    """
+
+    def __init__(self, settings: LangChainConfig):
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def record(self, node: str, seconds: float) -> None:
+        with self._lock:
+            window = self._latencies.get(node)
+            if window is None:
+                window = deque(maxlen=self.settings.llm_hedge_latency_window)
+                self._latencies[node] = window
+            window.append(seconds)
+
+    def percentile(self, node: str, percentile: float) -> Optional[float]:
+        """Latency at `percentile` (0-1) of the node's window, or None without enough samples."""
+        with self._lock:
+            samples = sorted(self._latencies.get(node, ()))
+        if len(samples) < self.settings.llm_hedge_min_samples:
+            return None
+        index = min(len(samples) - 1, int(percentile * len(samples)))
+        return samples[index]
+
+    def hedge_delay(self, node: str) -> Optional[float]:
+        """Seconds after which a hedge is fired for this node, or None when it is not hedged."""
+        if not self.settings.llm_hedging_enabled or node not in self.settings.llm_hedging_nodes:
+            return None
+        latency = self.percentile(node, self.settings.llm_hedge_percentile)
+        if latency is None:
+            return None
+        return max(latency, self.settings.llm_hedge_min_delay)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+
+
+class HedgeOutcome(Generic[T]):
+    """
+    Winner of a (possibly) hedged call and what happened to the other request.
+    """
+
+    def __init__(self, result: T, hedged: bool = False, hedge_won: bool = False,
+                 loser_result: Optional[T] = None, loser_future: Optional[Future] = None):
+        self.result = result
+        self.hedged = hedged
+        self.hedge_won = hedge_won
+        # Result of the losing request when it finished before being cancelled
+        self.loser_result = loser_result
+        # Losing request still running in a worker thread; its result arrives later
+        self.loser_future = loser_future
+
+
+def _succeeded(future: Any) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+def _first_success(futures: Tuple[Any, ...]) -> Optional[Any]:
+    for future in futures:
+        if _succeeded(future):
+            return future
+    return None
+
+
+# Hedged calls run both requests in worker threads; more of them could not get a pooled connection anyway
+_hedge_executor = ThreadPoolExecutor(max_workers=config.llm_pool_max_connections, thread_name_prefix="llm-hedge")
+
+
+# Raced calls may hedge internally, so they get their own pool to never wait on themselves
+_race_executor = ThreadPoolExecutor(max_workers=config.llm_pool_max_connections, thread_name_prefix="llm-race")
+
+
+def _submit(fn: Callable[[], T], executor: ThreadPoolExecutor = _hedge_executor) -> Future:
+    # Copy the context so callbacks (token usage, streaming) still see the caller's run
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn)
+
+
+def hedged_call(fn: Callable[[], T], delay: Optional[float]) -> HedgeOutcome[T]:
+    """
+    Run `fn` and fire a duplicate after `delay` seconds if it has not finished yet.
+
+    A losing request that is already running in a worker thread cannot be
+    interrupted; it is returned as `loser_future` so its usage can be accounted
+    for when it completes.
+    """
+    if delay is None:
+        return HedgeOutcome(fn())
+
+    primary = _submit(fn)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return HedgeOutcome(primary.result())
+
+    hedge = _submit(fn)
+    requests = (primary, hedge)
+    logger.info("Fired hedged LLM request", extra={"hedge_delay": round(delay, 3)})
+
+    pending = set(requests)
+    while pending:
+        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = _first_success(requests)
+        if winner is not None:
+            loser = hedge if winner is primary else primary
+            loser.cancel()
+            loser_result = loser.result() if _succeeded(loser) else None
+            return HedgeOutcome(winner.result(), hedged=True, hedge_won=winner is hedge, loser_result=loser_result,
+                                loser_future=None if loser_result is not None or loser.cancelled() else loser)
+
+    # Both requests failed; surface the primary's error
+    return HedgeOutcome(primary.result())
+
+
+async def ahedged_call(fn: Callable[[], Awaitable[T]], delay: Optional[float]) -> HedgeOutcome[T]:
+    """
+    Async counterpart of `hedged_call`; the losing task is cancelled.
+    """
+    if delay is None:
+        return HedgeOutcome(await fn())
+
+    primary = asyncio.ensure_future(fn())
+    hedge: Optional[asyncio.Future] = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return HedgeOutcome(primary.result())
+
+        hedge = asyncio.ensure_future(fn())
+        requests = (primary, hedge)
+        logger.info("Fired hedged LLM request", extra={"hedge_delay": round(delay, 3)})
+
+        pending = set(requests)
+        while pending:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = _first_success(requests)
+            if winner is not None:
+                loser = hedge if winner is primary else primary
+                loser_result = loser.result() if _succeeded(loser) else None
+                return HedgeOutcome(winner.result(), hedged=True, hedge_won=winner is hedge, loser_result=loser_result)
+
+        # Both requests failed; surface the primary's error
+        return HedgeOutcome(primary.result())
+
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+class RaceOutcome(Generic[T]):
+    """
+    First successful result of several different calls.
+    """
+
+    def __init__(self, result: T, winner: int, loser_results: Optional[List[T]] = None, abandoned: int = 0,
+                 running_losers: Optional[List[Future]] = None):
+        self.result = result
+        # Index of the winning call
+        self.winner = winner
+        # Results of the other calls that also finished successfully
+        self.loser_results = loser_results or []
+        # Other calls that were still running when the winner returned
+        self.abandoned = abandoned
+        # Those of them still running in a worker thread (sync races); their results arrive later
+        self.running_losers = running_losers or []
+
+
+def _race_outcome(futures: List[Any], winner: Any) -> RaceOutcome:
+    losers = [future for future in futures if future is not winner]
+    return RaceOutcome(
+        winner.result(),
+        futures.index(winner),
+        [future.result() for future in losers if _succeeded(future)],
+        sum(1 for future in losers if not future.done()),
+    )
+
+
+def _thread_race_outcome(futures: List[Future], winner: Future) -> RaceOutcome:
+    # Cancelling only stops calls that have not started; running ones finish in their worker thread
+    for future in futures:
+        if future is not winner:
+            future.cancel()
+    losers = [future for future in futures if future is not winner and not future.cancelled()]
+    running = [future for future in losers if not future.done()]
+    return RaceOutcome(
+        winner.result(),
+        futures.index(winner),
+        [future.result() for future in losers if future not in running and _succeeded(future)],
+        len(running),
+        running,
+    )
+
+
+def _wait_first_success(futures: List[Future]) -> Optional[Future]:
+    pending = set(futures)
+    while pending:
+        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = _first_success(tuple(futures))
+        if winner is not None:
+            return winner
+    return None
+
+
+def race(fns: Sequence[Callable[[], T]]) -> RaceOutcome[T]:
+    """
+    Run all calls concurrently and return the first one that succeeds.
+
+    Calls that have not started yet are cancelled; calls already running in a worker
+    thread cannot be interrupted and are returned as `running_losers`. Raises the
+    first call's error when every call fails.
+    """
+    futures = [_submit(fn, _race_executor) for fn in fns]
+    winner = _wait_first_success(futures)
+    if winner is None:
+        return RaceOutcome(futures[0].result(), 0)
+    return _thread_race_outcome(futures, winner)
+
+
+def call_with_fallback(primary: Callable[[], T], fallback: Callable[[], T], deadline: float) -> RaceOutcome[T]:
+    """
+    Run `primary`; start `fallback` if it fails or is still running after `deadline` seconds.
+
+    A primary that misses the deadline keeps running and races the fallback; the
+    loser cannot be interrupted and is returned in `running_losers` if still running.
+    """
+    primary_future = _submit(primary, _race_executor)
+    done, _ = wait([primary_future], timeout=deadline)
+    if done and _succeeded(primary_future):
+        return RaceOutcome(primary_future.result(), 0)
+
+    if done:
+        logger.warning(f"Primary LLM call failed, using fallback: {primary_future.exception()}")
+        return RaceOutcome(fallback(), 1)
+
+    logger.warning("Primary LLM call exceeded its deadline, starting fallback", extra={"deadline": deadline})
+    futures = [primary_future, _submit(fallback, _race_executor)]
+    winner = _wait_first_success(futures)
+    if winner is None:
+        # Both failed; the fallback's error is the most recent one
+        return RaceOutcome(futures[1].result(), 1)
+    return _thread_race_outcome(futures, winner)
+
+
+async def _await_first_success(tasks: List[asyncio.Future]) -> Optional[asyncio.Future]:
+    pending = set(tasks)
+    while pending:
+        _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        winner = _first_success(tuple(tasks))
+        if winner is not None:
+            return winner
+    return None
+
+
+async def arace(fns: Sequence[Callable[[], Awaitable[T]]]) -> RaceOutcome[T]:
+    """
+    Async counterpart of `race`; the losing tasks are cancelled.
+    """
+    tasks = [asyncio.ensure_future(fn()) for fn in fns]
+    try:
+        winner = await _await_first_success(tasks)
+        if winner is None:
+            return RaceOutcome(tasks[0].result(), 0)
+        return _race_outcome(tasks, winner)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def acall_with_fallback(primary: Callable[[], Awaitable[T]], fallback: Callable[[], Awaitable[T]],
+                              deadline: float) -> RaceOutcome[T]:
+    """
+    Async counterpart of `call_with_fallback`; the losing task is cancelled.
+    """
+    tasks = [asyncio.ensure_future(primary())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=deadline)
+        if done and _succeeded(tasks[0]):
+            return RaceOutcome(tasks[0].result(), 0)
+
+        if done:
+            logger.warning(f"Primary LLM call failed, using fallback: {tasks[0].exception()}")
+            return RaceOutcome(await fallback(), 1)
+
+        logger.warning("Primary LLM call exceeded its deadline, starting fallback", extra={"deadline": deadline})
+        tasks.append(asyncio.ensure_future(fallback()))
+        winner = await _await_first_success(tasks)
+        if winner is None:
+            # Both failed; the fallback's error is the most recent one
+            return RaceOutcome(tasks[1].result(), 1)
+        return _race_outcome(tasks, winner)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def call_all(fns: Sequence[Callable[[], T]]) -> List[Any]:
+    """
+    Run all calls concurrently and return each one's result, or the exception it raised.
+    """
+    futures = [_submit(fn, _race_executor) for fn in fns]
+    wait(futures)
+    return [future.exception() or future.result() for future in futures]
+
+
+async def acall_all(fns: Sequence[Callable[[], Awaitable[T]]]) -> List[Any]:
+    """
+    Async counterpart of `call_all`.
+    """
+    return list(await asyncio.gather(*(fn() for fn in fns), return_exceptions=True))
+
+
+# Global instance
+_latency_tracker = LatencyTracker(config)
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get the process-wide per-node LLM latency tracker"""
+    return _latency_tracker
+
+
+# Export public interface
+__all__ = ['is_transient_error', 'backoff_delay', 'call_with_retries', 'acall_with_retries',
+           'LatencyTracker', 'HedgeOutcome', 'hedged_call', 'ahedged_call', 'get_latency_tracker',
+           'RaceOutcome', 'race', 'arace', 'call_with_fallback', 'acall_with_fallback', 'call_all', 'acall_all']
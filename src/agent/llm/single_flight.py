@@ -0,0 +1,127 @@
+"""
+Single-flight coalescing of concurrent identical LLM requests.
+
+When several sessions or batch jobs submit the same persona/product at the same
+moment, each would independently fire the same provider call. `SingleFlight`
+lets the first caller of a request key (the leader) perform the call while every
+concurrent caller with the same key waits for and shares its result. It works
+across threads (sync graphs) and asyncio tasks (async graphs), including a mix
+of both, because waiters always block on the leader's `concurrent.futures.Future`.
+"""
+# Import libraries
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _LeaderCancelled(Exception):
+    """Raised to waiters when the leading async call was cancelled; they retry as a new flight."""
+
+
+class SingleFlight:
+    """
+    Deduplicates in-flight calls that share a request key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            # A running Future cannot be cancelled, so a cancelled waiter cannot cancel the flight
+            future.set_running_or_notify_cancel()
+            self._in_flight[key] = future
+            return future, True
+
+    @staticmethod
+    def _settle(future: Future, result: Any = None, error: BaseException = None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def in_flight(self) -> int:
+        """Number of distinct requests currently being executed."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run `fn` once for all concurrent callers of `key`.
+
+        Returns (result, shared) where `shared` is True for callers that received
+        another caller's result.
+        """
+        while True:
+            future, is_leader = self._join(key)
+
+            if not is_leader:
+                try:
+                    return future.result(), True
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = fn()
+            except BaseException as e:
+                self._settle(future, error=e)
+                raise
+            else:
+                self._settle(future, result)
+                return result, False
+            finally:
+                self._finish(key)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Async counterpart of `do`; waiters await the leader without blocking the event loop.
+        """
+        while True:
+            future, is_leader = self._join(key)
+
+            if not is_leader:
+                try:
+                    # Shielded: cancelling this waiter must not cancel the shared flight
+                    return await asyncio.shield(asyncio.wrap_future(future)), True
+                except _LeaderCancelled:
+                    continue
+
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                # Waiters did not ask to be cancelled; let them elect a new leader
+                self._settle(future, error=_LeaderCancelled())
+                raise
+            except BaseException as e:
+                self._settle(future, error=e)
+                raise
+            else:
+                self._settle(future, result)
+                return result, False
+            finally:
+                self._finish(key)
+
+
+# Global instance
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the process-wide single-flight group for LLM calls"""
+    return _single_flight
+
+
+# Export public interface
+__all__ = ['SingleFlight', 'get_single_flight']
@@ -0,0 +1,68 @@
+"""
+Offline token estimates for rendered prompts.
+
+Provider tokenizers differ (and are not installed for every provider), so
+budgets are planned with the common ~4 characters per token approximation and
+reconciled against the usage metadata the provider reports after each call.
+
+`approximate_bpe_tokens` is a closer, still offline, approximation for comparing
+encodings of the same content: it splits text the way GPT-style BPE tokenizers
+pre-tokenize it, so e.g. runs of indentation count as one token instead of one
+per four spaces.
+"""
+# Import libraries
+import re
+import math
+from typing import Iterable
+from langchain_core.messages import BaseMessage
+
+
+CHARS_PER_TOKEN = 4
+
+# Role/formatting overhead the chat APIs add around every message
+TOKENS_PER_MESSAGE = 4
+
+# Pre-tokenization in the style of GPT BPE encoders: contractions, letter runs, digit groups,
+# punctuation runs and whitespace runs (each with an optional leading space)
+_PRETOKEN_PATTERN = re.compile(r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?(?:[^\s\w]|_)+|\s+""")
+
+# Average characters merged into one token within each kind of piece
+CHARS_PER_WORD_TOKEN = 6
+CHARS_PER_PUNCTUATION_TOKEN = 3
+CHARS_PER_WHITESPACE_TOKEN = 16
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def approximate_bpe_tokens(text: str) -> int:
+    """Approximate BPE token count of a piece of text (closer than `estimate_tokens` for structured text)."""
+    total = 0
+    for piece in _PRETOKEN_PATTERN.findall(text or ""):
+        stripped = piece.strip()
+        if not stripped:
+            total += math.ceil(len(piece) / CHARS_PER_WHITESPACE_TOKEN)
+        elif stripped[0].isalpha():
+            total += math.ceil(len(stripped) / CHARS_PER_WORD_TOKEN)
+        elif stripped[0].isdigit():
+            total += 1
+        else:
+            total += math.ceil(len(stripped) / CHARS_PER_PUNCTUATION_TOKEN)
+    return total
+
+
+def estimate_message_tokens(messages: Iterable[BaseMessage]) -> int:
+    """Approximate prompt token count of a list of chat messages."""
+    total = 0
+    for message in messages:
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        total += estimate_tokens(content) + TOKENS_PER_MESSAGE
+    return total
+
+
+# Export public interface
+__all__ = ['estimate_tokens', 'approximate_bpe_tokens', 'estimate_message_tokens']
@@ -1,47 +1,69 @@
 # Import libraries
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.callbacks import get_usage_metadata_callback
-
-from src.config.config import config
 from src.config.logging_config import get_logger
 from src.agent.utils import build_audience_insight_message
 from src.agent.state import AgentState, AudienceInsight
+from src.agent.insight_store import lookup_audience_insight, remember_audience_insight
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
 
 
 logger = get_logger(__name__)
 
 
+def _apply_audience_insight(state: AgentState, result: LLMCallResult) -> AgentState:
+    # Keep the fresh insight for later runs with the same (or an effectively identical) persona
+    if not result.cache_hit:
+        remember_audience_insight(state.audience_persona, state.product, result.response)
+
+    # Unpack results and return a new AgentState with fields populated
+    return state.model_copy(update={
+        "audience_insight": result.response,
+        **token_accounting(state, result),
+    })
+
+
 def audience_insight_node(state: AgentState) -> AgentState:
     try:
         logger.info("Start Audience Insight Node")
-        llm = ChatGoogleGenerativeAI(
-            model=config.audience_insight_llm,
-            api_key=config.audience_insight_api_key,
-            temperature=config.audience_insight_temperature
-        )
 
-        structured_llm = llm.with_structured_output(AudienceInsight, method='json_mode')
+        stored_insight = lookup_audience_insight(state.audience_persona, state.product)
+        if stored_insight is not None:
+            logger.info("End Audience Insight Node")
+            return state.model_copy(update={"audience_insight": stored_insight})
 
         messages_list = build_audience_insight_message(state)
 
         # Call model and parse structured response
-        with get_usage_metadata_callback() as cb:
-            response = structured_llm.invoke(messages_list)
+        result = invoke_structured("audience_insight_node", "audience_insight", AudienceInsight, messages_list)
+
+        logger.info("End Audience Insight Node")
 
-        logger.info("End Creative Strategy Node")
+        return _apply_audience_insight(state, result)
+
+    except Exception as e:
+        logger.error(f"LLM invocation failed: {e}", exc_info=True)
+        raise
 
-        # Extract token usage from the callback
-        token_usage = cb.usage_metadata
-        total_tokens = 0
 
-        for model_name, usage in token_usage.items():
-            total_tokens += usage.get('total_tokens', 0)
+async def audience_insight_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `audience_insight_node`.
+    """
+    try:
+        logger.info("Start Audience Insight Node")
+
+        stored_insight = lookup_audience_insight(state.audience_persona, state.product)
+        if stored_insight is not None:
+            logger.info("End Audience Insight Node")
+            return state.model_copy(update={"audience_insight": stored_insight})
+
+        messages_list = build_audience_insight_message(state)
+
+        # Call model and parse structured response
+        result = await ainvoke_structured("audience_insight_node", "audience_insight", AudienceInsight, messages_list)
+
+        logger.info("End Audience Insight Node")
 
-        # Unpack results and return a new AgentState with fields populated
-        return state.model_copy(update={
-            "audience_insight": response,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+        return _apply_audience_insight(state, result)
 
     except Exception as e:
         logger.error(f"LLM invocation failed: {e}", exc_info=True)
@@ -1,13 +1,11 @@
 # Import libraries
 from typing import List
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import get_usage_metadata_callback
 
 from src.agent.state import AgentState
-from src.config.config import config
 from src.config.logging_config import get_logger
 from src.agent.utils import build_creative_strategy_message
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
 
 
 logger = get_logger(__name__)
@@ -35,42 +33,54 @@ class CreativeStrategyResponse(BaseModel):
     )
 
 
+def _apply_creative_strategy(state: AgentState, result: LLMCallResult) -> AgentState:
+    response: CreativeStrategyResponse = result.response
+
+    # Unpack results and return a new AgentState with fields populated
+    return state.model_copy(update={
+        "core_message_pillars": response.core_message_pillars,
+        "brainstormed_hooks": response.brainstormed_hooks,
+        "generated_ctas": response.generated_ctas,
+        "emotional_triggers": response.emotional_triggers,
+        "primary_visual_concept": response.primary_visual_concept,
+        "audio_strategy": response.audio_strategy,
+        **token_accounting(state, result),
+    })
+
+
 def creative_strategy_node(state: AgentState) -> AgentState:
     try:
         logger.info("Start Creative Strategy Node")
-        llm = ChatOpenAI(
-            model=config.creative_strategy_llm,
-            api_key=config.creative_strategy_api_key,
-            temperature=config.creative_strategy_temperature
-        )
 
-        structured_llm = llm.with_structured_output(CreativeStrategyResponse, method='json_mode')
+        messages_list = build_creative_strategy_message(state)
+
+        # Call model and parse structured response
+        result = invoke_structured("creative_strategy_node", "creative_strategy", CreativeStrategyResponse, messages_list)
+
+        logger.info("End Creative Strategy Node")
+
+        return _apply_creative_strategy(state, result)
+
+    except Exception as e:
+        logger.error(f"LLM invocation failed: {e}", exc_info=True)
+        raise
+
+
+async def creative_strategy_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `creative_strategy_node`.
+    """
+    try:
+        logger.info("Start Creative Strategy Node")
 
         messages_list = build_creative_strategy_message(state)
 
         # Call model and parse structured response
-        with get_usage_metadata_callback() as cb:
-            response = structured_llm.invoke(messages_list)
+        result = await ainvoke_structured("creative_strategy_node", "creative_strategy", CreativeStrategyResponse, messages_list)
 
         logger.info("End Creative Strategy Node")
 
-        # Extract token usage from the callback
-        token_usage = cb.usage_metadata
-        total_tokens = 0
-
-        for model_name, usage in token_usage.items():
-            total_tokens += usage.get('total_tokens', 0)
-
-        # Unpack results and return a new AgentState with fields populated
-        return state.model_copy(update={
-            "core_message_pillars": response.core_message_pillars,
-            "brainstormed_hooks": response.brainstormed_hooks,
-            "generated_ctas": response.generated_ctas,
-            "emotional_triggers": response.emotional_triggers,
-            "primary_visual_concept": response.primary_visual_concept,
-            "audio_strategy": response.audio_strategy,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+        return _apply_creative_strategy(state, result)
 
     except Exception as e:
         logger.error(f"LLM invocation failed: {e}", exc_info=True)
@@ -0,0 +1,65 @@
+# Import libraries
+from typing import Dict, List, Optional, Tuple
+
+from src.config.config import config
+from src.config.logging_config import get_logger
+from src.agent.state import AgentState, RefinementLessons
+from src.agent.script_diff import entry_evaluation
+
+logger = get_logger(__name__)
+
+# Most recent distinct recommendations kept in the lessons
+MAX_LESSON_RECOMMENDATIONS = 20
+
+
+def compact_history(history: List[Dict], lessons: Optional[RefinementLessons],
+                    keep: int) -> Tuple[List[Dict], RefinementLessons]:
+    """
+    Fold all but the last `keep` history entries into `lessons`, using only the evaluation
+    reports they carry (recommendations and scores); no LLM call is made.
+    """
+    split = max(0, len(history) - keep)
+    older, recent = history[:split], history[split:]
+
+    lessons = lessons or RefinementLessons()
+    overall_scores = list(lessons.overall_score_trajectory)
+    criterion_scores = {criterion: list(scores) for criterion, scores in lessons.criterion_score_trajectory.items()}
+    recommendations = list(lessons.recommendations_given)
+
+    for entry in older:
+        evaluation = entry_evaluation(entry)
+        if evaluation["overall_score"] is not None:
+            overall_scores.append(evaluation["overall_score"])
+        for criterion, score in evaluation["scores"].items():
+            criterion_scores.setdefault(criterion, []).append(score)
+        for recommendation in evaluation["recommendations"]:
+            if recommendation not in recommendations:
+                recommendations.append(recommendation)
+
+    return list(recent), RefinementLessons(
+        compacted_iterations=lessons.compacted_iterations + len(older),
+        overall_score_trajectory=overall_scores,
+        criterion_score_trajectory=criterion_scores,
+        recommendations_given=recommendations[-MAX_LESSON_RECOMMENDATIONS:],
+    )
+
+
+def history_compaction_node(state: AgentState) -> AgentState:
+    """
+    Bounds the refinement history: once it has more than `history_compaction_threshold`
+    entries, the older ones are condensed into `refinement_lessons` and only the last
+    `history_keep_full_entries` are kept in full.
+    """
+    history = state.script_iteration_history or []
+    threshold = config.history_compaction_threshold
+    if not threshold or len(history) <= threshold:
+        return state
+
+    kept, lessons = compact_history(history, state.refinement_lessons, config.history_keep_full_entries)
+    logger.info(f"Compacted {len(history) - len(kept)} refinement history entries into lessons "
+                f"({lessons.compacted_iterations} in total); {len(kept)} kept in full.")
+
+    return state.model_copy(update={
+        "script_iteration_history": kept or None,
+        "refinement_lessons": lessons,
+    })
@@ -0,0 +1,174 @@
+# Import libraries
+from typing import List, Optional, Tuple
+
+from src.config.config import config
+from src.config.logging_config import get_logger
+from src.agent.state import AgentState, EvaluationReport, ScriptCandidate
+from src.agent.utils import build_script_generation_message, build_evaluation_message
+from src.agent.nodes.script_generator import GENERATOR_ROLES, _output_schema
+from src.agent.llm.resilience import call_all, acall_all
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
+
+logger = get_logger(__name__)
+
+GENERATION_NODE = "script_candidate_generation_node"
+EVALUATION_NODE = "script_candidate_evaluation_node"
+
+
+def candidate_plan(best_of_n: int) -> List[Tuple[str, Optional[float]]]:
+    """
+    (generator role, temperature override) of each draft, alternating the generator models
+    and cycling through `script_best_of_n_temperatures`.
+    """
+    temperatures = config.script_best_of_n_temperatures
+    plan = []
+    for i in range(best_of_n):
+        role = GENERATOR_ROLES[i % len(GENERATOR_ROLES)]
+        temperature = temperatures[(i // len(GENERATOR_ROLES)) % len(temperatures)] if temperatures else None
+        plan.append((role, temperature))
+    return plan
+
+
+def _successful(results: List, what: str) -> List[LLMCallResult]:
+    succeeded = [result for result in results if isinstance(result, LLMCallResult)]
+    for result in results:
+        if not isinstance(result, LLMCallResult):
+            logger.warning(f"A {what} call failed: {result}")
+    if not succeeded:
+        # Nothing to choose from; surface the first failure
+        raise results[0]
+    return succeeded
+
+
+def _apply_candidates(state: AgentState, plan: List[Tuple[str, Optional[float]]], results: List) -> AgentState:
+    succeeded = _successful(results, "candidate generation")
+    candidates = [
+        ScriptCandidate(generator_role=role, temperature=temperature, script_draft=result.response)
+        for (role, temperature), result in zip(plan, results) if isinstance(result, LLMCallResult)
+    ]
+    logger.info(f"Generated {len(candidates)}/{len(plan)} script candidates")
+
+    return state.model_copy(update={
+        "script_candidates": candidates,
+        **token_accounting(state, *succeeded),
+    })
+
+
+def _candidate_messages(state: AgentState, candidate: ScriptCandidate):
+    return build_evaluation_message(state.model_copy(update={"script_draft": candidate.script_draft}), node=EVALUATION_NODE)
+
+
+def _apply_candidate_evaluations(state: AgentState, results: List) -> AgentState:
+    succeeded = _successful(results, "candidate evaluation")
+
+    candidates = [
+        candidate.model_copy(update={"evaluation_report": result.response if isinstance(result, LLMCallResult) else None})
+        for candidate, result in zip(state.script_candidates, results)
+    ]
+
+    # Approved drafts first, then by overall score
+    best = max(
+        (candidate for candidate in candidates if candidate.evaluation_report is not None),
+        key=lambda candidate: (candidate.evaluation_report.is_approved_for_next_stage,
+                               candidate.evaluation_report.overall_score),
+    )
+    report: EvaluationReport = best.evaluation_report
+    logger.info(
+        "Selected best script candidate",
+        extra={"generator_role": best.generator_role, "overall_score": report.overall_score,
+               "approved": report.is_approved_for_next_stage}
+    )
+
+    return state.model_copy(update={
+        "script_candidates": candidates,
+        "script_draft": best.script_draft,
+        "evaluation_report": report,
+        "revision_feedback": "\n".join(report.actionable_recommendations) if report.actionable_recommendations else None,
+        **token_accounting(state, *succeeded),
+    })
+
+
+def script_candidate_generation_node(state: AgentState, best_of_n: int) -> AgentState:
+    """
+    Generates `best_of_n` drafts in parallel across the configured generator models and temperatures.
+    """
+    logger.info("Start Script Candidate Generation Node")
+
+    output_schema = _output_schema(state)
+    messages_list = build_script_generation_message(state, node=GENERATION_NODE)
+    plan = candidate_plan(best_of_n)
+
+    results = call_all([
+        lambda role=role, temperature=temperature: invoke_structured(
+            GENERATION_NODE, role, output_schema, messages_list, temperature=temperature
+        )
+        for role, temperature in plan
+    ])
+
+    logger.info("End Script Candidate Generation Node")
+
+    return _apply_candidates(state, plan, results)
+
+
+async def script_candidate_generation_node_async(state: AgentState, best_of_n: int) -> AgentState:
+    """
+    Async counterpart of `script_candidate_generation_node`.
+    """
+    logger.info("Start Script Candidate Generation Node")
+
+    output_schema = _output_schema(state)
+    messages_list = build_script_generation_message(state, node=GENERATION_NODE)
+    plan = candidate_plan(best_of_n)
+
+    results = await acall_all([
+        lambda role=role, temperature=temperature: ainvoke_structured(
+            GENERATION_NODE, role, output_schema, messages_list, temperature=temperature
+        )
+        for role, temperature in plan
+    ])
+
+    logger.info("End Script Candidate Generation Node")
+
+    return _apply_candidates(state, plan, results)
+
+
+def script_candidate_evaluation_node(state: AgentState) -> AgentState:
+    """
+    Evaluates every candidate in one parallel wave and keeps the best as the working draft.
+    """
+    if not state.script_candidates:
+        raise ValueError("Script candidates are missing for evaluation.")
+
+    logger.info("Start Script Candidate Evaluation Node")
+
+    results = call_all([
+        lambda candidate=candidate: invoke_structured(
+            EVALUATION_NODE, "script_evaluation_and_refinement", EvaluationReport, _candidate_messages(state, candidate)
+        )
+        for candidate in state.script_candidates
+    ])
+
+    logger.info("End Script Candidate Evaluation Node")
+
+    return _apply_candidate_evaluations(state, results)
+
+
+async def script_candidate_evaluation_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `script_candidate_evaluation_node`.
+    """
+    if not state.script_candidates:
+        raise ValueError("Script candidates are missing for evaluation.")
+
+    logger.info("Start Script Candidate Evaluation Node")
+
+    results = await acall_all([
+        lambda candidate=candidate: ainvoke_structured(
+            EVALUATION_NODE, "script_evaluation_and_refinement", EvaluationReport, _candidate_messages(state, candidate)
+        )
+        for candidate in state.script_candidates
+    ])
+
+    logger.info("End Script Candidate Evaluation Node")
+
+    return _apply_candidate_evaluations(state, results)
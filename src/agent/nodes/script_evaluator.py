@@ -1,16 +1,24 @@
 # Import libraries
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import get_usage_metadata_callback
-
-from src.config.config import config
 from src.agent.utils import build_evaluation_message
 from src.config.logging_config import get_logger
 from src.agent.state import AgentState, EvaluationReport
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
 
 
 logger = get_logger(__name__)
 
 
+def _apply_evaluation(state: AgentState, result: LLMCallResult) -> AgentState:
+    response: EvaluationReport = result.response
+
+    # Update AgentState with the evaluation report and revision feedback
+    return state.model_copy(update={
+        "evaluation_report": response,
+        "revision_feedback": "\n".join(response.actionable_recommendations) if response.actionable_recommendations else None,
+        **token_accounting(state, result),
+    })
+
+
 def script_evaluation_node(state: AgentState) -> AgentState:
     """
     Evaluates the generated ad script and updates the AgentState with an EvaluationReport.
@@ -23,36 +31,37 @@ def script_evaluation_node(state: AgentState) -> AgentState:
     try:
         logger.info("Start Script Evaluation Node")
 
-        llm = ChatOpenAI(
-            model=config.script_evaluation_and_refinement_llm,
-            api_key=config.script_evaluation_and_refinement_api_key,
-            temperature=config.script_evaluation_and_refinement_temperature
-        )
-
-        # Set up structured output for EvaluationReport
-        structured_llm = llm.with_structured_output(EvaluationReport, method='json_mode')
-
         # Build the messages list for the LLM call
         messages_list = build_evaluation_message(state)
 
-        with get_usage_metadata_callback() as cb:
-            response: EvaluationReport = structured_llm.invoke(messages_list)
+        # Call model and parse the EvaluationReport
+        result = invoke_structured("script_evaluation_node", "script_evaluation_and_refinement", EvaluationReport, messages_list)
 
         logger.info("End Script Evaluation Node")
 
-        # Extract token usage from the callback
-        token_usage = cb.usage_metadata
-        total_tokens = 0
-
-        for model_name, usage in token_usage.items():
-            total_tokens += usage.get('total_tokens', 0)
-
-        # Update AgentState with the evaluation report and revision feedback
-        return state.model_copy(update={
-            "evaluation_report": response,
-            "revision_feedback": "\n".join(response.actionable_recommendations) if response.actionable_recommendations else None,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+        return _apply_evaluation(state, result)
 
     except Exception as e:
         raise
+
+
+async def script_evaluation_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `script_evaluation_node`.
+    """
+
+    # Pre-check: Ensure script_draft exists before evaluation
+    if not state.script_draft:
+        raise ValueError("Script draft is missing for evaluation.")
+
+    logger.info("Start Script Evaluation Node")
+
+    # Build the messages list for the LLM call
+    messages_list = build_evaluation_message(state)
+
+    # Call model and parse the EvaluationReport
+    result = await ainvoke_structured("script_evaluation_node", "script_evaluation_and_refinement", EvaluationReport, messages_list)
+
+    logger.info("End Script Evaluation Node")
+
+    return _apply_evaluation(state, result)
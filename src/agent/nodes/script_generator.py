@@ -1,69 +1,106 @@
 # Import libraries
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import get_usage_metadata_callback
+from typing import List, Type
+
+from langchain_core.messages import BaseMessage
 
-from src.config.config import config
 from src.agent.state import AgentState, VideoScriptDraft, StaticAdDraft, ScriptDraft
+from src.config.config import config, ScriptGenerationMode
 from src.config.logging_config import get_logger
 from src.agent.utils import build_script_generation_message
+from src.agent.llm.invoke import (
+    LLMCallResult, invoke_structured, ainvoke_structured, token_accounting,
+    race_structured, arace_structured, fallback_structured, afallback_structured
+)
 
 logger = get_logger(__name__)
 
 
+def _output_schema(state: AgentState) -> Type[ScriptDraft]:
+    # Define video and static platforms for a clean conditional check
+    video_platforms = [
+        "instagram_reels", "instagram_stories", "facebook_stories",
+        "youtube_shorts", "tiktok_feed", "snapchat_spotlight"
+    ]
+    static_platforms = [
+        "instagram_feeds", "facebook_feeds"
+    ]
+
+    # Select the correct schema based on the ad platform
+    if state.ad_platform.value in video_platforms:
+        return VideoScriptDraft
+    elif state.ad_platform.value in static_platforms:
+        return StaticAdDraft
+    else:
+        # Handle unsupported platforms gracefully
+        raise ValueError(f"Ad platform {state.ad_platform.value} is not supported by the script generator.")
+
+
+NODE = "script_generation_node"
+GENERATOR_ROLES = ["script_generation1", "script_generation2"]
+
+
+def _generate(output_schema: Type[ScriptDraft], messages_list: List[BaseMessage]) -> LLMCallResult:
+    # Use llm1 only, race llm1 against llm2, or fall back to llm2 (see `script_generation_mode`)
+    if config.script_generation_mode == ScriptGenerationMode.RACE:
+        return race_structured(NODE, GENERATOR_ROLES, output_schema, messages_list)
+    if config.script_generation_mode == ScriptGenerationMode.FALLBACK:
+        return fallback_structured(NODE, *GENERATOR_ROLES, output_schema, messages_list,
+                                   config.script_generation_fallback_deadline)
+    return invoke_structured(NODE, GENERATOR_ROLES[0], output_schema, messages_list)
+
+
+async def _agenerate(output_schema: Type[ScriptDraft], messages_list: List[BaseMessage]) -> LLMCallResult:
+    if config.script_generation_mode == ScriptGenerationMode.RACE:
+        return await arace_structured(NODE, GENERATOR_ROLES, output_schema, messages_list)
+    if config.script_generation_mode == ScriptGenerationMode.FALLBACK:
+        return await afallback_structured(NODE, *GENERATOR_ROLES, output_schema, messages_list,
+                                          config.script_generation_fallback_deadline)
+    return await ainvoke_structured(NODE, GENERATOR_ROLES[0], output_schema, messages_list)
+
+
+def _apply_script_draft(state: AgentState, result: LLMCallResult) -> AgentState:
+    # Update AgentState with the generated script
+    return state.model_copy(update={
+        "script_draft": result.response,
+        **token_accounting(state, result),
+    })
+
+
 def script_generation_node(state: AgentState) -> AgentState:
     """
     Generates the ad script based on the campaign brief and creative strategy.
     """
     try:
         logger.info("Start Script Generation Node")
-        llm = ChatOpenAI(
-            model=config.script_generation_llm1,
-            api_key=config.script_generation_api_key1,
-            temperature=config.script_generation_temperature1
-        )
-
-        # Define video and static platforms for a clean conditional check
-        video_platforms = [
-            "instagram_reels", "instagram_stories", "facebook_stories",
-            "youtube_shorts", "tiktok_feed", "snapchat_spotlight"
-        ]
-        static_platforms = [
-            "instagram_feeds", "facebook_feeds"
-        ]
-
-        # Select the correct schema based on the ad platform
-        if state.ad_platform.value in video_platforms:
-            output_schema = VideoScriptDraft
-        elif state.ad_platform.value in static_platforms:
-            output_schema = StaticAdDraft
-        else:
-            # Handle unsupported platforms gracefully
-            raise ValueError(f"Ad platform {state.ad_platform.value} is not supported by the script generator.")
-
-        # Set up structured output for ScriptDraft
-        structured_llm = llm.with_structured_output(output_schema, method='json_mode')
+
+        output_schema = _output_schema(state)
 
         # Build the messages list for the LLM call
         messages_list = build_script_generation_message(state)
 
-        with get_usage_metadata_callback() as cb:
-            response = structured_llm.invoke(messages_list)
+        result = _generate(output_schema, messages_list)
 
         logger.info("End Script Generation Node")
 
-        # Extract token usage from the callback
-        token_usage = cb.usage_metadata
-        total_tokens = 0
+        return _apply_script_draft(state, result)
 
-        for model_name, usage in token_usage.items():
-            total_tokens += usage.get('total_tokens', 0)
+    except Exception as e:
+        raise
 
 
-        # Update AgentState with the generated script
-        return state.model_copy(update={
-            "script_draft": response,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+async def script_generation_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `script_generation_node`.
+    """
+    logger.info("Start Script Generation Node")
 
-    except Exception as e:
-        raise
+    output_schema = _output_schema(state)
+
+    # Build the messages list for the LLM call
+    messages_list = build_script_generation_message(state)
+
+    result = await _agenerate(output_schema, messages_list)
+
+    logger.info("End Script Generation Node")
+
+    return _apply_script_draft(state, result)
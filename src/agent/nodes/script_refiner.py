@@ -1,22 +1,18 @@
 # Import libraries
+from typing import Optional, Type
 from datetime import datetime
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import get_usage_metadata_callback
 
-from src.config.config import config
-from src.agent.state import AgentState, VideoScriptDraft, StaticAdDraft
+from src.config.config import config, RefinementHistoryMode, RefinementOutputMode
+from src.agent.state import AgentState, VideoScriptDraft, StaticAdDraft, ScriptDraft, ScriptPatchSet
+from src.agent.script_diff import diff_scripts, evaluation_delta, apply_script_patches, ScriptPatchError
 from src.config.logging_config import get_logger
 from src.agent.utils import build_script_refinement_message
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
 
 logger = get_logger(__name__)
 
 
-def script_refinement_node(state: AgentState) -> AgentState:
-    """
-    Refines the ad script based on the evaluation report's actionable recommendations.
-    """
-    logger.info("Start Script Refinement Node...")
-
+def _output_schema(state: AgentState) -> Type[ScriptDraft]:
     # Ensure necessary data is present for refinement
     if not state.script_draft:
         logger.error("No script_draft found for refinement.")
@@ -36,57 +32,129 @@ def script_refinement_node(state: AgentState) -> AgentState:
 
     # Select the correct schema based on the ad platform
     if state.ad_platform.value in video_platforms:
-        output_schema = VideoScriptDraft
+        return VideoScriptDraft
     elif state.ad_platform.value in static_platforms:
-        output_schema = StaticAdDraft
+        return StaticAdDraft
     else:
         # Handle unsupported platforms gracefully
         raise ValueError(f"Ad platform {state.ad_platform.value} is not supported by the script refiner.")
 
+
+def _patched_draft(state: AgentState, result: LLMCallResult) -> Optional[ScriptDraft]:
+    """The current draft with the returned patches applied, or None if they cannot be applied."""
+    patch_set: ScriptPatchSet = result.response
     try:
-        llm = ChatOpenAI(
-            model=config.script_evaluation_and_refinement_llm,
-            api_key=config.script_evaluation_and_refinement_api_key,
-            temperature=config.script_evaluation_and_refinement_temperature
-        )
+        refined = apply_script_patches(state.script_draft, patch_set)
+    except ScriptPatchError as e:
+        logger.warning(f"Refinement patches rejected, regenerating the full script: {e}")
+        return None
+
+    if not patch_set.patches:
+        logger.warning("Refinement returned no patches; the draft is unchanged.")
+    logger.info(f"Applied {len(patch_set.patches)} refinement patches to the current draft.")
+    return refined
+
+
+def _apply_refinement(state: AgentState, response: ScriptDraft, *results: LLMCallResult) -> AgentState:
+    history = state.script_iteration_history or []
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "action": "script_refined",
+    }
+    if config.refinement_history_mode == RefinementHistoryMode.DELTA:
+        # The current draft and report are sent in full on their own; history only needs what each round changed
+        entry["previous_evaluation_delta"] = evaluation_delta(state.evaluation_report.model_dump(), history)
+        entry["output_script_diff"] = diff_scripts(state.script_draft, response)
+    else:
+        entry["previous_evaluation_report"] = state.evaluation_report.model_dump()
+        entry["output_refined_script"] = response.model_dump()
+    # New list: the previous state's history must not change under it
+    iteration_log = [*history, entry]
 
-        # The refinement node will output a new (refined) ScriptDraft
-        structured_llm = llm.with_structured_output(output_schema, method='json_mode')
+    # Update AgentState with the refined script
+    return state.model_copy(update={
+        "script_draft": response,
+        "script_iteration_history": iteration_log,
+        "revision_feedback": None,
+        "iteration_count": state.iteration_count + 1,
+        **token_accounting(state, *results),
+    })
+
+
+def script_refinement_node(state: AgentState) -> AgentState:
+    """
+    Refines the ad script based on the evaluation report's actionable recommendations.
+
+    With `refinement_output_mode=patch` the model returns targeted patches that are applied
+    to the current draft; if they do not apply, the full script is regenerated instead.
+    """
+    logger.info("Start Script Refinement Node...")
+
+    output_schema = _output_schema(state)
+
+    try:
+        results = []
+        if config.refinement_output_mode == RefinementOutputMode.PATCH:
+            messages_list = build_script_refinement_message(state, output_mode=RefinementOutputMode.PATCH)
+
+            logger.info("Calling LLM for script refinement patches...")
+
+            patch_result = invoke_structured("script_refinement_node", "script_evaluation_and_refinement",
+                                             ScriptPatchSet, messages_list)
+            results.append(patch_result)
+            refined = _patched_draft(state, patch_result)
+            if refined is not None:
+                return _apply_refinement(state, refined, *results)
 
         # Build the messages list, passing relevant state data
-        messages_list = build_script_refinement_message(state)
+        messages_list = build_script_refinement_message(state, output_mode=RefinementOutputMode.FULL)
 
         logger.info("Calling LLM for script refinement...")
 
-        with get_usage_metadata_callback() as cb:
-            response: output_schema = structured_llm.invoke(messages_list)
+        # The refinement node will output a new (refined) ScriptDraft
+        result = invoke_structured("script_refinement_node", "script_evaluation_and_refinement", output_schema, messages_list)
+        results.append(result)
+
+        return _apply_refinement(state, result.response, *results)
 
-        iteration_log = state.script_iteration_history or []
+    except Exception as e:
+        logger.error(f"Error in ScriptRefinementNode: {e}", exc_info=True)
+        raise
 
-        iteration_log.append({
-            "timestamp": datetime.now().isoformat(),
-            "action": "script_refined",
-            "previous_evaluation_report": state.evaluation_report.model_dump(),
-            "output_refined_script": response.model_dump(),
-        })
 
-        # Extract token usage from the callback
-        token_usage = cb.usage_metadata
-        total_tokens = 0
+async def script_refinement_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `script_refinement_node`.
+    """
+    logger.info("Start Script Refinement Node...")
 
-        for model_name, usage in token_usage.items():
-            total_tokens += usage.get('total_tokens', 0)
+    output_schema = _output_schema(state)
 
+    try:
+        results = []
+        if config.refinement_output_mode == RefinementOutputMode.PATCH:
+            messages_list = build_script_refinement_message(state, output_mode=RefinementOutputMode.PATCH)
+
+            logger.info("Calling LLM for script refinement patches...")
+
+            patch_result = await ainvoke_structured("script_refinement_node", "script_evaluation_and_refinement",
+                                                    ScriptPatchSet, messages_list)
+            results.append(patch_result)
+            refined = _patched_draft(state, patch_result)
+            if refined is not None:
+                return _apply_refinement(state, refined, *results)
+
+        # Build the messages list, passing relevant state data
+        messages_list = build_script_refinement_message(state, output_mode=RefinementOutputMode.FULL)
+
+        logger.info("Calling LLM for script refinement...")
+
+        # The refinement node will output a new (refined) ScriptDraft
+        result = await ainvoke_structured("script_refinement_node", "script_evaluation_and_refinement", output_schema, messages_list)
+        results.append(result)
 
-        # Update AgentState with the refined script
-        return state.model_copy(update={
-            "script_draft": response,
-            "script_iteration_history": iteration_log,
-            "revision_feedback": None,
-            "iteration_count": state.iteration_count + 1,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+        return _apply_refinement(state, result.response, *results)
 
     except Exception as e:
         logger.error(f"Error in ScriptRefinementNode: {e}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
@@ -1,50 +1,69 @@
 # Import libraries
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import get_usage_metadata_callback
+from typing import List
+from langchain_core.messages import BaseMessage
 
-from src.config.config import config
 from src.agent.utils import build_evaluation_message
 from src.config.logging_config import get_logger
 from src.agent.state import AgentState, EvaluationReport
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
 
 logger = get_logger(__name__)
 
 
+def _build_messages(state: AgentState) -> List[BaseMessage]:
+    if not state.variation_script_draft:
+        raise ValueError("Variation script draft is missing for evaluation.")
+
+    # Use variation script for evaluation by temporarily swapping; the base script's history does not apply
+    temp_state = state.model_copy(update={
+        "script_draft": state.variation_script_draft,
+        "script_iteration_history": None,
+        "refinement_lessons": None
+    })
+    return build_evaluation_message(temp_state, node="variation_evaluation_node")
+
+
+def _apply_variation_evaluation(state: AgentState, result: LLMCallResult) -> AgentState:
+    return state.model_copy(update={
+        "variation_evaluation_report": result.response,
+        **token_accounting(state, result),
+    })
+
+
 def variation_evaluation_node(state: AgentState) -> AgentState:
     """
     Evaluates the generated variation script.
     """
-    if not state.variation_script_draft:
-        raise ValueError("Variation script draft is missing for evaluation.")
+    messages_list = _build_messages(state)
 
     try:
         logger.info("Start Variation Script Evaluation Node")
 
-        llm = ChatOpenAI(
-            model=config.script_evaluation_and_refinement_llm,
-            api_key=config.script_evaluation_and_refinement_api_key,
-            temperature=config.script_evaluation_and_refinement_temperature
-        )
+        result = invoke_structured("variation_evaluation_node", "script_evaluation_and_refinement", EvaluationReport, messages_list)
+
+        logger.info("End Variation Script Evaluation Node")
+
+        return _apply_variation_evaluation(state, result)
 
-        structured_llm = llm.with_structured_output(EvaluationReport, method='json_mode')
+    except Exception as e:
+        logger.error(f"Error in Variation Evaluation Node: {e}", exc_info=True)
+        raise
 
-        # Use variation script for evaluation by temporarily swapping
-        temp_state = state.model_copy(update={"script_draft": state.variation_script_draft})
-        messages_list = build_evaluation_message(temp_state)
 
-        with get_usage_metadata_callback() as cb:
-            response: EvaluationReport = structured_llm.invoke(messages_list)
+async def variation_evaluation_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `variation_evaluation_node`.
+    """
+    messages_list = _build_messages(state)
 
-        logger.info("End Variation Script Evaluation Node")
+    try:
+        logger.info("Start Variation Script Evaluation Node")
 
-        # Extract token usage
-        token_usage = cb.usage_metadata
-        total_tokens = sum(usage.get('total_tokens', 0) for usage in token_usage.values())
+        result = await ainvoke_structured("variation_evaluation_node", "script_evaluation_and_refinement", EvaluationReport, messages_list)
+
+        logger.info("End Variation Script Evaluation Node")
 
-        return state.model_copy(update={
-            "variation_evaluation_report": response,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+        return _apply_variation_evaluation(state, result)
 
     except Exception as e:
         logger.error(f"Error in Variation Evaluation Node: {e}", exc_info=True)
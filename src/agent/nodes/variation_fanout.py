@@ -0,0 +1,96 @@
+# Import libraries
+from typing import Any, Dict, List
+
+from langgraph.types import Send
+
+from src.config.logging_config import get_logger
+from src.agent.state import AgentState, LLMCallStats, SingleVariation
+from src.agent.nodes.variation_generator import VARIATION_REQUESTS
+
+logger = get_logger(__name__)
+
+BRANCH_NODE = "variation_branch_node"
+
+
+def variation_fan_out_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Starts a variation run: clears the variations of any earlier run before the branches report theirs.
+    """
+    if not state.script_draft:
+        raise ValueError("No approved script draft available for variation generation.")
+
+    # An empty update resets the `variation_results` reducer
+    return {"variation_results": [], "is_variation_workflow": True}
+
+
+def route_variations(state: AgentState, variation_count: int) -> List[Send]:
+    """
+    One `Send` per variant focus; LangGraph runs the branches concurrently, each with
+    its own copy of the state and its own token accounting.
+    """
+    logger.info(f"Generating {variation_count} variations in parallel")
+    return [
+        Send(BRANCH_NODE, state.model_copy(update={
+            "variation_request": request,
+            "variation_script_draft": None,
+            "variation_evaluation_report": None,
+            "variation_iteration_count": 0,
+            "single_variation_result": None,
+            "variation_results": [],
+            "total_llm_tokens": 0,
+            "llm_call_stats": LLMCallStats(),
+        }))
+        for request in VARIATION_REQUESTS[:variation_count]
+    ]
+
+
+def variation_branch_node(state: AgentState, variant_graph) -> Dict[str, Any]:
+    """
+    Runs one variant's generate -> evaluate -> refine loop and reports its result.
+    """
+    result = AgentState.model_validate(variant_graph.invoke(state))
+    return {"variation_results": [result.single_variation_result]}
+
+
+async def variation_branch_node_async(state: AgentState, variant_graph) -> Dict[str, Any]:
+    """
+    Async counterpart of `variation_branch_node`.
+    """
+    result = AgentState.model_validate(await variant_graph.ainvoke(state))
+    return {"variation_results": [result.single_variation_result]}
+
+
+def _best_variation(variations: List[SingleVariation]) -> SingleVariation:
+    # Approved variations first, then by overall score
+    return max(variations, key=lambda variation: (
+        bool(variation.variation_evaluation_report and variation.variation_evaluation_report.is_approved_for_next_stage),
+        variation.variation_evaluation_report.overall_score if variation.variation_evaluation_report else 0.0,
+    ))
+
+
+def collect_variations_node(state: AgentState) -> AgentState:
+    """
+    Adds the branches' token usage to the run's accounting and keeps the best variation
+    as `single_variation_result`.
+    """
+    variations = state.variation_results
+    if not variations:
+        raise ValueError("No variations were generated.")
+
+    stats, total_tokens = state.llm_call_stats, state.total_llm_tokens
+    for variation in variations:
+        if variation.llm_call_stats:
+            stats = stats.merged(variation.llm_call_stats)
+        total_tokens += variation.total_llm_tokens
+
+    best = _best_variation(variations)
+    logger.info(f"Collected {len(variations)} variations; best: {best.variation_name}")
+
+    return state.model_copy(update={
+        "single_variation_result": best,
+        "variation_script_draft": best.ad_script_variation,
+        "variation_evaluation_report": best.variation_evaluation_report,
+        "variation_iteration_count": best.variation_iteration_count,
+        "total_llm_tokens": total_tokens,
+        "llm_call_stats": stats,
+    })
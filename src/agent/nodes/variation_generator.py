@@ -1,79 +1,128 @@
 # Import libraries
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import get_usage_metadata_callback
+from typing import Type
 
-from src.config.config import config
 from src.config.logging_config import get_logger
-from src.agent.state import AgentState, VideoScriptDraft, StaticAdDraft, VariationRequest
+from src.agent.state import AgentState, VideoScriptDraft, StaticAdDraft, ScriptDraft, VariationRequest
 from src.agent.utils import build_variation_generation_message
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
 
 logger = get_logger(__name__)
 
 
+def _output_schema(state: AgentState) -> Type[ScriptDraft]:
+    if not state.script_draft:
+        logger.error("No script_draft found for variation generation.")
+        raise ValueError("Approved script draft is missing for variation generation.")
+
+    # Determine output schema based on platform
+    video_platforms = [
+        "instagram_reels", "instagram_stories", "facebook_stories",
+        "youtube_shorts", "tiktok_feed", "snapchat_spotlight"
+    ]
+    static_platforms = [
+        "instagram_feeds", "facebook_feeds"
+    ]
+
+    if state.ad_platform.value in video_platforms:
+        return VideoScriptDraft
+    elif state.ad_platform.value in static_platforms:
+        return StaticAdDraft
+    else:
+        raise ValueError(f"Ad platform {state.ad_platform.value} is not supported.")
+
+
+# Focuses of the variants generated in parallel; the first `variation_count` are used
+VARIATION_REQUESTS = [
+    VariationRequest(
+        variation_name="Pain Point Variant",
+        variation_focus="Pain-point hook + urgent CTA + empathetic tone",
+        target_changes=[
+            "Opening hook built on the audience's most pressing pain point",
+            "Call-to-action that stresses urgency and immediate relief",
+            "Empathetic, problem-aware emotional tone"
+        ]
+    ),
+    VariationRequest(
+        variation_name="Aspiration Variant",
+        variation_focus="Aspiration hook + outcome-driven CTA + inspiring tone",
+        target_changes=[
+            "Opening hook built on the outcome the audience aspires to",
+            "Call-to-action framed around the result the audience gets",
+            "Inspiring, upbeat emotional tone aligned with the audience's values"
+        ]
+    ),
+    VariationRequest(
+        variation_name="Curiosity Variant",
+        variation_focus="Curiosity hook + low-friction CTA + playful tone",
+        target_changes=[
+            "Opening hook that raises a question or surprising claim the ad answers",
+            "Low-commitment call-to-action addressing the audience's decision-making factors",
+            "Playful, conversational emotional tone"
+        ]
+    ),
+]
+
+# Single variant runs (no request on the state) keep the combined focus
+DEFAULT_VARIATION_REQUEST = VariationRequest(
+    variation_focus="Hook + CTA + Emotional Tone Enhancement",
+    target_changes=[
+        "Modified opening hook using different audience pain point/aspiration",
+        "Enhanced call-to-action with stronger urgency and emotional resonance",
+        "Shifted emotional tone to align with different audience values/preferences"
+    ]
+)
+
+
+def _apply_variation(state: AgentState, result: LLMCallResult) -> AgentState:
+    variation_request = state.variation_request or DEFAULT_VARIATION_REQUEST
+
+    logger.info(f"Generated variation script for A/B testing: {variation_request.variation_name}")
+
+    # Update AgentState with the variation draft (ready for evaluation)
+    return state.model_copy(update={
+        "variation_request": variation_request,
+        "variation_script_draft": result.response,
+        "is_variation_workflow": True,
+        **token_accounting(state, result),
+    })
+
+
 def variation_generation_node(state: AgentState) -> AgentState:
     """
-    Generates a single A/B test variant with hook, CTA, and emotional tone changes.
-    This variant will then go through evaluation and refinement.
+    Generates a single A/B test variant with hook, CTA, and emotional tone changes,
+    following `state.variation_request` when set. This variant will then go through
+    evaluation and refinement.
     """
     logger.info("--- Entering Single Variation Generation Node ---")
 
-    if not state.script_draft:
-        logger.error("No script_draft found for variation generation.")
-        raise ValueError("Approved script draft is missing for variation generation.")
+    output_schema = _output_schema(state)
 
     try:
-        llm = ChatOpenAI(
-            model=config.script_generation_llm1,
-            api_key=config.script_generation_api_key1,
-            temperature=config.script_generation_temperature1
-        )
-
-        # Determine output schema based on platform
-        video_platforms = [
-            "instagram_reels", "instagram_stories", "facebook_stories",
-            "youtube_shorts", "tiktok_feed", "snapchat_spotlight"
-        ]
-        static_platforms = [
-            "instagram_feeds", "facebook_feeds"
-        ]
+        messages_list = build_variation_generation_message(state)
+
+        result = invoke_structured("variation_generation_node", "script_generation1", output_schema, messages_list)
+
+        return _apply_variation(state, result)
+
+    except Exception as e:
+        logger.error(f"Error in Single Variation Generation Node: {e}", exc_info=True)
+        raise
 
-        if state.ad_platform.value in video_platforms:
-            output_schema = VideoScriptDraft
-        elif state.ad_platform.value in static_platforms:
-            output_schema = StaticAdDraft
-        else:
-            raise ValueError(f"Ad platform {state.ad_platform.value} is not supported.")
 
-        structured_llm = llm.with_structured_output(output_schema, method='json_mode')
+async def variation_generation_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `variation_generation_node`.
+    """
+    logger.info("--- Entering Single Variation Generation Node ---")
+
+    output_schema = _output_schema(state)
+
+    try:
         messages_list = build_variation_generation_message(state)
 
-        # Track token usage
-        with get_usage_metadata_callback() as cb:
-            response = structured_llm.invoke(messages_list)
-
-        # Extract token usage
-        token_usage = cb.usage_metadata
-        total_tokens = sum(usage.get('total_tokens', 0) for usage in token_usage.values())
-
-        # Create variation request details
-        variation_request = VariationRequest(
-            variation_focus="Hook + CTA + Emotional Tone Enhancement",
-            target_changes=[
-                "Modified opening hook using different audience pain point/aspiration",
-                "Enhanced call-to-action with stronger urgency and emotional resonance",
-                "Shifted emotional tone to align with different audience values/preferences"
-            ]
-        )
-
-        logger.info(f"Generated single variation script for A/B testing")
-
-        # Update AgentState with the variation draft (ready for evaluation)
-        return state.model_copy(update={
-            "variation_request": variation_request,
-            "variation_script_draft": response,
-            "is_variation_workflow": True,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+        result = await ainvoke_structured("variation_generation_node", "script_generation1", output_schema, messages_list)
+
+        return _apply_variation(state, result)
 
     except Exception as e:
         logger.error(f"Error in Single Variation Generation Node: {e}", exc_info=True)
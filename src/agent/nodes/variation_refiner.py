@@ -1,21 +1,17 @@
 # Import libraries
-from datetime import datetime
-from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import get_usage_metadata_callback
+from typing import List, Type
+from langchain_core.messages import BaseMessage
 
-from src.config.config import config
-from src.agent.state import AgentState, VideoScriptDraft, StaticAdDraft
+from src.config.config import RefinementOutputMode
+from src.agent.state import AgentState, VideoScriptDraft, StaticAdDraft, ScriptDraft
 from src.config.logging_config import get_logger
 from src.agent.utils import build_script_refinement_message
+from src.agent.llm.invoke import LLMCallResult, invoke_structured, ainvoke_structured, token_accounting
 
 logger = get_logger(__name__)
 
-def variation_refinement_node(state: AgentState) -> AgentState:
-    """
-    Refines the variation script based on evaluation feedback.
-    """
-    logger.info("Start Variation Script Refinement Node...")
 
+def _output_schema(state: AgentState) -> Type[ScriptDraft]:
     if not state.variation_script_draft:
         raise ValueError("Variation script draft is missing for refinement.")
     if not state.variation_evaluation_report:
@@ -31,43 +27,73 @@ def variation_refinement_node(state: AgentState) -> AgentState:
     ]
 
     if state.ad_platform.value in video_platforms:
-        output_schema = VideoScriptDraft
+        return VideoScriptDraft
     elif state.ad_platform.value in static_platforms:
-        output_schema = StaticAdDraft
+        return StaticAdDraft
     else:
         raise ValueError(f"Ad platform {state.ad_platform.value} is not supported.")
 
-    try:
-        llm = ChatOpenAI(
-            model=config.script_evaluation_and_refinement_llm,
-            api_key=config.script_evaluation_and_refinement_api_key,
-            temperature=config.script_evaluation_and_refinement_temperature
-        )
 
-        structured_llm = llm.with_structured_output(output_schema, method='json_mode')
+def _build_messages(state: AgentState) -> List[BaseMessage]:
+    # Use variation script and evaluation for refinement by temporarily swapping; the base script's history does not apply
+    temp_state = state.model_copy(update={
+        "script_draft": state.variation_script_draft,
+        "evaluation_report": state.variation_evaluation_report,
+        "script_iteration_history": None,
+        "refinement_lessons": None
+    })
+    # Variations are always refined in full; patch mode only applies to the base script refiner
+    return build_script_refinement_message(temp_state, node="variation_refinement_node",
+                                           output_mode=RefinementOutputMode.FULL)
+
+
+def _apply_variation_refinement(state: AgentState, result: LLMCallResult) -> AgentState:
+    # Update AgentState with the refined variation script
+    return state.model_copy(update={
+        "variation_script_draft": result.response,
+        "variation_iteration_count": state.variation_iteration_count + 1,
+        **token_accounting(state, result),
+    })
+
+
+def variation_refinement_node(state: AgentState) -> AgentState:
+    """
+    Refines the variation script based on evaluation feedback.
+    """
+    logger.info("Start Variation Script Refinement Node...")
+
+    output_schema = _output_schema(state)
 
-        # Use variation script and evaluation for refinement by temporarily swapping
-        temp_state = state.model_copy(update={
-            "script_draft": state.variation_script_draft,
-            "evaluation_report": state.variation_evaluation_report
-        })
-        messages_list = build_script_refinement_message(temp_state)
+    try:
+        messages_list = _build_messages(state)
 
         logger.info("Calling LLM for variation script refinement...")
 
-        with get_usage_metadata_callback() as cb:
-            response = structured_llm.invoke(messages_list)
+        result = invoke_structured("variation_refinement_node", "script_evaluation_and_refinement", output_schema, messages_list)
+
+        return _apply_variation_refinement(state, result)
+
+    except Exception as e:
+        logger.error(f"Error in Variation Refinement Node: {e}", exc_info=True)
+        raise
+
+
+async def variation_refinement_node_async(state: AgentState) -> AgentState:
+    """
+    Async counterpart of `variation_refinement_node`.
+    """
+    logger.info("Start Variation Script Refinement Node...")
+
+    output_schema = _output_schema(state)
+
+    try:
+        messages_list = _build_messages(state)
+
+        logger.info("Calling LLM for variation script refinement...")
 
-        # Extract token usage
-        token_usage = cb.usage_metadata
-        total_tokens = sum(usage.get('total_tokens', 0) for usage in token_usage.values())
+        result = await ainvoke_structured("variation_refinement_node", "script_evaluation_and_refinement", output_schema, messages_list)
 
-        # Update AgentState with the refined variation script
-        return state.model_copy(update={
-            "variation_script_draft": response,
-            "variation_iteration_count": state.variation_iteration_count + 1,
-            "total_llm_tokens": state.total_llm_tokens + total_tokens,
-        })
+        return _apply_variation_refinement(state, result)
 
     except Exception as e:
         logger.error(f"Error in Variation Refinement Node: {e}", exc_info=True)
@@ -0,0 +1,148 @@
+"""
+Incremental parsing of streamed JSON script drafts.
+
+Structured nodes ask the model for a JSON document (`method='json_mode'`), which
+is only validated once the whole response has arrived. `IncrementalArrayParser`
+consumes the same response chunk by chunk and emits every element of a top-level
+array (e.g. the `scenes` of a `VideoScriptDraft`) as a validated model as soon as
+the element's closing brace arrives, so the UI can render scene 1 while the rest
+of the script is still being generated. If the stream turns out to be malformed
+the parser stops emitting and `finish` falls back to validating the complete
+document.
+"""
+# Import libraries
+import json
+from typing import Generic, List, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+
+from src.config.logging_config import get_logger
+from src.agent.state import Scene, VideoScriptDraft
+
+
+logger = get_logger(__name__)
+
+ItemT = TypeVar("ItemT", bound=BaseModel)
+
+
+class IncrementalArrayParser(Generic[ItemT]):
+    """
+    Emits validated items of one top-level JSON array while the document streams in.
+    """
+
+    def __init__(self, array_key: str, item_model: Type[ItemT]):
+        self.array_key = array_key
+        self.item_model = item_model
+        self.items: List[ItemT] = []
+        self.malformed = False
+
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        """The raw document received so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> List[ItemT]:
+        """Consume a streamed chunk and return the items completed by it."""
+        self._text += chunk
+        if self.malformed:
+            return []
+
+        text = self._text
+        completed: List[ItemT] = []
+
+        for index in range(self._position, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = text[self._string_start:index]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index + 1
+            elif char == ":" and self._depth == 1:
+                self._current_key = self._last_string
+            elif char == "," and self._depth == 1:
+                self._current_key = None
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._current_key == self.array_key:
+                    self._in_array = True
+                elif char == "{" and self._in_array and self._depth == 2:
+                    self._item_start = index
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth < 0:
+                    self._mark_malformed("unbalanced closing bracket")
+                    break
+                if char == "}" and self._in_array and self._depth == 2 and self._item_start is not None:
+                    item = self._parse_item(text[self._item_start:index + 1])
+                    if item is None:
+                        break
+                    completed.append(item)
+                    self._item_start = None
+                elif char == "]" and self._in_array and self._depth == 1:
+                    self._in_array = False
+
+        self._position = len(text)
+        self.items.extend(completed)
+        return completed
+
+    def _parse_item(self, item_text: str) -> Optional[ItemT]:
+        try:
+            return self.item_model.model_validate(json.loads(item_text))
+        except (json.JSONDecodeError, ValidationError) as e:
+            self._mark_malformed(f"invalid {self.array_key} element: {e}")
+            return None
+
+    def _mark_malformed(self, reason: str) -> None:
+        # Items emitted so far stay valid; the complete document decides the rest
+        logger.warning(f"Streamed JSON is malformed, falling back to whole-document validation: {reason}")
+        self.malformed = True
+
+    def finish(self, schema: Type[BaseModel]) -> Optional[BaseModel]:
+        """Validate the complete document against `schema`, or None when it does not parse."""
+        text = self.text
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end < start:
+            return None
+
+        try:
+            return schema.model_validate(json.loads(text[start:end + 1]))
+        except (json.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"Streamed document failed validation as {schema.__name__}: {e}")
+            return None
+
+
+class VideoScriptStreamParser(IncrementalArrayParser[Scene]):
+    """
+    Emits the `Scene`s of a streamed `VideoScriptDraft` as they complete.
+    """
+
+    def __init__(self):
+        super().__init__("scenes", Scene)
+
+    def finish_script(self) -> Optional[VideoScriptDraft]:
+        """The complete script, validated as a whole."""
+        return self.finish(VideoScriptDraft)
+
+
+# Export public interface
+__all__ = ['IncrementalArrayParser', 'VideoScriptStreamParser']
@@ -0,0 +1,66 @@
+"""
+Serialization of structured prompt content.
+
+`PromptEncoding.PRETTY` renders data as indented JSON and the guideline as YAML,
+as the prompts were originally written. `PromptEncoding.COMPACT` cuts input
+tokens without changing what the model is told: JSON is minified, keys whose
+value is null are left out and the guideline is emitted as minified JSON. The
+encoding is selected with `prompt_encoding`; `benchmarks/prompt_tokens.py`
+reports the savings per node.
+"""
+# Import libraries
+import json
+from typing import Any, Dict, Optional
+
+import yaml
+
+from src.config.config import config, PromptEncoding
+
+
+def current_encoding() -> PromptEncoding:
+    return config.prompt_encoding
+
+
+def drop_none(value: Any) -> Any:
+    """`value` with null-valued dict keys removed at every level."""
+    if isinstance(value, dict):
+        return {key: drop_none(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [drop_none(item) for item in value]
+    return value
+
+
+def encode_json(data: Any, encoding: Optional[PromptEncoding] = None) -> str:
+    """Serialize `data` for a prompt."""
+    if (encoding or current_encoding()) == PromptEncoding.COMPACT:
+        return json.dumps(drop_none(data), separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(data, indent=2)
+
+
+def encode_members(members: Dict[str, Optional[str]], encoding: Optional[PromptEncoding] = None) -> str:
+    """
+    Serialize a dict whose values were already serialized with `encode_json` in the same encoding,
+    without re-encoding them. The result equals `encode_json` of the decoded dict.
+    """
+    if (encoding or current_encoding()) == PromptEncoding.COMPACT:
+        members = {key: value for key, value in members.items() if value is not None}
+        return "{" + ",".join(f"{json.dumps(key, ensure_ascii=False)}:{value}" for key, value in members.items()) + "}"
+
+    if not members:
+        return "{}"
+    lines = []
+    for key, serialized in members.items():
+        value = "null" if serialized is None else serialized.replace("\n", "\n  ")
+        lines.append(f"  {json.dumps(key)}: {value}")
+    return "{\n" + ",\n".join(lines) + "\n}"
+
+
+def encode_document(data: Any, encoding: Optional[PromptEncoding] = None) -> str:
+    """Serialize a reference document such as the copywriting guideline."""
+    if (encoding or current_encoding()) == PromptEncoding.COMPACT:
+        return encode_json(data, PromptEncoding.COMPACT)
+    return yaml.dump(data, sort_keys=False)
+
+
+# Export public interface
+__all__ = ['current_encoding', 'drop_none', 'encode_json', 'encode_members', 'encode_document']
@@ -0,0 +1,279 @@
+"""
+Provider prompt-cache-friendly assembly of node messages.
+
+OpenAI and Gemini cache the longest previously seen prefix of a prompt and bill
+(and prefill) those input tokens at a fraction of the normal cost. A prefix only
+matches if it is byte-identical, so the builders hand their content to
+`assemble_messages` as titled sections tagged with how often they change, and
+the messages are laid out from most to least stable:
+
+    system prompt (static) -> copywriting guideline (static)
+    -> campaign context (semi-static, fixed for a run)
+    -> draft / evaluation / history (volatile, changes every loop iteration)
+
+so every evaluation and refinement call of a run re-sends the same long prefix
+and only the tail differs.
+
+Nodes with a token budget (`prompt_token_budgets`) are fitted to it before the
+messages are built: the oldest entries of history sections are summarized first,
+then dropped, until the estimated prompt size fits.
+
+Every section (and, for JSON sections, every top-level member) is tagged with the
+`PromptPart` it belongs to. The assembled messages carry a per-part size
+breakdown, which is logged, added to the run's `llm_call_stats.prompt_sizes` for
+the calls actually sent and aggregated across runs by `prompt_sizes`.
+"""
+# Import libraries
+import math
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import BaseModel, Field
+from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
+
+from src.config.config import config
+from src.config.logging_config import get_logger
+from src.agent.state import PromptPartSize, PromptSizeStats
+from src.agent.guideline import GuidelineRole, rendered_guideline
+from src.agent.context_blocks import json_object
+from src.agent.prompt_encoding import encode_json
+from src.agent.llm.tokens import CHARS_PER_TOKEN, TOKENS_PER_MESSAGE, estimate_tokens
+
+
+logger = get_logger(__name__)
+
+
+class PromptStability(str, Enum):
+    """How often the content of a prompt section changes"""
+    STATIC = "static"  # identical for every call of a node
+    SEMI_STATIC = "semi_static"  # fixed for a campaign run
+    VOLATILE = "volatile"  # changes on every loop iteration
+
+
+_STABILITY_ORDER = {PromptStability.STATIC: 0, PromptStability.SEMI_STATIC: 1, PromptStability.VOLATILE: 2}
+
+
+class PromptPart(str, Enum):
+    """What a piece of a prompt is, for the prompt size breakdown"""
+    SYSTEM_PROMPT = "system_prompt"
+    GUIDELINE = "guideline"
+    CAMPAIGN_CONTEXT = "campaign_context"  # campaign brief, product, persona inputs
+    CREATIVE_STRATEGY = "creative_strategy"
+    INSIGHTS = "insights"  # generated audience insight
+    HISTORY = "history"  # refinement history and lessons
+    CURRENT_DRAFT = "current_draft"
+    FEEDBACK = "feedback"  # evaluation report the refiner works from
+    INSTRUCTION = "instruction"
+
+
+class PromptSection(BaseModel):
+    """
+    A titled block of a node's user message.
+    """
+    title: str = Field(..., description="Heading of the section, e.g. 'Evaluation Context'.")
+    content: str = Field(..., description="Rendered body of the section.")
+    stability: PromptStability = Field(..., description="How often the content changes.")
+    part: PromptPart = Field(default=PromptPart.CAMPAIGN_CONTEXT, description="Prompt part the section counts towards.")
+    member_chars: Dict[PromptPart, int] = Field(
+        default_factory=dict, description="Characters of members that count towards another part than `part`."
+    )
+
+    def render(self) -> str:
+        return f"### {self.title} ###\n{self.content}"
+
+    def estimated_tokens(self) -> int:
+        return estimate_tokens(self.render())
+
+    def part_chars(self) -> Dict[PromptPart, int]:
+        """Characters of the rendered section per prompt part; whatever is not a tagged member counts to `part`."""
+        chars = dict(self.member_chars)
+        chars[self.part] = chars.get(self.part, 0) + max(0, len(self.render()) - sum(self.member_chars.values()))
+        return chars
+
+
+class HistorySection(PromptSection):
+    """
+    A section listing history entries (oldest first) that may be shortened to fit a token budget.
+    """
+    key: str = Field(..., description="JSON key the entries are listed under.")
+    entries: List[Any] = Field(default_factory=list, description="Entries, oldest first.")
+    summarize: Optional[Callable[[Any], Any]] = Field(
+        default=None, description="Condenses one entry; entries are only dropped when not set."
+    )
+    summarized: int = Field(default=0, description="Number of oldest entries already replaced by their summary.")
+    dropped: int = Field(default=0, description="Number of oldest entries removed.")
+
+    def shrink(self) -> Optional["HistorySection"]:
+        """Copy with the oldest full entry summarized, or else the oldest entry dropped; None when empty."""
+        if not self.entries:
+            return None
+        if self.summarize is not None and self.summarized < len(self.entries):
+            entries = list(self.entries)
+            entries[self.summarized] = self.summarize(entries[self.summarized])
+            return history_section(self.title, self.key, entries, self.summarize, self.stability,
+                                   summarized=self.summarized + 1, dropped=self.dropped)
+        return history_section(self.title, self.key, self.entries[1:], self.summarize, self.stability,
+                               summarized=max(0, self.summarized - 1), dropped=self.dropped + 1)
+
+
+def _member_chars(members: Dict[str, Optional[str]], member_parts: Optional[Dict[str, PromptPart]]) -> Dict[PromptPart, int]:
+    chars: Dict[PromptPart, int] = {}
+    for key, part in (member_parts or {}).items():
+        if members.get(key) is not None:
+            chars[part] = chars.get(part, 0) + len(members[key])
+    return chars
+
+
+def json_section(title: str, data: Any, stability: PromptStability, part: PromptPart = PromptPart.CAMPAIGN_CONTEXT,
+                 member_parts: Optional[Dict[str, PromptPart]] = None) -> PromptSection:
+    """
+    Section with `data` rendered as JSON (key order is preserved, so equal data renders equally).
+    `member_parts` attributes top-level members of a dict to other prompt parts than `part`.
+    """
+    members = {}
+    if member_parts and isinstance(data, dict):
+        # Nested indentation is not counted, so the estimate leans towards `part`
+        members = {key: encode_json(value) for key, value in data.items() if key in member_parts and value is not None}
+    return PromptSection(title=title, content=encode_json(data), stability=stability, part=part,
+                         member_chars=_member_chars(members, member_parts))
+
+
+def block_section(title: str, members: Dict[str, Optional[str]], stability: PromptStability,
+                  part: PromptPart = PromptPart.CAMPAIGN_CONTEXT,
+                  member_parts: Optional[Dict[str, PromptPart]] = None) -> PromptSection:
+    """
+    Section with a JSON object whose member values are already serialized (see `context_blocks`).
+    `member_parts` attributes members to other prompt parts than `part`.
+    """
+    return PromptSection(title=title, content=json_object(members), stability=stability, part=part,
+                         member_chars=_member_chars(members, member_parts))
+
+
+def history_section(title: str, key: str, entries: List[Any], summarize: Optional[Callable[[Any], Any]] = None,
+                    stability: PromptStability = PromptStability.VOLATILE, summarized: int = 0,
+                    dropped: int = 0) -> HistorySection:
+    """Section with the entries rendered as JSON under `key`, noting how many older entries were omitted."""
+    data: Dict[str, Any] = {key: entries}
+    if dropped:
+        data["omitted_earlier_entries"] = dropped
+    return HistorySection(
+        title=title, content=encode_json(data), stability=stability, part=PromptPart.HISTORY, key=key,
+        entries=entries, summarize=summarize, summarized=summarized, dropped=dropped,
+    )
+
+
+def guideline_section(ad_platform: Any = None, role: Optional[GuidelineRole] = None,
+                      creative_direction: Any = None) -> PromptSection:
+    """
+    The copywriting guideline sections that apply to the platform, prompt role and creative direction,
+    rendered once per file version and selection.
+    """
+    content = rendered_guideline(ad_platform=ad_platform, role=role, creative_direction=creative_direction)
+    return PromptSection(title="Reels Copywriting Guideline", content=content, stability=PromptStability.STATIC,
+                         part=PromptPart.GUIDELINE)
+
+
+def order_sections(sections: List[PromptSection]) -> List[PromptSection]:
+    """Sections from most to least stable, keeping the builder's order within each level."""
+    return sorted(sections, key=lambda section: _STABILITY_ORDER[section.stability])
+
+
+def fit_to_budget(node: str, system_prompt: str, sections: List[PromptSection], instruction: Optional[str],
+                  budget: int) -> List[PromptSection]:
+    """
+    Shorten history sections, oldest entries first, until the estimated prompt fits `budget` tokens.
+    """
+    fixed_tokens = estimate_tokens(system_prompt) + estimate_tokens(instruction or "") + 2 * TOKENS_PER_MESSAGE
+    sizes = [section.estimated_tokens() for section in sections]
+    tokens_before = fixed_tokens + sum(sizes)
+    if tokens_before <= budget:
+        return sections
+
+    sections = list(sections)
+    while fixed_tokens + sum(sizes) > budget:
+        # Shorten the first history section that still has entries
+        index = next((i for i, section in enumerate(sections)
+                      if isinstance(section, HistorySection) and section.entries), None)
+        if index is None:
+            break
+        sections[index] = sections[index].shrink()
+        sizes[index] = sections[index].estimated_tokens()
+
+    tokens_after = fixed_tokens + sum(sizes)
+    histories = [section for section in sections if isinstance(section, HistorySection)]
+    logger.info(
+        f"Fitted {node} prompt to its token budget: {tokens_before} -> {tokens_after} tokens (budget {budget})",
+        extra={"node": node, "tokens_before": tokens_before, "tokens_after": tokens_after, "budget": budget,
+               "history_entries_summarized": sum(section.summarized for section in histories),
+               "history_entries_dropped": sum(section.dropped for section in histories)}
+    )
+    if tokens_after > budget:
+        logger.warning(f"{node} prompt still exceeds its token budget with all history removed",
+                       extra={"node": node, "tokens_after": tokens_after, "budget": budget})
+    return sections
+
+
+class PromptMessages(list):
+    """
+    The messages of a prompt (a plain list to every consumer), carrying the size breakdown
+    of the parts they were assembled from as `prompt_sizes`.
+    """
+
+    def __init__(self, messages: List[BaseMessage], prompt_sizes: PromptSizeStats):
+        super().__init__(messages)
+        self.prompt_sizes = prompt_sizes
+
+
+def prompt_size_breakdown(system_prompt: str, sections: List[PromptSection],
+                          instruction: Optional[str] = None) -> PromptSizeStats:
+    """Size of one prompt per `PromptPart`, largest part first."""
+    chars: Dict[PromptPart, int] = {PromptPart.SYSTEM_PROMPT: len(system_prompt)}
+    for section in sections:
+        for part, count in section.part_chars().items():
+            chars[part] = chars.get(part, 0) + count
+    if instruction:
+        chars[PromptPart.INSTRUCTION] = len(instruction)
+
+    ordered = sorted(((part, count) for part, count in chars.items() if count), key=lambda item: -item[1])
+    return PromptSizeStats(prompts=1, parts={
+        part.value: PromptPartSize(chars=count, estimated_tokens=math.ceil(count / CHARS_PER_TOKEN))
+        for part, count in ordered
+    })
+
+
+def _log_prompt_sizes(node: Optional[str], sizes: PromptSizeStats) -> None:
+    total = sizes.estimated_tokens or 1
+    shares = ", ".join(f"{part} {size.estimated_tokens / total:.0%}" for part, size in sizes.parts.items())
+    logger.info(
+        f"{node or 'prompt'} prompt: ~{sizes.estimated_tokens} tokens ({shares})",
+        extra={"node": node, "prompt_tokens": sizes.estimated_tokens,
+               "prompt_parts": {part: size.estimated_tokens for part, size in sizes.parts.items()}}
+    )
+
+
+def assemble_messages(system_prompt: str, sections: List[PromptSection], instruction: Optional[str] = None,
+                      node: Optional[str] = None) -> PromptMessages:
+    """
+    System message plus one user message holding the sections in cache-friendly order,
+    followed by the closing instruction. The prompt is fitted to the node's token budget, if it has one.
+    """
+    budget = config.prompt_token_budgets.get(node) if node else None
+    if budget:
+        sections = fit_to_budget(node, system_prompt, sections, instruction, budget)
+
+    parts = [section.render() for section in order_sections(sections)]
+    if instruction:
+        parts.append(f"---\n{instruction}")
+
+    sizes = prompt_size_breakdown(system_prompt, sections, instruction)
+    _log_prompt_sizes(node, sizes)
+
+    return PromptMessages([
+        SystemMessage(content=system_prompt),
+        HumanMessage(content="\n\n".join(parts).strip())
+    ], sizes)
+
+
+# Export public interface
+__all__ = ['PromptStability', 'PromptPart', 'PromptSection', 'HistorySection', 'PromptMessages', 'json_section',
+           'block_section', 'history_section', 'guideline_section', 'order_sections', 'fit_to_budget',
+           'prompt_size_breakdown', 'assemble_messages']
@@ -0,0 +1,67 @@
+"""
+Process-wide aggregates of prompt size per node and prompt part.
+
+Every prompt built by `prompt_layout.assemble_messages` carries a per-part size
+breakdown (see `prompt_layout.PromptPart`). When the prompt is sent to a provider,
+`llm.invoke` records the breakdown here and `token_accounting` adds it to the
+run's `llm_call_stats.prompt_sizes`. The recorder sums the breakdowns of all runs
+served by the process, so the parts that dominate input cost can be queried with
+`largest_parts` (or per node / per part) and targeted first.
+"""
+# Import libraries
+import threading
+from typing import Dict, List, Tuple
+
+from src.agent.state import PromptPartSize, PromptSizeStats
+
+
+class PromptSizeRecorder:
+    """
+    Thread-safe per-node sums of prompt size breakdowns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, PromptSizeStats] = {}
+
+    def record(self, node: str, sizes: PromptSizeStats) -> None:
+        with self._lock:
+            self._nodes[node] = self._nodes.get(node, PromptSizeStats()).merged(sizes)
+
+    def by_node(self) -> Dict[str, PromptSizeStats]:
+        """Summed breakdown per node."""
+        with self._lock:
+            return dict(self._nodes)
+
+    def by_part(self) -> Dict[str, PromptPartSize]:
+        """Summed size per prompt part across all nodes, largest first."""
+        total = PromptSizeStats()
+        for sizes in self.by_node().values():
+            total = total.merged(sizes)
+        return dict(sorted(total.parts.items(), key=lambda item: -item[1].estimated_tokens))
+
+    def largest_parts(self, limit: int = 5) -> List[Tuple[str, str, PromptPartSize, float]]:
+        """
+        The (node, part, size, share of all prompt tokens) combinations that cost the most input tokens.
+        """
+        rows = [(node, part, size) for node, sizes in self.by_node().items() for part, size in sizes.parts.items()]
+        total = sum(size.estimated_tokens for _, _, size in rows) or 1
+        rows.sort(key=lambda row: -row[2].estimated_tokens)
+        return [(node, part, size, size.estimated_tokens / total) for node, part, size in rows[:limit]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+
+
+# Global instance
+prompt_size_recorder = PromptSizeRecorder()
+
+
+def get_prompt_size_recorder() -> PromptSizeRecorder:
+    """Get the shared prompt size recorder"""
+    return prompt_size_recorder
+
+
+# Export public interface
+__all__ = ['PromptSizeRecorder', 'prompt_size_recorder', 'get_prompt_size_recorder']
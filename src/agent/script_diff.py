@@ -0,0 +1,229 @@
+"""
+Structural diffs between successive script drafts, and targeted patches to a draft.
+
+With `refinement_history_mode=delta` each `script_iteration_history` entry stores
+what the refinement changed instead of the full refined script, so refinement
+prompts carry the current draft in full once plus a small diff per past
+iteration rather than one full script per iteration. Video scripts are diffed
+per scene (matched by `scene_number`); every other field is compared as a whole.
+The evaluation report that preceded each refinement is stored the same way
+(`evaluation_delta`): its scores plus only the feedback and recommendations that
+changed, since the current report is sent in full on its own.
+
+With `refinement_output_mode=patch` the refiner returns a `ScriptPatchSet` instead
+of a whole script; `apply_script_patches` validates it against the current draft
+and applies it locally.
+"""
+# Import libraries
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from src.agent.state import ScriptDraft, Scene, ScriptPatchSet
+
+
+# Script-level fields a patch may not replace
+PATCH_PROTECTED_FIELDS = {"script_type", "ad_platform_target", "scenes"}
+
+
+class ScriptPatchError(ValueError):
+    """A patch set that cannot be applied to the draft it was written for."""
+
+
+def _field_changes(before: Dict[str, Any], after: Dict[str, Any], skip: tuple = ()) -> Dict[str, Dict[str, Any]]:
+    return {
+        field: {"from": before.get(field), "to": value}
+        for field, value in after.items()
+        if field not in skip and before.get(field) != value
+    }
+
+
+def diff_scripts(before: ScriptDraft, after: ScriptDraft) -> Dict[str, Any]:
+    """
+    JSON-serializable diff turning `before` into `after`; empty when they are equal.
+    """
+    if type(before) is not type(after):
+        return {"replaced_with": after.model_dump()}
+
+    before_data, after_data = before.model_dump(), after.model_dump()
+    diff: Dict[str, Any] = {}
+
+    changed = _field_changes(before_data, after_data, skip=("scenes",))
+    if changed:
+        diff["changed"] = changed
+
+    if "scenes" in after_data:
+        before_scenes = {scene["scene_number"]: scene for scene in before_data.get("scenes", [])}
+        after_scenes = {scene["scene_number"]: scene for scene in after_data["scenes"]}
+
+        scenes: Dict[str, Any] = {}
+        scene_changes = [
+            {"scene_number": number, "changed": _field_changes(before_scenes[number], scene, skip=("scene_number",))}
+            for number, scene in after_scenes.items()
+            if number in before_scenes and before_scenes[number] != scene
+        ]
+        if scene_changes:
+            scenes["changed"] = scene_changes
+        added = [scene for number, scene in after_scenes.items() if number not in before_scenes]
+        if added:
+            scenes["added"] = added
+        removed = [number for number in before_scenes if number not in after_scenes]
+        if removed:
+            scenes["removed"] = removed
+        if scenes:
+            diff["scenes"] = scenes
+
+    return diff
+
+
+def apply_script_diff(draft: ScriptDraft, diff: Dict[str, Any]) -> ScriptDraft:
+    """
+    The draft `diff` was computed from, turned into the draft it was computed to.
+    """
+    if "replaced_with" in diff:
+        schema = type(draft)
+        return schema.model_validate(diff["replaced_with"])
+
+    data = draft.model_dump()
+    for field, change in diff.get("changed", {}).items():
+        data[field] = change["to"]
+
+    scenes_diff = diff.get("scenes")
+    if scenes_diff:
+        scenes = {scene["scene_number"]: scene for scene in data["scenes"]}
+        for scene_change in scenes_diff.get("changed", []):
+            for field, change in scene_change["changed"].items():
+                scenes[scene_change["scene_number"]][field] = change["to"]
+        for number in scenes_diff.get("removed", []):
+            scenes.pop(number, None)
+        for scene in scenes_diff.get("added", []):
+            scenes[scene["scene_number"]] = scene
+        data["scenes"] = [scenes[number] for number in sorted(scenes)]
+
+    return type(draft).model_validate(data)
+
+
+def apply_script_patches(draft: ScriptDraft, patch_set: ScriptPatchSet) -> ScriptDraft:
+    """
+    `draft` with every patch applied, validated as a whole.
+
+    Raises `ScriptPatchError` if a patch targets an unknown or protected field or a
+    missing scene, or if the patched script no longer validates.
+    """
+    data = draft.model_dump()
+    scenes = {scene["scene_number"]: scene for scene in data.get("scenes", [])}
+    script_fields = set(type(draft).model_fields) - PATCH_PROTECTED_FIELDS
+    scene_fields = set(Scene.model_fields) - {"scene_number"}
+    durations_patched = False
+
+    for patch in patch_set.patches:
+        if patch.scene_number is None:
+            if patch.field not in script_fields:
+                raise ScriptPatchError(f"Field '{patch.field}' cannot be patched on a {type(draft).__name__}")
+            data[patch.field] = patch.new_value
+            continue
+
+        if patch.scene_number not in scenes:
+            raise ScriptPatchError(f"Scene {patch.scene_number} does not exist in the draft")
+        if patch.field not in scene_fields:
+            raise ScriptPatchError(f"Field '{patch.field}' cannot be patched on a scene")
+        scenes[patch.scene_number][patch.field] = patch.new_value
+        durations_patched |= patch.field == "duration_seconds"
+
+    if durations_patched and not any(patch.field == "duration_estimate_seconds" for patch in patch_set.patches):
+        # Keep the total consistent with the retimed scenes
+        try:
+            data["duration_estimate_seconds"] = sum(float(scene["duration_seconds"]) for scene in scenes.values())
+        except (TypeError, ValueError) as e:
+            raise ScriptPatchError(f"Invalid scene duration: {e}") from e
+
+    try:
+        return type(draft).model_validate(data)
+    except ValidationError as e:
+        raise ScriptPatchError(f"Patched script is invalid: {e}") from e
+
+
+def _criterion_scores(report: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        getattr(criterion, "value", criterion): metric["score"]
+        for criterion, metric in (report.get("detailed_scores") or {}).items()
+    }
+
+
+def entry_evaluation(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Overall score, per-criterion scores and recommendations of the evaluation that
+    preceded a history entry, for either history mode. Delta entries only list the
+    recommendations that were new at the time.
+    """
+    if "previous_evaluation_delta" in entry:
+        delta = entry["previous_evaluation_delta"]
+        return {
+            "overall_score": delta.get("overall_score"),
+            "scores": dict(delta.get("scores") or {}),
+            "recommendations": list(delta.get("new_recommendations") or []),
+        }
+
+    report = entry.get("previous_evaluation_report") or {}
+    return {
+        "overall_score": report.get("overall_score"),
+        "scores": _criterion_scores(report),
+        "recommendations": list(report.get("actionable_recommendations") or []),
+    }
+
+
+def evaluation_delta(report: Dict[str, Any], history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compact form of an evaluation report for a delta history entry: every score, the
+    feedback of criteria whose score changed since the previous entry, and the
+    recommendations no earlier entry gave.
+    """
+    previous_scores = entry_evaluation(history[-1])["scores"] if history else {}
+    given = {recommendation for entry in history for recommendation in entry_evaluation(entry)["recommendations"]}
+    scores = _criterion_scores(report)
+
+    delta: Dict[str, Any] = {
+        "overall_score": report["overall_score"],
+        "scores": scores,
+        "is_approved_for_next_stage": report["is_approved_for_next_stage"],
+    }
+    changed_feedback = {
+        getattr(criterion, "value", criterion): metric["feedback"]
+        for criterion, metric in report["detailed_scores"].items()
+        if previous_scores.get(getattr(criterion, "value", criterion), metric["score"]) != metric["score"]
+    }
+    if changed_feedback:
+        delta["changed_feedback"] = changed_feedback
+    new_recommendations = [
+        recommendation for recommendation in report["actionable_recommendations"] if recommendation not in given
+    ]
+    if new_recommendations:
+        delta["new_recommendations"] = new_recommendations
+    return delta
+
+
+def changed_value(diff: Dict[str, Any], field: str) -> Optional[Any]:
+    """New value of a top-level field, or None when the diff leaves it unchanged."""
+    if "replaced_with" in diff:
+        return diff["replaced_with"].get(field)
+    change = diff.get("changed", {}).get(field)
+    return change["to"] if change else None
+
+
+def describe_diff(diff: Dict[str, Any]) -> List[str]:
+    """Short human-readable list of what a diff changes, e.g. ['call_to_action_text', 'scene 2 on_screen_text']."""
+    if "replaced_with" in diff:
+        return ["whole script replaced"]
+
+    changes = list(diff.get("changed", {}))
+    scenes_diff = diff.get("scenes", {})
+    for scene_change in scenes_diff.get("changed", []):
+        changes.extend(f"scene {scene_change['scene_number']} {field}" for field in scene_change["changed"])
+    changes.extend(f"scene {scene['scene_number']} added" for scene in scenes_diff.get("added", []))
+    changes.extend(f"scene {number} removed" for number in scenes_diff.get("removed", []))
+    return changes
+
+
+# Export public interface
+__all__ = ['diff_scripts', 'apply_script_diff', 'changed_value', 'describe_diff', 'apply_script_patches',
+           'ScriptPatchError', 'PATCH_PROTECTED_FIELDS', 'entry_evaluation', 'evaluation_delta']
@@ -9,7 +9,7 @@ Last Edit: 27-07-2025
 import json
 from enum import Enum
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Annotated, Dict, List, Optional, Union
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -304,6 +304,24 @@ class StaticAdDraft(BaseModel):
 ScriptDraft = Union[VideoScriptDraft, StaticAdDraft]
 
 
+class ScriptPatch(BaseModel):
+    """
+    One targeted change to a script draft: the new value of a single field.
+    """
+    scene_number: Optional[int] = Field(
+        None, description="Scene whose field is replaced (video scripts); omit for script-level fields."
+    )
+    field: str = Field(..., description="Name of the replaced field, e.g. 'on_screen_text' or 'call_to_action_text'.")
+    new_value: Union[str, float, List[str]] = Field(..., description="Complete new value of the field.")
+
+
+class ScriptPatchSet(BaseModel):
+    """
+    Refinement returned as targeted patches to the current draft instead of a regenerated script.
+    """
+    patches: List[ScriptPatch] = Field(default_factory=list, description="Field replacements, applied in order.")
+
+
 class EvaluationCriterion(str, Enum):
     """
     Specific criteria used to evaluate an ad script.
@@ -352,6 +370,7 @@ class VariationRequest(BaseModel):
     """
     Request for generating a single A/B test variation with specific changes.
     """
+    variation_name: str = Field(default="Enhanced A/B Test Variant", description="Name/identifier of the requested variation")
     variation_focus: str = Field(
         ...,
         description="The primary focus of this variation (e.g., 'Hook + CTA + Emotional Tone')"
@@ -375,6 +394,172 @@ class SingleVariation(BaseModel):
     )
     variation_iteration_count: int = Field(default=0, description="Number of refinement iterations")
     notes: Optional[str] = Field(None, description="Additional notes about this variation")
+    total_llm_tokens: int = Field(default=0, description="Tokens spent generating, evaluating and refining this variation")
+    llm_call_stats: Optional["LLMCallStats"] = Field(
+        default=None, description="LLM call counters of this variation's generate/evaluate/refine loop"
+    )
+
+
+class ScriptCandidate(BaseModel):
+    """
+    One draft of a best-of-N generation wave and its evaluation.
+    """
+    generator_role: str = Field(..., description="Generator model role that wrote the draft (e.g. 'script_generation1').")
+    temperature: Optional[float] = Field(None, description="Temperature override used for the draft, if any.")
+    script_draft: ScriptDraft = Field(..., description="The generated draft.")
+    evaluation_report: Optional[EvaluationReport] = Field(None, description="Report of the evaluation wave, if it succeeded.")
+
+
+class RefinementLessons(BaseModel):
+    """
+    Condensed record of the refinement iterations compacted out of `script_iteration_history`.
+    """
+    compacted_iterations: int = Field(default=0, description="Number of history entries folded into this record.")
+    overall_score_trajectory: List[float] = Field(
+        default_factory=list, description="Overall score of the evaluation that preceded each compacted refinement, oldest first."
+    )
+    criterion_score_trajectory: Dict[str, List[int]] = Field(
+        default_factory=dict, description="Per-criterion scores of those evaluations, oldest first."
+    )
+    recommendations_given: List[str] = Field(
+        default_factory=list, description="Distinct recommendations addressed by the compacted refinements, oldest first."
+    )
+
+    @property
+    def overall_score_delta(self) -> Optional[float]:
+        if len(self.overall_score_trajectory) < 2:
+            return None
+        return round(self.overall_score_trajectory[-1] - self.overall_score_trajectory[0], 2)
+
+    @property
+    def criterion_score_deltas(self) -> Dict[str, int]:
+        """Score change per criterion across the compacted iterations, for criteria that changed."""
+        return {
+            criterion: scores[-1] - scores[0]
+            for criterion, scores in self.criterion_score_trajectory.items()
+            if len(scores) > 1 and scores[-1] != scores[0]
+        }
+
+    def prompt_view(self) -> Dict:
+        """What the evaluator and refiner are shown: the lessons without the raw per-criterion trajectories."""
+        return {
+            "compacted_iterations": self.compacted_iterations,
+            "overall_score_trajectory": self.overall_score_trajectory,
+            "overall_score_delta": self.overall_score_delta,
+            "criterion_score_deltas": self.criterion_score_deltas,
+            "recommendations_given": self.recommendations_given,
+        }
+
+
+class NodeTokenUsage(BaseModel):
+    """
+    Provider-reported token usage of one graph node's LLM calls.
+    """
+    calls: int = Field(default=0, description="Provider calls made (cache hits and coalesced calls excluded).")
+    input_tokens: int = Field(default=0, description="Prompt tokens, including cached ones.")
+    cached_input_tokens: int = Field(default=0, description="Prompt tokens served from the provider's prompt cache.")
+    output_tokens: int = Field(default=0, description="Completion tokens.")
+
+    @property
+    def cached_input_ratio(self) -> float:
+        """Share of the prompt tokens that were read from the provider's prompt cache."""
+        return self.cached_input_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+class PromptPartSize(BaseModel):
+    """
+    Size of one part of a prompt (system prompt, guideline, history, ...).
+    """
+    chars: int = Field(default=0, description="Characters.")
+    estimated_tokens: int = Field(default=0, description="Estimated tokens (~4 characters per token).")
+
+
+class PromptSizeStats(BaseModel):
+    """
+    Size of the prompts sent by one graph node, broken down by prompt part.
+    """
+    prompts: int = Field(default=0, description="Prompts sent.")
+    parts: Dict[str, PromptPartSize] = Field(default_factory=dict, description="Summed size per prompt part.")
+
+    @property
+    def estimated_tokens(self) -> int:
+        return sum(part.estimated_tokens for part in self.parts.values())
+
+    def merged(self, other: "PromptSizeStats") -> "PromptSizeStats":
+        """These stats plus `other`'s."""
+        parts = dict(self.parts)
+        for name, size in other.parts.items():
+            current = parts.get(name, PromptPartSize())
+            parts[name] = PromptPartSize(chars=current.chars + size.chars,
+                                         estimated_tokens=current.estimated_tokens + size.estimated_tokens)
+        return PromptSizeStats(prompts=self.prompts + other.prompts, parts=parts)
+
+
+class LLMCallStats(BaseModel):
+    """
+    Retry, hedging and prompt-cache counters of the LLM calls made during a run.
+    """
+    retries: int = Field(default=0, description="Provider calls retried after a transient error.")
+    hedges_fired: int = Field(default=0, description="Duplicate requests fired for slow calls.")
+    hedge_wins: int = Field(default=0, description="Hedged calls where the duplicate finished first.")
+    hedge_wasted_tokens: int = Field(
+        default=0,
+        description="Tokens spent on the losing requests of hedged calls (prompt estimate when it was cancelled)."
+    )
+    pending_losers: List[str] = Field(
+        default_factory=list,
+        description="Ids of losing requests (hedges, raced calls) still running; their estimate is swapped for their "
+                    "actual usage once they finish."
+    )
+    node_usage: Dict[str, NodeTokenUsage] = Field(
+        default_factory=dict, description="Token usage per graph node, incl. prompt tokens read from the provider cache."
+    )
+    prompt_sizes: Dict[str, PromptSizeStats] = Field(
+        default_factory=dict, description="Size of the prompts sent per graph node, by prompt part."
+    )
+
+    def merged(self, other: "LLMCallStats") -> "LLMCallStats":
+        """These counters plus `other`'s, e.g. those of a run's parallel branches."""
+        node_usage = dict(self.node_usage)
+        for node, usage in other.node_usage.items():
+            current = node_usage.get(node, NodeTokenUsage())
+            node_usage[node] = NodeTokenUsage(
+                calls=current.calls + usage.calls,
+                input_tokens=current.input_tokens + usage.input_tokens,
+                cached_input_tokens=current.cached_input_tokens + usage.cached_input_tokens,
+                output_tokens=current.output_tokens + usage.output_tokens,
+            )
+        prompt_sizes = dict(self.prompt_sizes)
+        for node, sizes in other.prompt_sizes.items():
+            prompt_sizes[node] = prompt_sizes[node].merged(sizes) if node in prompt_sizes else sizes
+
+        return LLMCallStats(
+            retries=self.retries + other.retries,
+            hedges_fired=self.hedges_fired + other.hedges_fired,
+            hedge_wins=self.hedge_wins + other.hedge_wins,
+            hedge_wasted_tokens=self.hedge_wasted_tokens + other.hedge_wasted_tokens,
+            pending_losers=self.pending_losers + other.pending_losers,
+            node_usage=node_usage,
+            prompt_sizes=prompt_sizes,
+        )
+
+
+# Resolve the forward reference to `LLMCallStats`
+SingleVariation.model_rebuild()
+
+
+def collect_variations(current: List[SingleVariation], new: List[SingleVariation]) -> List[SingleVariation]:
+    """
+    Reducer of `AgentState.variation_results`: each parallel variant branch adds its
+    result, keyed by variation name, so writing back results already collected (e.g. a
+    node returning the whole state) changes nothing. An empty update clears the list
+    for a new variation run.
+    """
+    if not new:
+        return []
+    merged = {variation.variation_name: variation for variation in current}
+    merged.update((variation.variation_name, variation) for variation in new)
+    return list(merged.values())
 
 
 class AgentState(BaseModel):
@@ -436,6 +621,10 @@ class AgentState(BaseModel):
         default=None,
         description="Current working draft of the ad script, generated or updated during the workflow."
     )
+    script_candidates: Optional[List[ScriptCandidate]] = Field(
+        default=None,
+        description="Drafts of a best-of-N generation wave; the best one becomes script_draft."
+    )
     evaluation_report: Optional[EvaluationReport] = Field(
         default=None,
         description="Detailed multi-criteria report from the Evaluator Agent assessing the current script draft."
@@ -462,7 +651,11 @@ class AgentState(BaseModel):
     )
     single_variation_result: Optional[SingleVariation] = Field(
         default=None,
-        description="Final single variation result with all refinements"
+        description="Final single variation result with all refinements (the best one when several were generated)"
+    )
+    variation_results: Annotated[List[SingleVariation], collect_variations] = Field(
+        default_factory=list,
+        description="Every variation generated in parallel by the variation workflow"
     )
     is_variation_workflow: bool = Field(
         default=False,
@@ -476,6 +669,10 @@ class AgentState(BaseModel):
         default=None,
         description="History of script refinement iterations, including previous evaluation reports and refined scripts."
     )
+    refinement_lessons: Optional[RefinementLessons] = Field(
+        default=None,
+        description="Lessons from the oldest refinement iterations, once they are compacted out of the history."
+    )
     iteration_count: int = Field(
         default=0,
         description="Number of refinement iterations the script has gone through."
@@ -484,6 +681,10 @@ class AgentState(BaseModel):
         default=0,
         description="Total number of LLM tokens (input + output) used across all calls."
     )
+    llm_call_stats: LLMCallStats = Field(
+        default_factory=LLMCallStats,
+        description="Retry and hedging counters of the run; wasted hedge tokens are included in total_llm_tokens."
+    )
     timestamp: Optional[datetime] = Field(
         default=None,
         description="Timestamp indicating when this AgentState was last updated or processed."
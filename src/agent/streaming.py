@@ -0,0 +1,78 @@
+"""
+Event stream of a workflow run for the UI.
+
+Drives a compiled graph with `graph.stream(..., stream_mode=["updates", "messages", "values"])`
+and turns LangGraph's raw chunks into `WorkflowEvent`s: a `token` event for every
+LLM output chunk (tagged with the node that produced it), a `node_completed`
+event when a node finishes and a single `final` event carrying the resulting
+`AgentState`.
+"""
+# Import libraries
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional
+from pydantic import BaseModel, Field
+
+from src.agent.state import AgentState
+
+
+class WorkflowEventType(str, Enum):
+    """Kinds of events emitted while a workflow runs"""
+    TOKEN = "token"
+    NODE_COMPLETED = "node_completed"
+    FINAL = "final"
+
+
+class WorkflowEvent(BaseModel):
+    """
+    A single UI-facing event of a streamed workflow run.
+    """
+    type: WorkflowEventType = Field(..., description="Kind of event.")
+    node: Optional[str] = Field(default=None, description="Graph node that produced the event.")
+    text: str = Field(default="", description="LLM output chunk of a token event.")
+    message_id: Optional[str] = Field(default=None, description="Id of the LLM response a token belongs to.")
+    state: Optional[AgentState] = Field(default=None, description="Resulting state of a final event.")
+
+
+def _chunk_text(message: Any) -> str:
+    content = getattr(message, "content", "")
+    if isinstance(content, str):
+        return content
+    # Some providers stream a list of content blocks
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+def stream_workflow(graph, agent_state: Optional[AgentState], run_config: Optional[Dict] = None) -> Iterator[WorkflowEvent]:
+    """
+    Run a compiled (sync) workflow graph and yield its events as they arrive.
+
+    With a checkpointed graph, `agent_state=None` and the failed run's `run_config`
+    resume that run from its last successful node (see `src.agent.checkpointing`).
+    """
+    final_values = None
+
+    for mode, chunk in graph.stream(agent_state, config=run_config, stream_mode=["updates", "messages", "values"]):
+        if mode == "messages":
+            message, metadata = chunk
+            text = _chunk_text(message)
+            if text:
+                yield WorkflowEvent(
+                    type=WorkflowEventType.TOKEN,
+                    node=metadata.get("langgraph_node"),
+                    text=text,
+                    message_id=getattr(message, "id", None),
+                )
+
+        elif mode == "updates":
+            for node in chunk:
+                yield WorkflowEvent(type=WorkflowEventType.NODE_COMPLETED, node=node)
+
+        elif mode == "values":
+            final_values = chunk
+
+    if final_values is not None:
+        state = final_values if isinstance(final_values, AgentState) else AgentState(**final_values)
+        yield WorkflowEvent(type=WorkflowEventType.FINAL, state=state)
+
+
+# Export public interface
+__all__ = ['WorkflowEvent', 'WorkflowEventType', 'stream_workflow']
@@ -1,14 +1,18 @@
 # Import libraries
-import os
-import json
-import yaml
 from typing import List, Optional, Dict
-from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
+from langchain_core.messages import BaseMessage
 
+from src.config.config import config, RefinementOutputMode
 from src.agent.state import AgentState
+from src.agent import context_blocks as blocks
+from src.agent.guideline import GuidelineRole
+from src.agent.script_diff import changed_value, describe_diff, entry_evaluation
+from src.agent.prompt_layout import (PromptStability, PromptPart, PromptSection, json_section, block_section, history_section,
+                                     guideline_section, assemble_messages)
 from src.agent.prompts import (audience_insight_system_prompt , creative_strategy_system_prompt,
                                script_generation_system_prompt, script_evaluation_system_prompt,
-                               script_refinement_system_prompt, variation_generation_system_prompt)
+                               script_refinement_system_prompt, script_patch_refinement_system_prompt,
+                               variation_generation_system_prompt)
 
 
 def format_list(items: Optional[List[str]]) -> str:
@@ -23,399 +27,216 @@ def format_dict_as_list(d: Dict[str, str]) -> str:
     return "\n    - " + "\n    - ".join([f"{k}: {v}" for k, v in d.items()])
 
 
-def read_yaml_from_parent(filename):
-    """
-    Read and parse a YAML file located one directory above the script's location.
+def summarize_history_entry(entry: Dict) -> Dict:
+    """Condensed form of a `script_iteration_history` entry: the feedback given and what it produced."""
+    previous_evaluation = entry_evaluation(entry)
+    summary = {
+        "timestamp": entry.get("timestamp", "N/A"),
+        "previous_overall_score": previous_evaluation["overall_score"],
+        "recommendations_given": previous_evaluation["recommendations"],
+    }
+    if "output_script_diff" in entry:
+        # Delta history: only fields the refinement changed are known
+        diff = entry["output_script_diff"]
+        summary["script_changes"] = describe_diff(diff)
+        summary["script_produced_key_takeaway"] = changed_value(diff, "key_takeaway")
+        summary["script_produced_cta"] = changed_value(diff, "call_to_action_text")
+        return summary
 
-    Args:
-        filename (str): Name of the YAML file (e.g., 'your_file.yaml').
+    refined_script = entry.get("output_refined_script", {})
+    summary["script_produced_key_takeaway"] = refined_script.get("key_takeaway")
+    summary["script_produced_cta"] = refined_script.get("call_to_action_text")
+    return summary
 
-    Returns:
-        dict or list: Parsed contents of the YAML file.
-    """
-    yaml_path = "src/agent/copywriting_guideline.yaml"
 
-    with open(yaml_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+# Members of the context blocks that count towards other prompt parts than the campaign context
+CONTEXT_MEMBER_PARTS = {
+    "creative_strategy": PromptPart.CREATIVE_STRATEGY,
+    "audience_insights": PromptPart.INSIGHTS,
+    "detailed_audience_insights": PromptPart.INSIGHTS,
+}
 
-guideline = read_yaml_from_parent('copywriting_guideline.yaml')
 
-def build_audience_insight_message(state: AgentState) -> List[BaseMessage]:
+def build_audience_insight_message(state: AgentState, node: str = "audience_insight_node") -> List[BaseMessage]:
     a = state.audience_persona
     p = state.product
 
-    user_content_string = f"""\
-### Target Audience Profile ###
-{json.dumps(a.model_dump(), indent=2)}
-
-### Product Details ###
-{json.dumps(p.model_dump(), indent=2)}
-"""
-
-    return [
-        SystemMessage(content=audience_insight_system_prompt),
-        HumanMessage(content=user_content_string.strip())
-    ]
-
-
-def build_creative_strategy_message(state: AgentState) -> List[BaseMessage]:
-    p = state.product
-    a = state.audience_persona
-    ai = state.audience_insight
-    guideline = read_yaml_from_parent('copywriting_guideline.yaml')
-    preferred_hook_examples = [
-        "Your phone's camera is now your personal chef. Here's how.",
-        "What if you could turn THIS [show photo of a delicious dish with cheese and fat] into YOUR weight lose friendly meal?"
-        "Sick of recipes that ignore your allergies and fitness goals?",
-        "Tired of boring meals that don't fit your diet?",
-        "Still searching for a ‘keto, no-nuts’ dinner idea? Watch this...",
-        "Post-workout and starving? Let this app pick tonight’s meal while you cool down.",
-        "Struggling to find a dish that matches your diet perfectly?",
-        "Tired of boring meal preps? See how I made my cravings work for my goals!",
-        "What if you could eat THIS and still hit your fitness goals?",
-        "Ever wish you could snap a photo and get a healthy recipe made for your goals?"
-    ]
-    preferred_cta_examples = [
-        "Download Delisio and personalize your meals!"
-        "Tap to create your first personalized recipe.",
-        "Get Delisio and solve dinner tonight.",
-        "Install Delisio and start cooking smarter",
-        "Install and turn any meal photo into your healthiest dish.",
-        "Get your AI personal chef. Tap to install now!",
-        "Download Delisio today and take control of your healthy cooking journey."
-        "Download Delisio and cook smarter in minutes.",
-    ]
-
-    # Create a clean demographic profile by excluding redundant fields
-    demographic_profile = {
-        "age_range": a.age_range,
-        "gender": a.gender.value,
-        "location": [c.value for c in a.location],
-        "income_range": a.income_range.value,
-        "education_level": a.education_level.value if a.education_level else 'Not specified'
-    }
-
-    # Prepare a dictionary for the campaign brief and audience insights
-    campaign_and_insights_dict = {
-        "campaign_brief": {
-            "campaign_goal": state.campaign_goal.value,
-            "ad_platform": state.ad_platform.value,
-            "creative_direction": state.creative_direction.value,
-            "script_tone": state.script_tone,
-            "product_details": {
-                "name": p.product_name,
-                "overview": p.product_description,
-                "focused_feature": {
-                    "name": state.product_feature_focus,
-                    "description": p.product_features.get(state.product_feature_focus)
-                },
-                "unique_selling_points": p.unique_selling_point,
-                "problems_solved": p.problems_solved,
-                "supported_platforms": [sp.value for sp in p.supported_platforms]
-            }
-        },
-        "demographic_profile": demographic_profile,
-        "detailed_audience_insights": ai.model_dump(),
-        "preferred_hook_examples": preferred_hook_examples,
-        "preferred_cta_examples": preferred_cta_examples
+    return assemble_messages(audience_insight_system_prompt, [
+        json_section("Target Audience Profile", a.model_dump(mode="json"), PromptStability.SEMI_STATIC),
+        json_section("Product Details", p.model_dump(mode="json"), PromptStability.SEMI_STATIC),
+    ], node=node)
+
+
+PREFERRED_HOOK_EXAMPLES = [
+    "Your phone's camera is now your personal chef. Here's how.",
+    "What if you could turn THIS [show photo of a delicious dish with cheese and fat] into YOUR weight lose friendly meal?"
+    "Sick of recipes that ignore your allergies and fitness goals?",
+    "Tired of boring meals that don't fit your diet?",
+    "Still searching for a ‘keto, no-nuts’ dinner idea? Watch this...",
+    "Post-workout and starving? Let this app pick tonight’s meal while you cool down.",
+    "Struggling to find a dish that matches your diet perfectly?",
+    "Tired of boring meal preps? See how I made my cravings work for my goals!",
+    "What if you could eat THIS and still hit your fitness goals?",
+    "Ever wish you could snap a photo and get a healthy recipe made for your goals?"
+]
+PREFERRED_CTA_EXAMPLES = [
+    "Download Delisio and personalize your meals!"
+    "Tap to create your first personalized recipe.",
+    "Get Delisio and solve dinner tonight.",
+    "Install Delisio and start cooking smarter",
+    "Install and turn any meal photo into your healthiest dish.",
+    "Get your AI personal chef. Tap to install now!",
+    "Download Delisio today and take control of your healthy cooking journey."
+    "Download Delisio and cook smarter in minutes.",
+]
+
+
+def build_creative_strategy_message(state: AgentState, node: str = "creative_strategy_node") -> List[BaseMessage]:
+    # Campaign brief and audience insights, spliced from the shared pre-serialized blocks
+    campaign_and_insights = {
+        "campaign_brief": blocks.campaign_brief(state),
+        "product_details": blocks.product_details(state),
+        "demographic_profile": blocks.demographic_profile(state),
+        "detailed_audience_insights": blocks.audience_insight(state),
+        "preferred_hook_examples": blocks.serialized(PREFERRED_HOOK_EXAMPLES),
+        "preferred_cta_examples": blocks.serialized(PREFERRED_CTA_EXAMPLES)
     }
 
-    # Use json.dumps to format the structured data for the LLM
-    structured_data_str = json.dumps(campaign_and_insights_dict, indent=2)
+    # Static guideline first, then the campaign data (see `prompt_layout`)
+    return assemble_messages(creative_strategy_system_prompt, [
+        guideline_section(state.ad_platform, GuidelineRole.CREATIVE_STRATEGY, state.creative_direction),
+        block_section("Campaign Brief and Audience Insights", campaign_and_insights, PromptStability.SEMI_STATIC,
+                      member_parts=CONTEXT_MEMBER_PARTS),
+    ], instruction="Generate the JSON creative strategy based on the above information.", node=node)
 
-    # Combine the structured data with the guidelines
-    user_content_string = f"""\
-    ### Campaign Brief and Audience Insights ###
-    {structured_data_str}
 
-    ### Reels Copywriting Guideline ###
-    {yaml.dump(guideline, sort_keys=False)}
+def _audience_insights(state: AgentState) -> str:
+    return blocks.json_object({
+        "demographic_profile": blocks.demographic_profile(state),
+        "detailed_insights": blocks.audience_insight(state)
+    })
 
-    ---
-    Generate the JSON creative strategy based on the above information.
-    """
 
-    return [
-        SystemMessage(content=creative_strategy_system_prompt),
-        HumanMessage(content=user_content_string.strip())
-    ]
+def _lessons_sections(state: AgentState) -> List[PromptSection]:
+    """Lessons from compacted refinement iterations, placed before the history they precede."""
+    if not state.refinement_lessons:
+        return []
+    return [json_section("Lessons From Earlier Refinements", state.refinement_lessons.prompt_view(),
+                         PromptStability.VOLATILE, PromptPart.HISTORY)]
 
 
-def build_script_generation_message(state: AgentState) -> List[BaseMessage]:
-    p = state.product
-    a = state.audience_persona
-    ai = state.audience_insight
-    guideline = read_yaml_from_parent('copywriting_guideline.yaml')
-
-    # Prepare a single, comprehensive dictionary for all inputs
-    inputs_dict = {
-        "campaign_brief": {
-            "campaign_goal": state.campaign_goal.value,
-            "ad_platform": state.ad_platform.value,
-            "creative_direction": state.creative_direction.value,
-            "script_tone": state.script_tone.value,
-            "product_details": {
-                "name": p.product_name,
-                "overview": p.product_description,
-                "focused_feature": {
-                    "name": state.product_feature_focus,
-                    "description": p.product_features.get(state.product_feature_focus)
-                },
-                "unique_selling_points": p.unique_selling_point,
-                "problems_solved": p.problems_solved,
-                "supported_platforms": [sp.value for sp in p.supported_platforms]
-            }
-        },
-        "creative_strategy": {
-            "core_message_pillars": state.core_message_pillars,
-            "brainstormed_hooks": state.brainstormed_hooks,
-            "generated_ctas": state.generated_ctas,
-            "emotional_triggers": state.emotional_triggers,
-            "primary_visual_concept": state.primary_visual_concept,
-            "audio_strategy": state.audio_strategy
-        },
-        "audience_insights": {
-            "demographic_profile": {
-                "age_range": a.age_range,
-                "gender": a.gender.value,
-                "location": [c.value for c in a.location],
-                "income_range": a.income_range.value,
-                "education_level": a.education_level.value if a.education_level else 'Not specified'
-            },
-            "detailed_insights": ai.model_dump()
-        }
+def build_script_generation_message(state: AgentState, node: str = "script_generation_node") -> List[BaseMessage]:
+    # Prepare a single, comprehensive set of inputs
+    inputs = {
+        "campaign_brief": blocks.campaign_brief(state),
+        "product_details": blocks.product_details(state),
+        "creative_strategy": blocks.creative_strategy(state, full=True),
+        "audience_insights": _audience_insights(state)
     }
 
-    # Use json.dumps to format the entire dictionary
-    structured_data_str = json.dumps(inputs_dict, indent=2)
-
-    user_content_string = f"""\
-    ### Ad Campaign Inputs ###
-    {structured_data_str}
-
-    ### Reels Copywriting Guideline ###
-    {yaml.dump(guideline, sort_keys=False)}
-
-    ---
-    Generate the JSON creative strategy based on the above information.
-    """
+    return assemble_messages(script_generation_system_prompt, [
+        guideline_section(state.ad_platform, GuidelineRole.GENERATION, state.creative_direction),
+        block_section("Ad Campaign Inputs", inputs, PromptStability.SEMI_STATIC, member_parts=CONTEXT_MEMBER_PARTS),
+    ], instruction="Generate the JSON ad script based on the above information.", node=node)
 
-    return [
-        SystemMessage(content=script_generation_system_prompt),
-        HumanMessage(content=user_content_string.strip())
-    ]
 
-
-def build_evaluation_message(state: AgentState) -> List[BaseMessage]:
+def build_evaluation_message(state: AgentState, node: str = "script_evaluation_node") -> List[BaseMessage]:
     # Pre-check: Ensure script_draft exists before evaluation
     if not state.script_draft:
         raise ValueError("Script draft is missing for evaluation.")
 
     # Create a list of history entries for JSON serialization
-    history_list = []
-    if state.script_iteration_history:
-        for entry in state.script_iteration_history:
-            history_list.append({
-                "timestamp": entry.get("timestamp", "N/A"),
-                "recommendations_given": entry.get("previous_evaluation_report", {}).get("actionable_recommendations",
-                                                                                         []),
-                "script_produced_key_takeaway": entry.get("output_refined_script", {}).get("key_takeaway"),
-                "script_produced_cta": entry.get("output_refined_script", {}).get("call_to_action_text"),
-                # You can add more refined script details here if needed
-            })
-
-    # Prepare a single, comprehensive dictionary for all inputs
-    evaluation_inputs_dict = {
-        "campaign_brief": {
-            "campaign_goal": state.campaign_goal.value,
-            "ad_platform": state.ad_platform.value,
-            "creative_direction": state.creative_direction.value,
-            "script_tone": state.script_tone.value,
-        },
-        "product_details": {
-            "name": state.product.product_name,
-            "overview": state.product.product_description,
-            "focused_feature": {
-                "name": state.product_feature_focus,
-                "description": state.product.product_features.get(state.product_feature_focus)
-            },
-            "unique_selling_points": state.product.unique_selling_point,
-            "problems_solved": state.product.problems_solved,
-        },
-        "creative_strategy": {
-            "core_message_pillars": state.core_message_pillars,
-            "brainstormed_hooks": state.brainstormed_hooks,
-            "generated_ctas": state.generated_ctas,
-            "emotional_triggers": state.emotional_triggers,
-        },
-        "audience_insights": {
-            "demographic_profile": {
-                "age_range": state.audience_persona.age_range,
-                "gender": state.audience_persona.gender.value,
-                "location": [c.value for c in state.audience_persona.location],
-                "income_range": state.audience_persona.income_range.value,
-                "education_level": state.audience_persona.education_level.value if state.audience_persona.education_level else 'Not specified'
-            },
-            "detailed_insights": state.audience_insight.model_dump()
-        },
-        "script_refinement_history": history_list
+    history_list = [summarize_history_entry(entry) for entry in state.script_iteration_history or []]
+
+    # Prepare a single, comprehensive set of inputs
+    evaluation_inputs = {
+        "campaign_brief": blocks.campaign_brief(state),
+        "product_details": blocks.product_details(state),
+        "creative_strategy": blocks.creative_strategy(state),
+        "audience_insights": _audience_insights(state)
     }
 
-    # Use json.dumps to format the entire dictionary
-    structured_data_str = json.dumps(evaluation_inputs_dict, indent=2)
-
-    # Load the copywriting guidelines
-    guideline = read_yaml_from_parent('copywriting_guideline.yaml')
-
-    # Construct the final user message string
-    user_content_string = f"""\
-### Evaluation Context ###
-{structured_data_str}
-
-### Reels Copywriting Guideline ###
-{yaml.dump(guideline, sort_keys=False)}
-
----
-### Script to Evaluate (Current Version) ###
-Below is the ad script generated or refined for review. Analyze it against all the above context, and the evaluation criteria provided in your system prompt.
-
-```json
-{state.script_draft.model_dump_json(indent=2)}
-"""
-
-    return [
-        SystemMessage(content=script_evaluation_system_prompt),
-        HumanMessage(content=user_content_string.strip())
-    ]
-
-
-def build_script_refinement_message(state: AgentState) -> List[BaseMessage]:
+    # Run-level context before the per-iteration history and draft (see `prompt_layout`)
+    return assemble_messages(script_evaluation_system_prompt, [
+        guideline_section(state.ad_platform, GuidelineRole.EVALUATION, state.creative_direction),
+        block_section("Evaluation Context", evaluation_inputs, PromptStability.SEMI_STATIC,
+                      member_parts=CONTEXT_MEMBER_PARTS),
+        *_lessons_sections(state),
+        history_section("Script Refinement History", "script_refinement_history", history_list),
+        json_section("Script to Evaluate (Current Version)", state.script_draft.model_dump(mode="json"),
+                     PromptStability.VOLATILE, PromptPart.CURRENT_DRAFT),
+    ], instruction="The script above was generated or refined for review. Analyze it against all the above context, "
+                   "and the evaluation criteria provided in your system prompt.", node=node)
+
+
+def build_script_refinement_message(state: AgentState, node: str = "script_refinement_node",
+                                    output_mode: Optional[RefinementOutputMode] = None) -> List[BaseMessage]:
     # Ensure evaluation report exists before proceeding
     if not state.evaluation_report:
         raise ValueError("Evaluation Report is missing. Cannot build refinement message.")
 
     # Create a clean list of history entries for JSON serialization
-    history_list = []
-    if state.script_iteration_history:
-        for entry in state.script_iteration_history:
-            history_list.append(entry)
-
-    # Create a clean demographic profile
-    a = state.audience_persona
-    demographic_profile = {
-        "age_range": a.age_range,
-        "gender": a.gender.value,
-        "location": [c.value for c in a.location],
-        "income_range": a.income_range.value,
-        "education_level": a.education_level.value if a.education_level else 'Not specified'
+    history_list = list(state.script_iteration_history or [])
+
+    # Prepare a single, comprehensive set of inputs
+    refinement_inputs = {
+        "campaign_brief": blocks.campaign_brief(state),
+        "product_details": blocks.product_details(state),
+        "creative_strategy": blocks.creative_strategy(state),
+        "audience_insights": _audience_insights(state)
     }
 
-    # Prepare a single, comprehensive dictionary for all inputs
-    refinement_inputs_dict = {
-        "campaign_brief": {
-            "campaign_goal": state.campaign_goal.value,
-            "ad_platform": state.ad_platform.value,
-            "creative_direction": state.creative_direction.value,
-            "script_tone": state.script_tone.value,
-        },
-        "product_details": {
-            "name": state.product.product_name,
-            "overview": state.product.product_description,
-            "focused_feature": {
-                "name": state.product_feature_focus,
-                "description": state.product.product_features.get(state.product_feature_focus)
-            },
-            "unique_selling_points": state.product.unique_selling_point,
-            "problems_solved": state.product.problems_solved,
-        },
-        "creative_strategy": {
-            "core_message_pillars": state.core_message_pillars,
-            "brainstormed_hooks": state.brainstormed_hooks,
-            "generated_ctas": state.generated_ctas,
-            "emotional_triggers": state.emotional_triggers,
-        },
-        "audience_insights": {
-            "demographic_profile": demographic_profile,
-            "detailed_insights": state.audience_insight.model_dump()
-        },
-        "script_refinement_history": history_list,
+    # Everything that changes per iteration goes last; older history entries are condensed first when over budget
+    iteration_inputs_dict = {
         "current_script_draft": state.script_draft.model_dump(),
         "evaluation_feedback": state.evaluation_report.model_dump()
     }
 
-    # Use json.dumps to format the entire dictionary
-    structured_data_str = json.dumps(refinement_inputs_dict, indent=2)
-
-    # Load the copywriting guidelines
-    guideline = read_yaml_from_parent('copywriting_guideline.yaml')
-
-    # Construct the final user message string
-    user_content_string = f"""\
-### Refinement Context ###
-{structured_data_str}
-
-### Reels Copywriting Guideline ###
-{yaml.dump(guideline, sort_keys=False)}
-
----
-Based on the above context and the specific recommendations in the `evaluation_feedback` field, generate the refined ad script as a JSON object.
-"""
-    return [
-        SystemMessage(content=script_refinement_system_prompt),
-        HumanMessage(content=user_content_string.strip())
-    ]
-
-def build_variation_generation_message(state: AgentState) -> List[BaseMessage]:
+    if (output_mode or config.refinement_output_mode) == RefinementOutputMode.PATCH:
+        system_prompt = script_patch_refinement_system_prompt
+        instruction = ("Based on the above context and the specific recommendations in the `evaluation_feedback` field, "
+                       "return the patches to `current_script_draft` as a JSON object.")
+    else:
+        system_prompt = script_refinement_system_prompt
+        instruction = ("Based on the above context and the specific recommendations in the `evaluation_feedback` field, "
+                       "generate the refined ad script as a JSON object.")
+
+    return assemble_messages(system_prompt, [
+        guideline_section(state.ad_platform, GuidelineRole.REFINEMENT, state.creative_direction),
+        block_section("Refinement Context", refinement_inputs, PromptStability.SEMI_STATIC,
+                      member_parts=CONTEXT_MEMBER_PARTS),
+        *_lessons_sections(state),
+        history_section("Script Refinement History", "script_refinement_history", history_list,
+                        summarize=summarize_history_entry),
+        json_section("Current Draft and Evaluation", iteration_inputs_dict, PromptStability.VOLATILE,
+                     PromptPart.CURRENT_DRAFT, member_parts={"evaluation_feedback": PromptPart.FEEDBACK}),
+    ], instruction=instruction, node=node)
+
+def _variation_focus_sections(state: AgentState) -> List[PromptSection]:
+    if not state.variation_request:
+        return []
+    return [json_section("Variation Focus", state.variation_request.model_dump(mode="json"), PromptStability.VOLATILE,
+                         PromptPart.INSTRUCTION)]
+
+
+def build_variation_generation_message(state: AgentState, node: str = "variation_generation_node") -> List[BaseMessage]:
     # Ensure the script draft has been finalized or approved
     if not state.script_draft:
         raise ValueError("No approved script draft available for variation generation.")
 
-    # Create a clean demographic profile
-    a = state.audience_persona
-    demographic_profile = {
-        "age_range": a.age_range,
-        "gender": a.gender.value,
-        "location": [c.value for c in a.location],
-        "income_range": a.income_range.value,
-        "education_level": a.education_level.value if a.education_level else 'Not specified'
-    }
-
-    # Prepare a single, comprehensive dictionary for all inputs
-    variation_inputs_dict = {
-        "campaign_brief": {
-            "campaign_goal": state.campaign_goal.value,
-            "ad_platform": state.ad_platform.value,
-            "creative_direction": state.creative_direction.value,
-            "script_tone": state.script_tone.value,
-        },
-        "product_details": {
-            "name": state.product.product_name,
-            "overview": state.product.product_description,
-            "focused_feature": {
-                "name": state.product_feature_focus,
-                "description": state.product.product_features.get(state.product_feature_focus)
-            },
-            "unique_selling_points": state.product.unique_selling_point,
-            "problems_solved": state.product.problems_solved,
-        },
-        "audience_insights": {
-            "demographic_profile": demographic_profile,
-            "detailed_insights": state.audience_insight.model_dump()
-        },
-        "approved_base_script": state.script_draft.model_dump(),
+    # Prepare a single, comprehensive set of inputs
+    variation_inputs = {
+        "campaign_brief": blocks.campaign_brief(state),
+        "product_details": blocks.product_details(state),
+        "audience_insights": _audience_insights(state)
     }
 
-    # Use json.dumps to format the entire dictionary
-    structured_data_str = json.dumps(variation_inputs_dict, indent=2)
-
-    user_content_string = f"""\
-### Ad Campaign Context ###
-{structured_data_str}
-
----
-Based on the above approved script, campaign context, and audience insights, generate 3 distinct variants optimized for A/B testing.
-"""
-    return [
-        SystemMessage(content=variation_generation_system_prompt),
-        HumanMessage(content=user_content_string.strip())
-    ]
+    return assemble_messages(variation_generation_system_prompt, [
+        block_section("Ad Campaign Context", variation_inputs, PromptStability.SEMI_STATIC,
+                      member_parts=CONTEXT_MEMBER_PARTS),
+        json_section("Approved Base Script", {"approved_base_script": state.script_draft.model_dump()},
+                     PromptStability.VOLATILE, PromptPart.CURRENT_DRAFT),
+        # Last, so the variants generated in parallel share everything above it
+        *_variation_focus_sections(state),
+    ], instruction="Based on the above approved script, campaign context, and audience insights, "
+                   "generate ONE variant optimized for A/B testing that follows the variation focus.", node=node)
@@ -4,6 +4,7 @@ and validate the presence of the necessary API keys.
 """
 from enum import Enum
 from pathlib import Path
+from typing import Dict, List, Optional
 from pydantic import SecretStr, Field
 from pydantic_settings import BaseSettings
 
@@ -17,6 +18,54 @@ class LogLevel(str, Enum):
     CRITICAL = "CRITICAL"
 
 
+class LLMProvider(str, Enum):
+    """Supported chat model providers"""
+    OPENAI = "openai"
+    GOOGLE = "google"
+    FAKE = "fake"  # local deterministic fake, for CI and benchmarks
+
+
+class FakeLatencyDistribution(str, Enum):
+    """Response latency distributions of the fake provider"""
+    CONSTANT = "constant"
+    UNIFORM = "uniform"
+    NORMAL = "normal"
+    LOGNORMAL = "lognormal"
+
+
+class PromptEncoding(str, Enum):
+    """How structured data is serialized into prompts"""
+    PRETTY = "pretty"  # indented JSON, YAML guideline
+    COMPACT = "compact"  # minified JSON without null fields, guideline as minified JSON
+
+
+class RefinementHistoryMode(str, Enum):
+    """What each script refinement history entry stores about the refined script"""
+    FULL = "full"  # the whole refined script
+    DELTA = "delta"  # only the structural diff from the script it refined (see `src.agent.script_diff`)
+
+
+class RefinementOutputMode(str, Enum):
+    """What the script refiner asks the model to return"""
+    FULL = "full"  # the whole refined script
+    PATCH = "patch"  # targeted field replacements, applied locally to the current draft
+
+
+class CheckpointerBackend(str, Enum):
+    """Where workflow checkpoints are stored"""
+    NONE = "none"  # no checkpoints, a failed run restarts from scratch
+    MEMORY = "memory"  # in-process, lost on restart (development and tests)
+    SQLITE = "sqlite"  # local file, needs `langgraph-checkpoint-sqlite` (tests)
+    MONGODB = "mongodb"  # shared database (production)
+
+
+class ScriptGenerationMode(str, Enum):
+    """How the two configured script generator models are used"""
+    SINGLE = "single"  # only llm1
+    RACE = "race"  # llm1 and llm2 concurrently, the first valid draft wins
+    FALLBACK = "fallback"  # llm2 only when llm1 errors or misses the deadline
+
+
 class LangChainConfig(BaseSettings):
     """
     LangChain Backend Server Configuration
@@ -39,29 +88,196 @@ class LangChainConfig(BaseSettings):
     log_level: LogLevel = Field(description="Logging level")
     log_format: str = Field(description="Log format")
 
+    # LLM client pooling (shared, keep-alive HTTP connections for all nodes)
+    llm_pool_max_connections: int = Field(default=20, ge=1, description="Max open HTTP connections per provider client pool")
+    llm_pool_max_keepalive_connections: int = Field(default=10, ge=0, description="Max idle keep-alive connections kept in the pool")
+    llm_pool_keepalive_expiry: float = Field(default=60.0, gt=0, description="Seconds an idle pooled connection is kept alive")
+    llm_request_timeout: float = Field(default=120.0, gt=0, description="Timeout in seconds for a single LLM HTTP request")
+
+    # LLM rate limiting (per provider/model token buckets; budgets are set per node below)
+    llm_rate_limit_enabled: bool = Field(default=True, description="Throttle LLM calls to the per-node RPM/TPM budgets")
+    llm_max_concurrency: int = Field(default=16, ge=1, description="Max in-flight calls per provider/model (AIMD ceiling)")
+    llm_min_concurrency: int = Field(default=1, ge=1, description="Min in-flight calls per provider/model (AIMD floor)")
+    llm_expected_output_tokens: int = Field(default=1500, ge=0, description="Output tokens reserved per call before usage is known")
+
+    # LLM retries and hedged requests
+    llm_max_retries: int = Field(default=3, ge=0, description="Retries of a provider call after a transient error")
+    llm_retry_base_delay: float = Field(default=1.0, gt=0, description="Base delay in seconds of the jittered exponential backoff")
+    llm_retry_max_delay: float = Field(default=30.0, gt=0, description="Max backoff delay in seconds between retries")
+    llm_hedging_enabled: bool = Field(default=False, description="Fire a duplicate request when a call is slower than usual (opt-in)")
+    llm_hedging_nodes: List[str] = Field(
+        default_factory=lambda: ["script_evaluation_node", "script_refinement_node"],
+        description="Graph nodes whose provider calls are hedged"
+    )
+    llm_hedge_percentile: float = Field(default=0.95, gt=0, lt=1, description="Latency percentile of a node after which a hedge is fired")
+    llm_hedge_min_delay: float = Field(default=1.0, ge=0, description="Min seconds before a hedge is fired")
+    llm_hedge_min_samples: int = Field(default=20, ge=1, description="Latency samples of a node needed before it is hedged")
+    llm_hedge_latency_window: int = Field(default=200, ge=1, description="Recent latencies per node used for the percentile")
+
+    # LLM response cache (content-addressed, memory LRU + on-disk SQLite tier)
+    llm_cache_enabled: bool = Field(default=True, description="Serve identical structured LLM calls from the response cache")
+    llm_cache_max_entries: int = Field(default=256, ge=1, description="Max entries kept in the in-memory LRU tier")
+    llm_cache_ttl_seconds: float = Field(default=86400.0, gt=0, description="Seconds a cached response stays valid")
+    llm_cache_disk_enabled: bool = Field(default=False, description="Persist cached responses in the on-disk tier (opt-in)")
+    llm_cache_disk_path: Path = Field(
+        default=Path(__file__).parent.parent.parent / '.cache' / 'llm_response_cache.sqlite',
+        description="SQLite file of the on-disk cache tier"
+    )
+    llm_cache_disk_max_entries: int = Field(default=5000, ge=1, description="Max entries kept in the on-disk tier")
+    llm_cache_excluded_nodes: List[str] = Field(
+        default_factory=lambda: ["script_candidate_generation_node", "variation_generation_node"],
+        description="Graph nodes whose responses are never served from the response cache (where temperature>0 "
+                    "diversity is wanted); add audience_insight_node, creative_strategy_node and "
+                    "script_generation_node to re-sample them on every retry or resubmission"
+    )
+    llm_single_flight_enabled: bool = Field(
+        default=True, description="Share one in-flight provider call between concurrent identical requests"
+    )
+    llm_single_flight_excluded_nodes: List[str] = Field(
+        default_factory=lambda: ["script_candidate_generation_node", "variation_generation_node"],
+        description="Graph nodes whose concurrent identical requests are deliberate samples (e.g. best-of-N drafts) "
+                    "and are never coalesced"
+    )
+
+    # Audience insight store (persona + product keyed, with near-duplicate persona matching)
+    audience_insight_store_enabled: bool = Field(
+        default=False,
+        description="Reuse stored insights for known personas, including near-duplicates from other campaigns (opt-in)"
+    )
+    audience_insight_store_path: Path = Field(
+        default=Path(__file__).parent.parent.parent / '.cache' / 'audience_insights.sqlite',
+        description="SQLite file of the audience insight store"
+    )
+    audience_insight_similarity_threshold: float = Field(
+        default=0.85, ge=0, le=1,
+        description="Min token-set similarity of lifestyle/pain points/aspiration for a near-duplicate persona"
+    )
+
+    # Prompt serialization
+    prompt_encoding: PromptEncoding = Field(
+        default=PromptEncoding.PRETTY, description="Serialization of structured prompt content (compact cuts input tokens)"
+    )
+    guideline_section_selection: bool = Field(
+        default=False,
+        description="Embed only the copywriting guideline sections tagged for the platform, creative direction and prompt (opt-in)"
+    )
+
+    # Script refinement history
+    refinement_history_mode: RefinementHistoryMode = Field(
+        default=RefinementHistoryMode.FULL,
+        description="Store refined scripts in the history in full or as diffs from the previous draft"
+    )
+    refinement_output_mode: RefinementOutputMode = Field(
+        default=RefinementOutputMode.FULL,
+        description="Have the refiner regenerate the whole script or return patches applied to the current draft"
+    )
+    history_compaction_threshold: int = Field(
+        default=0, ge=0,
+        description="Compact the refinement history once it has more entries than this (0, the default, disables compaction)"
+    )
+    history_keep_full_entries: int = Field(
+        default=1, ge=0, description="Most recent refinement history entries kept in full when the history is compacted"
+    )
+
+    # Prompt token budgets (history entries are summarized, then dropped, oldest first to fit)
+    prompt_token_budgets: Dict[str, int] = Field(
+        default={
+            "script_evaluation_node": 10_000,
+            "script_candidate_evaluation_node": 10_000,
+            "script_refinement_node": 10_000,
+            "variation_evaluation_node": 8_000,
+            "variation_refinement_node": 8_000,
+        },
+        description="Estimated max prompt tokens per graph node; nodes not listed are not budgeted"
+    )
+
+    # Workflow checkpoints (runs resume from the last successful node after a failure)
+    checkpointer_backend: CheckpointerBackend = Field(
+        default=CheckpointerBackend.NONE, description="Checkpoint store of the workflow graphs"
+    )
+    checkpoint_memory_max_threads: int = Field(
+        default=100, ge=1, description="Runs whose checkpoints the `memory` backend keeps; the oldest are evicted first"
+    )
+    checkpoint_sqlite_path: Path = Field(
+        default=Path(__file__).parent.parent.parent / '.cache' / 'checkpoints.sqlite',
+        description="SQLite file of the `sqlite` checkpoint backend"
+    )
+    checkpoint_mongodb_uri: Optional[str] = Field(default=None, description="Connection string of the `mongodb` checkpoint backend")
+    checkpoint_mongodb_db_name: str = Field(default="ad_script_checkpoints", description="Database of the `mongodb` checkpoint backend")
+    checkpoint_ttl_seconds: Optional[int] = Field(
+        default=7 * 86400, ge=1,
+        description="Seconds the `mongodb` backend keeps the checkpoints of an unfinished run (None keeps them); "
+                    "MongoDB only, the other backends ignore it"
+    )
+
+    # Fake LLM provider (selected per node with provider `fake`, or for every node with the override)
+    llm_provider_override: Optional[LLMProvider] = Field(
+        default=None, description="Provider used by every node instead of its own, e.g. `fake` for benchmarks"
+    )
+    fake_llm_seed: int = Field(default=0, description="Seed of the fake provider's payloads, latencies and errors")
+    fake_llm_latency_distribution: FakeLatencyDistribution = Field(
+        default=FakeLatencyDistribution.LOGNORMAL, description="Latency distribution of fake LLM calls"
+    )
+    fake_llm_latency_mean: float = Field(default=1.0, ge=0, description="Mean fake LLM call latency in seconds")
+    fake_llm_latency_stddev: float = Field(default=0.5, ge=0, description="Standard deviation of the fake LLM call latency")
+    fake_llm_output_tokens: int = Field(default=800, ge=1, description="Mean output tokens reported per fake LLM call")
+    fake_llm_error_rate: float = Field(default=0.0, ge=0, le=1, description="Share of fake LLM calls that fail")
+    fake_llm_rate_limit_error_share: float = Field(
+        default=0.5, ge=0, le=1, description="Share of injected fake errors that are 429s (the rest are 503s)"
+    )
+    fake_llm_approval_probability: float = Field(
+        default=0.7, ge=0, le=1, description="Probability that a fake evaluation approves the script"
+    )
+
     # Node1: Audience Insight
+    audience_insight_provider: LLMProvider = Field(default=LLMProvider.GOOGLE, description="LLM provider for audience insight node")
     audience_insight_llm: str = Field(description="LLM name for audience insight node")
     audience_insight_api_key: str = Field(description="API key audience insight LLM")
     audience_insight_temperature: str = Field(description="Temperature for audience insight node")
+    audience_insight_requests_per_minute: int = Field(default=1000, ge=1, description="Requests per minute budget of the audience insight LLM")
+    audience_insight_tokens_per_minute: int = Field(default=1_000_000, ge=1, description="Tokens per minute budget of the audience insight LLM")
 
     # Node2: Creative Strategy
+    creative_strategy_provider: LLMProvider = Field(default=LLMProvider.OPENAI, description="LLM provider for creative strategy node")
     creative_strategy_llm: str = Field(description="LLM name for creative strategy node")
     creative_strategy_api_key: str = Field(description="API key creative strategy LLM")
     creative_strategy_temperature: str = Field(description="Temperature for creative strategy node")
+    creative_strategy_requests_per_minute: int = Field(default=500, ge=1, description="Requests per minute budget of the creative strategy LLM")
+    creative_strategy_tokens_per_minute: int = Field(default=30_000, ge=1, description="Tokens per minute budget of the creative strategy LLM")
 
     # Node3: Script Generation
+    script_generation_provider1: LLMProvider = Field(default=LLMProvider.OPENAI, description="LLM provider for script generation node")
     script_generation_llm1: str = Field(description="LLM name for script generation node")
     script_generation_api_key1: str = Field(description="API key script generation LLM")
     script_generation_temperature1: str = Field(description="Temperature for script generation node")
+    script_generation_requests_per_minute1: int = Field(default=500, ge=1, description="Requests per minute budget of the script generation LLM")
+    script_generation_tokens_per_minute1: int = Field(default=30_000, ge=1, description="Tokens per minute budget of the script generation LLM")
+
+    script_generation_mode: ScriptGenerationMode = Field(default=ScriptGenerationMode.SINGLE, description="Use of the two script generation LLMs")
+    script_generation_fallback_deadline: float = Field(default=90.0, gt=0, description="Seconds before llm2 is started in fallback mode")
+    script_best_of_n: int = Field(default=1, ge=1, description="Drafts generated in parallel before the refinement loop (1 disables best-of-N)")
+    script_best_of_n_temperatures: List[float] = Field(
+        default_factory=list,
+        description="Temperatures cycled across best-of-N drafts; empty uses each generator's configured temperature"
+    )
+    variation_count: int = Field(
+        default=3, ge=1, le=3, description="A/B test variants generated and refined in parallel, each with its own focus"
+    )
 
+    script_generation_provider2: LLMProvider = Field(default=LLMProvider.OPENAI, description="LLM provider for script generation node")
     script_generation_llm2: str = Field(description="LLM name for script generation node")
     script_generation_api_key2: str = Field(description="API key script generation LLM")
     script_generation_temperature2: str = Field(description="Temperature for script generation node")
+    script_generation_requests_per_minute2: int = Field(default=500, ge=1, description="Requests per minute budget of the script generation LLM")
+    script_generation_tokens_per_minute2: int = Field(default=30_000, ge=1, description="Tokens per minute budget of the script generation LLM")
 
     # Node4: Script Evaluation
+    script_evaluation_and_refinement_provider: LLMProvider = Field(default=LLMProvider.OPENAI, description="LLM provider for script evaluation node")
     script_evaluation_and_refinement_llm: str = Field(description="LLM name for script evaluation node")
     script_evaluation_and_refinement_api_key: str = Field(description="API key script evaluation LLM")
     script_evaluation_and_refinement_temperature: str = Field(description="Temperature for script evaluation node")
+    script_evaluation_and_refinement_requests_per_minute: int = Field(default=500, ge=1, description="Requests per minute budget of the script evaluation LLM")
+    script_evaluation_and_refinement_tokens_per_minute: int = Field(default=30_000, ge=1, description="Tokens per minute budget of the script evaluation LLM")
 
 
     def is_production(self) -> bool:
@@ -86,4 +302,5 @@ except Exception as e:
 
 
 # Export config instance
-__all__ = ['config', 'LangChainConfig']
+__all__ = ['config', 'LangChainConfig', 'LLMProvider', 'FakeLatencyDistribution', 'PromptEncoding',
+           'ScriptGenerationMode', 'RefinementHistoryMode', 'RefinementOutputMode', 'CheckpointerBackend']
@@ -1,5 +1,29 @@
 import streamlit as st
-from src.agent.state import VideoScriptDraft, StaticAdDraft, EvaluationReport
+from typing import List
+from src.agent.state import VideoScriptDraft, StaticAdDraft, EvaluationReport, Scene, RefinementLessons
+from src.agent.script_diff import describe_diff, entry_evaluation
+
+
+def display_scene(scene: Scene):
+    """Display a single video scene."""
+    with st.expander(f"Scene {scene.scene_number} ({scene.duration_seconds}s)", expanded=True):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("**Visual Description:**")
+            st.write(scene.visual_description)
+
+            if scene.on_screen_text:
+                st.markdown("**On-Screen Text:**")
+                st.info(scene.on_screen_text)
+
+        with col2:
+            st.markdown("**Audio Description:**")
+            st.write(scene.audio_description)
+
+            if scene.voiceover_dialogue:
+                st.markdown("**Voiceover/Dialogue:**")
+                st.write(scene.voiceover_dialogue)
 
 
 def display_video_script(script: VideoScriptDraft):
@@ -20,24 +44,7 @@ def display_video_script(script: VideoScriptDraft):
     # Scenes
     st.subheader("🎬 Scenes")
     for scene in script.scenes:
-        with st.expander(f"Scene {scene.scene_number} ({scene.duration_seconds}s)", expanded=True):
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.markdown("**Visual Description:**")
-                st.write(scene.visual_description)
-
-                if scene.on_screen_text:
-                    st.markdown("**On-Screen Text:**")
-                    st.info(scene.on_screen_text)
-
-            with col2:
-                st.markdown("**Audio Description:**")
-                st.write(scene.audio_description)
-
-                if scene.voiceover_dialogue:
-                    st.markdown("**Voiceover/Dialogue:**")
-                    st.write(scene.voiceover_dialogue)
+        display_scene(scene)
 
     # CTA and hashtags
     st.markdown("---")
@@ -57,6 +64,14 @@ def display_video_script(script: VideoScriptDraft):
     st.info(script.key_takeaway)
 
 
+def display_streaming_video_scenes(scenes: List[Scene]):
+    """Display the scenes of a video script that is still being generated."""
+    st.subheader("🎬 Scenes")
+    for scene in scenes:
+        display_scene(scene)
+    st.caption(f"✍️ {len(scenes)} scene(s) written so far, more on the way...")
+
+
 def display_static_script(script: StaticAdDraft):
     """Display a static ad script in a formatted way."""
     st.subheader("📱 Static Ad Script")
@@ -154,21 +169,51 @@ def display_evaluation_scores(evaluation: EvaluationReport):
             st.write(f"{i}. {rec}")
 
 
-def display_iteration_history(history):
-    """Display script iteration history."""
-    if not history:
+def display_refinement_lessons(lessons):
+    """Display lessons from refinement iterations compacted out of the history."""
+    if not lessons:
+        return
+
+    with st.expander(f"Earlier Iterations ({lessons.compacted_iterations} condensed)"):
+        trajectory = " → ".join(f"{score:.1f}" for score in lessons.overall_score_trajectory)
+        st.write(f"**Score Trajectory:** {trajectory or 'N/A'}")
+
+        if lessons.criterion_score_deltas:
+            st.write("**Score Changes:** " + ", ".join(
+                f"{criterion.replace('_', ' ').title()} {delta:+d}" for criterion, delta in lessons.criterion_score_deltas.items()
+            ))
+
+        if lessons.recommendations_given:
+            st.write("**Recommendations Implemented:**")
+            for rec in lessons.recommendations_given:
+                st.write(f"• {rec}")
+
+
+def display_iteration_history(history, lessons=None):
+    """Display script iteration history, preceded by the lessons of compacted iterations."""
+    if not history and not lessons:
         st.info("No iteration history available.")
         return
 
     st.subheader("🔄 Refinement History")
 
-    for i, entry in enumerate(history):
-        with st.expander(f"Iteration {i + 1} - {entry.get('timestamp', 'Unknown time')}"):
-            if 'previous_evaluation_report' in entry:
-                prev_eval = entry['previous_evaluation_report']
-                st.write(f"**Previous Score:** {prev_eval.get('overall_score', 'N/A')}/5.0")
+    if isinstance(lessons, dict):
+        lessons = RefinementLessons.model_validate(lessons)
+    display_refinement_lessons(lessons)
+    first_iteration = lessons.compacted_iterations + 1 if lessons else 1
 
-                if 'actionable_recommendations' in prev_eval:
+    for i, entry in enumerate(history or [], start=first_iteration):
+        with st.expander(f"Iteration {i} - {entry.get('timestamp', 'Unknown time')}"):
+            if 'previous_evaluation_report' in entry or 'previous_evaluation_delta' in entry:
+                prev_eval = entry_evaluation(entry)
+                st.write(f"**Previous Score:** {prev_eval['overall_score'] or 'N/A'}/5.0")
+
+                if prev_eval['recommendations']:
                     st.write("**Recommendations Implemented:**")
-                    for rec in prev_eval['actionable_recommendations']:
+                    for rec in prev_eval['recommendations']:
                         st.write(f"• {rec}")
+
+            if 'output_script_diff' in entry:
+                changes = describe_diff(entry['output_script_diff'])
+                st.write("**Changes Made:**")
+                st.write(", ".join(changes) if changes else "No changes")
@@ -0,0 +1,29 @@
+"""
+Test setup: settings come from `.env.example` (real keys are never needed), and
+every on-disk store points at a temporary directory.
+"""
+# Import libraries
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+from dotenv import dotenv_values
+
+ROOT = Path(__file__).parent.parent
+_tmp = Path(tempfile.mkdtemp(prefix="ad_script_tests_"))
+
+for key, value in dotenv_values(ROOT / ".env.example").items():
+    os.environ.setdefault(key, value)
+os.environ["LLM_CACHE_DISK_PATH"] = str(_tmp / "llm_response_cache.sqlite")
+os.environ["AUDIENCE_INSIGHT_STORE_PATH"] = str(_tmp / "audience_insights.sqlite")
+os.environ["CHECKPOINT_SQLITE_PATH"] = str(_tmp / "checkpoints.sqlite")
+os.environ["LLM_PROVIDER_OVERRIDE"] = "fake"
+
+
+@pytest.fixture
+def fake_llm():
+    """Every node on the fake provider with no latency; drafts are never approved, so every loop runs in full."""
+    from benchmarks.fake_llm import use_fake_llm
+
+    use_fake_llm(0.0, approval_probability=0.0)
@@ -0,0 +1,108 @@
+# Import libraries
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.config.config import config, LLMProvider
+from src.agent.llm.registry import NodeLLMSettings
+from src.agent.llm.cache import (
+    CachedResponse, InMemoryLRUCache, ResponseCache, SQLiteResponseCache, response_cache_key
+)
+from src.agent.state import AudienceInsight
+from benchmarks.samples import sample_processed_state
+
+
+def _response(key: str, age: float = 0.0) -> CachedResponse:
+    return CachedResponse(payload=f'{{"key": "{key}"}}', total_tokens=10, created_at=time.time() - age)
+
+
+@pytest.fixture
+def insight():
+    return sample_processed_state(refinements=0).audience_insight
+
+
+@pytest.fixture
+def cache(tmp_path):
+    settings = config.model_copy(update={
+        "llm_cache_enabled": True,
+        "llm_cache_disk_enabled": True,
+        "llm_cache_disk_path": tmp_path / "responses.sqlite",
+    })
+    return ResponseCache(settings)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    memory = InMemoryLRUCache(max_entries=2, ttl_seconds=60)
+    memory.set("a", _response("a"))
+    memory.set("b", _response("b"))
+    assert memory.get("a") is not None  # "b" is now the least recently used
+
+    memory.set("c", _response("c"))
+    assert memory.get("b") is None
+    assert memory.get("a") is not None and memory.get("c") is not None
+
+
+def test_memory_tier_expires_entries():
+    memory = InMemoryLRUCache(max_entries=2, ttl_seconds=60)
+    memory.set("old", _response("old", age=120))
+    memory.set("new", _response("new"))
+
+    assert memory.get("old") is None
+    assert memory.get("new") is not None
+
+
+def test_disk_tier_evicts_expired_then_least_recently_used(tmp_path):
+    disk = SQLiteResponseCache(tmp_path / "responses.sqlite", max_entries=2, ttl_seconds=60)
+    disk.set("old", _response("old", age=120))
+    assert disk.get("old") is None
+
+    disk.set("a", _response("a"))
+    disk.set("b", _response("b"))
+    time.sleep(0.01)
+    assert disk.get("a") is not None  # "b" is now the least recently used
+
+    disk.set("c", _response("c"))
+    assert disk.get("b") is None
+    assert disk.get("a").payload == '{"key": "a"}'
+    assert disk.get("c") is not None
+
+
+def test_disk_hit_is_promoted_to_memory(cache, insight):
+    cache.store("key", insight, total_tokens=42)
+    cache.memory.clear()
+
+    assert cache.lookup("key", AudienceInsight) == (insight, 42)
+    assert cache.memory.get("key") is not None
+    assert cache.lookup("key", AudienceInsight) == (insight, 42)
+    assert cache.lookup("other", AudienceInsight) is None
+
+    stats = cache.stats()
+    assert (stats.disk_hits, stats.memory_hits, stats.misses, stats.tokens_saved) == (1, 1, 1, 84)
+
+
+def test_key_depends_on_temperature_and_messages():
+    settings = NodeLLMSettings(provider=LLMProvider.FAKE, model="fake", api_key="key", temperature=0.3,
+                               requests_per_minute=60, tokens_per_minute=100_000)
+    messages = [SystemMessage(content="system"), HumanMessage(content="human")]
+    key = response_cache_key(settings, AudienceInsight, messages)
+
+    assert response_cache_key(settings, AudienceInsight, list(messages)) == key
+    assert response_cache_key(settings.model_copy(update={"temperature": 0.8}), AudienceInsight, messages) != key
+    assert response_cache_key(settings, AudienceInsight, messages[:1] + [HumanMessage(content="other")]) != key
+
+
+def test_defaults_keep_disk_off_and_cache_retried_nodes():
+    fields = type(config).model_fields
+    assert fields["llm_cache_disk_enabled"].default is False
+    assert ResponseCache(config).disk is None
+
+    cache = ResponseCache(config.model_copy(update={
+        "llm_cache_enabled": True, "llm_cache_excluded_nodes": fields["llm_cache_excluded_nodes"].default_factory(),
+    }))
+    # "Try Again" re-runs these with the same input
+    for node in ("audience_insight_node", "creative_strategy_node", "script_generation_node", "script_evaluation_node"):
+        assert cache.is_enabled_for(node)
+    # Best-of-N and variation drafts are meant to differ
+    for node in ("script_candidate_generation_node", "variation_generation_node"):
+        assert not cache.is_enabled_for(node)
@@ -0,0 +1,45 @@
+# Import libraries
+import pytest
+
+from src.agent import graph as workflow
+from src.agent.checkpointing import BoundedInMemorySaver, new_thread_id, pending_nodes, run_workflow
+from benchmarks.samples import sample_agent_state
+
+
+def test_memory_checkpointer_evicts_the_oldest_runs(fake_llm):
+    checkpointer = BoundedInMemorySaver(max_threads=2)
+    graph = workflow.build_pre_review_graph(checkpointer=checkpointer)
+    threads = [new_thread_id() for _ in range(3)]
+
+    for thread_id in threads:
+        graph.invoke(sample_agent_state(), config={"configurable": {"thread_id": thread_id}})
+
+    assert set(checkpointer.storage) == set(threads[1:])
+    assert all(key[0] in threads[1:] for key in checkpointer.blobs)
+
+
+def test_failed_run_resumes_from_the_failed_node(fake_llm, monkeypatch):
+    refinements = {"calls": 0}
+    refine = workflow.script_refinement_node
+
+    def flaky_refinement(state):
+        refinements["calls"] += 1
+        if refinements["calls"] == 2:
+            raise RuntimeError("transient")
+        return refine(state)
+
+    monkeypatch.setattr(workflow, "script_refinement_node", flaky_refinement)
+    checkpointer = BoundedInMemorySaver(max_threads=10)
+    graph = workflow.build_pre_review_graph(checkpointer=checkpointer)
+    thread_id = new_thread_id()
+
+    with pytest.raises(RuntimeError):
+        run_workflow(graph, sample_agent_state(), thread_id)
+    assert pending_nodes(graph, thread_id) == ("script_refinement_node",)
+
+    result = run_workflow(graph, sample_agent_state(), thread_id)
+
+    # Only the failed refinement is retried; earlier nodes are not rerun
+    assert result.llm_call_stats.node_usage["audience_insight_node"].calls == 1
+    assert result.iteration_count == workflow.MAX_REFINEMENT_ITERATIONS
+    assert thread_id not in checkpointer.storage
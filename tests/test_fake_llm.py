@@ -0,0 +1,32 @@
+# Import libraries
+from langchain_core.messages import HumanMessage
+
+from src.agent.llm import fake
+from src.agent.llm.fake import FakeChatModel
+
+
+def _draws(model: FakeChatModel, prompt: str, calls: int = 1):
+    return [model._rng([HumanMessage(content=prompt)], None).random() for _ in range(calls)]
+
+
+def test_repeated_prompts_replay_the_same_sequence():
+    first, second = FakeChatModel(seed=1), FakeChatModel(seed=1)
+
+    draws = _draws(first, "prompt", calls=3)
+    assert len(set(draws)) == 3
+    assert _draws(second, "prompt", calls=3) == draws
+
+
+def test_call_counter_is_bounded(monkeypatch):
+    monkeypatch.setattr(fake, "CALL_COUNTER_MAX_ENTRIES", 2)
+    model, reference = FakeChatModel(), FakeChatModel()
+    first_draw, second_draw = _draws(reference, "a", calls=2)
+
+    assert _draws(model, "a") == [first_draw]
+    _draws(model, "b")
+    assert _draws(model, "a") == [second_draw]  # recently used, so "b" is the oldest entry now
+    _draws(model, "c")
+
+    assert len(model._calls) == 2
+    _draws(model, "d")
+    assert _draws(model, "a") == [first_draw]  # evicted, so its sequence starts over
@@ -0,0 +1,126 @@
+# Import libraries
+import time
+import threading
+from concurrent.futures import Future
+
+from langchain_core.messages import HumanMessage
+
+from src.config.config import config
+from src.agent.llm import invoke
+from src.agent.state import EvaluationReport, NodeTokenUsage
+from src.agent.llm.tokens import estimate_message_tokens
+from src.agent.llm.resilience import hedged_call
+from src.agent.llm.invoke import LLMCallResult, get_late_loser_usage, race_structured, token_accounting
+from benchmarks.samples import sample_agent_state
+
+NODE = "script_evaluation_node"
+
+
+def _running_future() -> Future:
+    future = Future()
+    future.set_running_or_notify_cancel()
+    return future
+
+
+def _hedge_usage(loser_result) -> LLMCallResult:
+    (_, _, tokens), retries = loser_result
+    return LLMCallResult(response=None, node=NODE, total_tokens=tokens, wasted_tokens=tokens, retries=retries)
+
+
+def _hedged_result(loser: Future) -> LLMCallResult:
+    estimate = LLMCallResult(response=None, node=NODE, total_tokens=100, wasted_tokens=100)
+    loser_id = get_late_loser_usage().watch(loser, estimate, _hedge_usage)
+    return LLMCallResult(response=None, node=NODE, total_tokens=150, hedged=True, wasted_tokens=100,
+                         pending_losers=[loser_id])
+
+
+def test_running_loser_is_returned_for_late_accounting():
+    calls = []
+    release = threading.Event()
+
+    def call():
+        calls.append(None)
+        if len(calls) == 1:
+            release.wait(5)
+            return "primary"
+        return "hedge"
+
+    outcome = hedged_call(call, delay=0.05)
+    assert (outcome.result, outcome.hedged, outcome.hedge_won) == ("hedge", True, True)
+    assert outcome.loser_result is None and not outcome.loser_future.done()
+
+    release.set()
+    assert outcome.loser_future.result(timeout=5) == "primary"
+
+
+def test_fast_call_is_not_hedged():
+    outcome = hedged_call(lambda: "primary", delay=1.0)
+    assert (outcome.result, outcome.hedged, outcome.loser_future) == ("primary", False, None)
+
+
+def test_loser_usage_replaces_the_estimate_once_it_finishes():
+    loser = _running_future()
+    state = sample_agent_state()
+    state = state.model_copy(update=token_accounting(state, _hedged_result(loser)))
+
+    assert state.total_llm_tokens == 150
+    assert len(state.llm_call_stats.pending_losers) == 1
+
+    # Still running: nothing to settle yet
+    state = state.model_copy(update=token_accounting(state))
+    assert state.total_llm_tokens == 150 and len(state.llm_call_stats.pending_losers) == 1
+
+    loser.set_result(((None, None, 130), 1))
+    state = state.model_copy(update=token_accounting(state))
+    stats = state.llm_call_stats
+    assert state.total_llm_tokens == 180
+    assert (stats.hedge_wasted_tokens, stats.retries, stats.pending_losers) == (130, 1, [])
+
+
+def test_failed_loser_keeps_the_estimate():
+    loser = _running_future()
+    state = sample_agent_state()
+    state = state.model_copy(update=token_accounting(state, _hedged_result(loser)))
+
+    loser.set_exception(TimeoutError("read timeout"))
+    state = state.model_copy(update=token_accounting(state))
+    assert state.total_llm_tokens == 150
+    assert (state.llm_call_stats.hedge_wasted_tokens, state.llm_call_stats.pending_losers) == (100, [])
+
+
+def test_raced_loser_still_running_is_reconciled_with_its_usage(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def call(node, role, schema, messages):
+        if role == "slow":
+            started.set()
+            release.wait(5)
+        else:
+            started.wait(5)
+        tokens = 40 if role == "fast" else 70
+        return LLMCallResult(response=role, node=node, total_tokens=tokens,
+                             usage=NodeTokenUsage(calls=1, input_tokens=tokens - 10, output_tokens=10))
+
+    monkeypatch.setattr(invoke, "invoke_structured", call)
+    messages = [HumanMessage(content="Rate this script")]
+    result = race_structured(NODE, ["fast", "slow"], EvaluationReport, messages)
+    assert result.response == "fast"
+    assert result.total_tokens == 40 + estimate_message_tokens(messages)
+
+    state = sample_agent_state()
+    state = state.model_copy(update=token_accounting(state, result))
+    assert len(state.llm_call_stats.pending_losers) == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while state.llm_call_stats.pending_losers and time.monotonic() < deadline:
+        time.sleep(0.01)
+        state = state.model_copy(update=token_accounting(state))
+
+    assert state.total_llm_tokens == 110
+    assert state.llm_call_stats.pending_losers == []
+    assert state.llm_call_stats.node_usage[NODE] == NodeTokenUsage(calls=2, input_tokens=90, output_tokens=20)
+
+
+def test_hedging_is_opt_in():
+    assert type(config).model_fields["llm_hedging_enabled"].default is False
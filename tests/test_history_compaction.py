@@ -0,0 +1,62 @@
+# Import libraries
+from src.config.config import config
+from src.agent.state import RefinementLessons
+from src.agent.nodes.history_compaction import (
+    MAX_LESSON_RECOMMENDATIONS, compact_history, history_compaction_node
+)
+from benchmarks.samples import sample_processed_state
+
+
+def test_compaction_folds_older_entries_into_lessons():
+    history = sample_processed_state(refinements=3).script_iteration_history
+    reports = [entry["previous_evaluation_report"] for entry in history]
+
+    kept, lessons = compact_history(history, None, keep=1)
+
+    assert kept == history[-1:]
+    assert lessons.compacted_iterations == 2
+    assert lessons.overall_score_trajectory == [report["overall_score"] for report in reports[:2]]
+    for criterion, scores in lessons.criterion_score_trajectory.items():
+        assert scores == [report["detailed_scores"][criterion]["score"] for report in reports[:2]]
+    for recommendation in reports[0]["actionable_recommendations"] + reports[1]["actionable_recommendations"]:
+        assert recommendation in lessons.recommendations_given
+
+
+def test_compaction_extends_earlier_lessons():
+    history = sample_processed_state(refinements=2).script_iteration_history
+    earlier = RefinementLessons(
+        compacted_iterations=3,
+        overall_score_trajectory=[5.0],
+        recommendations_given=[f"recommendation {i}" for i in range(MAX_LESSON_RECOMMENDATIONS)],
+    )
+
+    kept, lessons = compact_history(history, earlier, keep=0)
+
+    assert kept == []
+    assert lessons.compacted_iterations == 5
+    assert lessons.overall_score_trajectory[0] == 5.0 and len(lessons.overall_score_trajectory) == 3
+    assert len(lessons.recommendations_given) == MAX_LESSON_RECOMMENDATIONS
+    assert lessons.recommendations_given[-1] == history[-1]["previous_evaluation_report"]["actionable_recommendations"][-1]
+
+
+def test_node_compacts_only_beyond_threshold(monkeypatch):
+    monkeypatch.setattr(config, "history_compaction_threshold", 2)
+    monkeypatch.setattr(config, "history_keep_full_entries", 1)
+
+    state = sample_processed_state(refinements=2)
+    assert history_compaction_node(state) is state
+
+    state = sample_processed_state(refinements=3)
+    history = list(state.script_iteration_history)
+    compacted = history_compaction_node(state)
+
+    assert compacted.script_iteration_history == history[-1:]
+    assert compacted.refinement_lessons.compacted_iterations == 2
+    assert state.script_iteration_history == history and state.refinement_lessons is None
+
+
+def test_compaction_is_opt_in():
+    assert type(config).model_fields["history_compaction_threshold"].default == 0
+
+    state = sample_processed_state(refinements=5)
+    assert history_compaction_node(state) is state
@@ -0,0 +1,57 @@
+# Import libraries
+import sqlite3
+
+import pytest
+
+from src.config.config import config
+from src.agent.insight_store import AudienceInsightStore, lookup_audience_insight
+from benchmarks.samples import sample_audience_persona, sample_product, sample_processed_state
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AudienceInsightStore(tmp_path / "insights.sqlite", similarity_threshold=0.85)
+
+
+@pytest.fixture
+def insight():
+    return sample_processed_state(refinements=0).audience_insight
+
+
+def test_exact_and_reformatted_personas_hit(store, insight):
+    persona, product = sample_audience_persona(), sample_product()
+    assert store.find(persona, product) is None
+
+    store.save(persona, product, insight)
+    reformatted = persona.model_copy(update={"lifestyle": [item.upper() for item in reversed(persona.lifestyle)]})
+
+    assert store.find(persona, product) == (insight, 1.0)
+    assert store.find(reformatted, product) == (insight, 1.0)
+
+
+def test_near_duplicate_hits_and_different_persona_misses(store, insight):
+    persona, product = sample_audience_persona(), sample_product()
+    store.save(persona, product, insight)
+
+    near = persona.model_copy(update={"pain_points": persona.pain_points + ["weekends"]})
+    found = store.find(near, product)
+    assert found is not None and found[0] == insight and 0.85 <= found[1] < 1.0
+
+    other = persona.model_copy(update={"pain_points": ["no time to exercise", "expensive gyms"]})
+    assert store.find(other, product) is None
+
+
+def test_stale_row_is_a_miss_and_is_deleted(store, insight):
+    persona, product = sample_audience_persona(), sample_product()
+    store.save(persona, product, insight)
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("UPDATE audience_insights SET insight = ?", ('{"an_old_schema": true}',))
+
+    assert store.find(persona, product) is None
+    with sqlite3.connect(store.path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM audience_insights").fetchone()[0] == 0
+
+
+def test_store_is_opt_in(insight):
+    assert type(config).model_fields["audience_insight_store_enabled"].default is False
+    assert lookup_audience_insight(sample_audience_persona(), sample_product()) is None
@@ -0,0 +1,84 @@
+# Import libraries
+import json
+import random
+
+import pytest
+
+from src.agent.state import VideoScriptDraft
+from src.agent.llm.fake import fake_payload
+from src.agent.partial_json import VideoScriptStreamParser
+
+
+@pytest.fixture
+def script():
+    draft = VideoScriptDraft.model_validate(fake_payload(VideoScriptDraft, random.Random(0)))
+    scenes = [scene.model_copy(update={"scene_number": number}) for number, scene in enumerate(draft.scenes or [], start=1)]
+    while len(scenes) < 3:
+        scenes.append(scenes[-1].model_copy(update={"scene_number": len(scenes) + 1}))
+    # Brackets, quotes and a decoy "scenes" key inside strings must not confuse the parser
+    scenes[0] = scenes[0].model_copy(update={"on_screen_text": 'Say "hi" {not json} [1, 2] \\ done'})
+    return draft.model_copy(update={"scenes": scenes, "key_takeaway": '"scenes": [{"scene_number": 9}]'})
+
+
+def _chunks(text: str, rng: random.Random):
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 12)
+        yield text[position:position + size]
+        position += size
+
+
+def test_scenes_are_emitted_as_soon_as_they_close(script):
+    text = script.model_dump_json(indent=2)
+    parser = VideoScriptStreamParser()
+    emitted_at = []
+
+    for index, char in enumerate(text):
+        for scene in parser.feed(char):
+            emitted_at.append(index)
+            assert scene == script.scenes[len(emitted_at) - 1]
+
+    assert len(emitted_at) == len(script.scenes)
+    for number, index in enumerate(emitted_at, start=1):
+        # The closing brace of the scene, before anything of the next one arrives
+        assert text[index] == "}" and f'"scene_number": {number + 1}' not in text[:index + 1]
+    assert not parser.malformed
+    assert parser.finish_script() == script
+
+
+def test_any_chunking_gives_the_same_scenes(script):
+    text = script.model_dump_json()
+    for seed in range(5):
+        parser = VideoScriptStreamParser()
+        emitted = [scene for chunk in _chunks(text, random.Random(seed)) for scene in parser.feed(chunk)]
+        assert emitted == script.scenes
+        assert parser.items == script.scenes
+
+
+def test_invalid_scene_stops_emitting_and_finish_rejects_it(script):
+    data = script.model_dump()
+    del data["scenes"][1]["visual_description"]
+    parser = VideoScriptStreamParser()
+
+    emitted = parser.feed(json.dumps(data))
+
+    assert emitted == script.scenes[:1]
+    assert parser.malformed
+    assert parser.feed("ignored") == []
+    assert parser.finish_script() is None
+
+
+def test_unbalanced_document_is_malformed():
+    parser = VideoScriptStreamParser()
+    parser.feed('{"scenes": []}}')
+    assert parser.malformed
+
+
+def test_finish_ignores_text_around_the_document(script):
+    parser = VideoScriptStreamParser()
+    parser.feed("```json\n" + script.model_dump_json() + "\n```")
+    assert parser.finish_script() == script
+
+    empty = VideoScriptStreamParser()
+    empty.feed("no json here")
+    assert empty.finish_script() is None
@@ -0,0 +1,126 @@
+# Import libraries
+import time
+import asyncio
+import threading
+
+import pytest
+
+from src.agent.llm.rate_limit import ProviderRateLimiter, is_rate_limit_error
+
+
+class _ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _limiter(requests_per_minute: int = 60_000, tokens_per_minute: int = 6_000,
+             max_concurrency: int = 8) -> ProviderRateLimiter:
+    return ProviderRateLimiter(requests_per_minute, tokens_per_minute, min_concurrency=1, max_concurrency=max_concurrency)
+
+
+def _use(limiter: ProviderRateLimiter, reserved: int, actual: int) -> None:
+    permit = limiter.acquire(reserved)
+    permit.actual_tokens = actual
+    limiter.release(permit)
+
+
+def test_token_budget_throttles_until_refilled():
+    limiter = _limiter(tokens_per_minute=6_000)  # refills 100 tokens per second
+    _use(limiter, 6_000, 6_000)
+
+    permit = limiter.acquire(30)
+    assert permit.waited_seconds >= 0.2
+    assert limiter.stats().throttled == 1
+
+
+def test_over_estimate_is_refunded():
+    limiter = _limiter(tokens_per_minute=6_000)
+    _use(limiter, 6_000, 1_000)
+
+    assert limiter.acquire(5_000).waited_seconds < 0.01
+
+
+def test_request_budget_throttles():
+    limiter = _limiter(requests_per_minute=60)  # refills 1 request per second
+    for _ in range(60):
+        _use(limiter, 0, 0)
+
+    assert limiter.acquire(0).waited_seconds >= 0.5
+
+
+def test_prompt_larger_than_budget_still_goes_through():
+    limiter = _limiter(tokens_per_minute=6_000)
+    assert limiter.acquire(1_000_000).reserved_tokens == 6_000
+
+
+def test_aimd_window_halves_on_429_and_grows_additively():
+    limiter = _limiter(max_concurrency=8)
+    for expected in (4, 2, 1, 1):
+        limiter.release(limiter.acquire(0), rate_limited=True)
+        assert limiter.stats().concurrency_limit == expected
+
+    limiter.release(limiter.acquire(0))
+    assert limiter.stats().concurrency_limit == 2
+    limiter.release(limiter.acquire(0))
+    assert limiter.stats().concurrency_limit == 2.5
+
+
+def test_full_window_blocks_until_a_slot_is_released():
+    limiter = _limiter(max_concurrency=1)
+    first = limiter.acquire(0)
+    acquired = threading.Event()
+
+    def second():
+        limiter.release(limiter.acquire(0))
+        acquired.set()
+
+    threading.Thread(target=second).start()
+    assert not acquired.wait(0.1)
+    limiter.release(first)
+    assert acquired.wait(2)
+
+
+def test_slot_shrinks_the_window_on_a_rate_limit_error():
+    limiter = _limiter(max_concurrency=8)
+    with pytest.raises(_ProviderError):
+        with limiter.slot(0):
+            raise _ProviderError(429)
+
+    stats = limiter.stats()
+    assert (stats.rate_limited, stats.in_flight, stats.concurrency_limit) == (1, 0, 4)
+
+    with pytest.raises(_ProviderError):
+        with limiter.slot(0):
+            raise _ProviderError(500)
+    assert limiter.stats().rate_limited == 1
+
+
+def test_async_slot_waits_without_blocking_the_loop():
+    limiter = _limiter(max_concurrency=1)
+
+    async def main():
+        order = []
+
+        async def call(name):
+            async with limiter.aslot(0):
+                order.append(name)
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(call("a"), call("b"))
+        return order
+
+    started_at = time.monotonic()
+    assert asyncio.run(main()) == ["a", "b"]
+    assert time.monotonic() - started_at >= 0.1
+    assert limiter.stats().in_flight == 0
+
+
+def test_rate_limit_error_detection():
+    assert is_rate_limit_error(_ProviderError(429))
+    assert not is_rate_limit_error(_ProviderError(500))
+    assert is_rate_limit_error(RuntimeError("429 RESOURCE_EXHAUSTED: quota exceeded"))
+
+    wrapped = ValueError("structured output failed")
+    wrapped.__cause__ = _ProviderError(429)
+    assert is_rate_limit_error(wrapped)
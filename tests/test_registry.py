@@ -0,0 +1,49 @@
+# Import libraries
+import asyncio
+
+from src.config.config import config, LLMProvider
+from src.agent.llm.registry import LLMClientRegistry
+
+
+def _openai_registry() -> LLMClientRegistry:
+    return LLMClientRegistry(config.model_copy(update={"llm_provider_override": LLMProvider.OPENAI}))
+
+
+def test_sync_callers_share_one_client():
+    registry = _openai_registry()
+    assert registry.get_client("creative_strategy") is registry.get_client("creative_strategy")
+    registry.clear()
+    assert registry._http_client is None
+
+
+def test_each_event_loop_gets_its_own_async_pool():
+    registry = _openai_registry()
+
+    async def client_and_pool():
+        client = registry.get_client("creative_strategy")
+        assert registry.get_client("creative_strategy") is client
+        return client, registry._http_async_clients[asyncio.get_running_loop()]
+
+    first_client, first_pool = asyncio.run(client_and_pool())
+    second_client, second_pool = asyncio.run(client_and_pool())
+
+    assert first_client is not second_client
+    assert first_pool is not second_pool
+    registry.clear()
+
+
+def test_clear_closes_async_pools_of_live_loops():
+    registry = _openai_registry()
+    loop = asyncio.new_event_loop()
+    try:
+        async def pool():
+            registry.get_client("creative_strategy")
+            return registry._http_async_clients[asyncio.get_running_loop()]
+
+        async_pool = loop.run_until_complete(pool())
+        registry.clear()
+
+        assert async_pool.is_closed
+        assert len(registry._http_async_clients) == 0
+    finally:
+        loop.close()
@@ -0,0 +1,123 @@
+# Import libraries
+import random
+
+import pytest
+
+from src.agent.state import EvaluationReport, Scene, ScriptPatch, ScriptPatchSet, StaticAdDraft, VideoScriptDraft
+from src.agent.llm.fake import fake_payload
+from src.agent.script_diff import (
+    ScriptPatchError, apply_script_diff, apply_script_patches, diff_scripts, entry_evaluation, evaluation_delta
+)
+from src.agent.nodes.history_compaction import compact_history
+from src.agent.utils import summarize_history_entry
+
+
+@pytest.fixture
+def video():
+    return VideoScriptDraft(
+        ad_platform_target="instagram_reels",
+        duration_estimate_seconds=9.0,
+        scenes=[
+            Scene(scene_number=number, visual_description=f"shot {number}", audio_description="upbeat",
+                  on_screen_text=f"text {number}", duration_seconds=3.0)
+            for number in (1, 2, 3)
+        ],
+        call_to_action_text="Shop now",
+        suggested_hashtags=["#fit"],
+        key_takeaway="Fits your day",
+    )
+
+
+def _patches(*patches: dict) -> ScriptPatchSet:
+    return ScriptPatchSet(patches=[ScriptPatch(**patch) for patch in patches])
+
+
+def _report(seed: int) -> dict:
+    return EvaluationReport.model_validate(
+        fake_payload(EvaluationReport, random.Random(seed), approval_probability=0.0)
+    ).model_dump()
+
+
+def _rescored(report: dict, criterion, score: int, recommendation: str) -> dict:
+    scores = dict(report["detailed_scores"])
+    scores[criterion] = {"score": score, "feedback": "sharper hook needed"}
+    return {**report, "detailed_scores": scores,
+            "actionable_recommendations": report["actionable_recommendations"] + [recommendation]}
+
+
+def test_evaluation_delta_keeps_scores_and_only_changed_issues():
+    first = _report(0)
+    criterion = next(iter(first["detailed_scores"]))
+    new_score = first["detailed_scores"][criterion]["score"] % 5 + 1
+    second = _rescored(first, criterion, new_score, "Open on the product")
+
+    history = [{"previous_evaluation_delta": evaluation_delta(first, [])}]
+    assert "changed_feedback" not in history[0]["previous_evaluation_delta"]
+    assert history[0]["previous_evaluation_delta"]["new_recommendations"] == first["actionable_recommendations"]
+
+    delta = evaluation_delta(second, history)
+    assert delta["overall_score"] == second["overall_score"]
+    assert delta["scores"] == {c.value: metric["score"] for c, metric in second["detailed_scores"].items()}
+    assert delta["changed_feedback"] == {criterion.value: "sharper hook needed"}
+    assert delta["new_recommendations"] == ["Open on the product"]
+    assert "summary_feedback" not in delta
+
+
+def test_delta_and_full_entries_read_alike():
+    report = _report(1)
+    full = {"previous_evaluation_report": report}
+    delta = {"previous_evaluation_delta": evaluation_delta(report, [])}
+
+    assert entry_evaluation(full) == entry_evaluation(delta)
+    assert summarize_history_entry(full) == summarize_history_entry(delta)
+
+    _, lessons_full = compact_history([full], None, keep=0)
+    _, lessons_delta = compact_history([delta], None, keep=0)
+    assert lessons_full == lessons_delta
+
+
+def test_patches_replace_fields_without_touching_the_draft(video):
+    patched = apply_script_patches(video, _patches(
+        {"field": "call_to_action_text", "new_value": "Try it free"},
+        {"scene_number": 2, "field": "on_screen_text", "new_value": "New text"},
+        {"field": "suggested_hashtags", "new_value": ["#fit", "#home"]},
+    ))
+
+    assert patched.call_to_action_text == "Try it free"
+    assert patched.scenes[1].on_screen_text == "New text"
+    assert patched.suggested_hashtags == ["#fit", "#home"]
+    assert video.call_to_action_text == "Shop now" and video.scenes[1].on_screen_text == "text 2"
+    assert apply_script_diff(video, diff_scripts(video, patched)) == patched
+
+
+def test_retimed_scenes_update_the_total_unless_it_is_patched(video):
+    retimed = apply_script_patches(video, _patches({"scene_number": 1, "field": "duration_seconds", "new_value": 5.0}))
+    assert retimed.duration_estimate_seconds == 11.0
+
+    explicit = apply_script_patches(video, _patches(
+        {"scene_number": 1, "field": "duration_seconds", "new_value": 5.0},
+        {"field": "duration_estimate_seconds", "new_value": 10.0},
+    ))
+    assert explicit.duration_estimate_seconds == 10.0
+
+
+@pytest.mark.parametrize("patch, message", [
+    ({"field": "tagline", "new_value": "x"}, "cannot be patched on a VideoScriptDraft"),
+    ({"field": "scenes", "new_value": "x"}, "cannot be patched on a VideoScriptDraft"),
+    ({"field": "ad_platform_target", "new_value": "tiktok"}, "cannot be patched on a VideoScriptDraft"),
+    ({"scene_number": 7, "field": "on_screen_text", "new_value": "x"}, "Scene 7 does not exist"),
+    ({"scene_number": 1, "field": "scene_number", "new_value": 2.0}, "cannot be patched on a scene"),
+    ({"scene_number": 1, "field": "duration_seconds", "new_value": "long"}, "Invalid scene duration"),
+    ({"field": "call_to_action_text", "new_value": ["a", "b"]}, "Patched script is invalid"),
+])
+def test_invalid_patches_raise(video, patch, message):
+    with pytest.raises(ScriptPatchError, match=message):
+        apply_script_patches(video, _patches(patch))
+
+
+def test_static_draft_has_no_scenes_to_patch():
+    static = StaticAdDraft.model_validate(fake_payload(StaticAdDraft, random.Random(0)))
+
+    assert apply_script_patches(static, _patches({"field": "headline", "new_value": "New"})).headline == "New"
+    with pytest.raises(ScriptPatchError, match="Scene 1 does not exist"):
+        apply_script_patches(static, _patches({"scene_number": 1, "field": "on_screen_text", "new_value": "x"}))
@@ -0,0 +1,138 @@
+# Import libraries
+import asyncio
+import threading
+
+import pytest
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.config.config import config, FakeLatencyDistribution
+from src.agent.state import AudienceInsight
+from src.agent.llm.fake import FakeChatModel
+from src.agent.llm.invoke import invoke_structured
+from src.agent.llm.registry import get_llm_registry
+from src.agent.llm.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", fn)))
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(flight.do("key", fn)))
+    waiter.start()
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: r[1]) == [("result", False), ("result", True)]
+    assert flight.in_flight() == 0
+
+
+def test_leader_error_is_shared_and_flight_is_cleared():
+    flight = SingleFlight()
+
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.in_flight() == 0
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_cancelled_waiter_does_not_cancel_the_flight():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fn():
+            await release.wait()
+            return "result"
+
+        leader = asyncio.create_task(flight.ado("key", fn))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(flight.ado("key", fn)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        # e.g. a Streamlit rerun or a lost race while the leader is still running
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await leader == ("result", False)
+        assert await waiters[1] == ("result", True)
+        with pytest.raises(asyncio.CancelledError):
+            await waiters[0]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_lets_waiters_elect_a_new_leader():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.05 if len(calls) == 1 else 0)
+            return len(calls)
+
+        leader = asyncio.create_task(flight.ado("key", fn))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.ado("key", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == (2, False)
+        assert flight.in_flight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_default_config_coalesces_identical_audience_insight_calls(monkeypatch):
+    # Default coalescing and exclusion settings, whatever earlier tests changed
+    for name in ("llm_single_flight_enabled", "llm_single_flight_excluded_nodes", "llm_cache_enabled",
+                 "llm_cache_excluded_nodes", "llm_hedging_enabled"):
+        field = type(config).model_fields[name]
+        monkeypatch.setattr(config, name, field.default_factory() if field.default_factory else field.default)
+    monkeypatch.setattr(config, "llm_rate_limit_enabled", False)
+    monkeypatch.setattr(config, "fake_llm_latency_distribution", FakeLatencyDistribution.CONSTANT)
+    monkeypatch.setattr(config, "fake_llm_latency_mean", 0.2)
+    monkeypatch.setattr(config, "fake_llm_error_rate", 0.0)
+    get_llm_registry().clear()
+
+    plans = []
+    plan = FakeChatModel._plan
+
+    def counted_plan(self, *args):
+        plans.append(1)
+        return plan(self, *args)
+
+    monkeypatch.setattr(FakeChatModel, "_plan", counted_plan)
+
+    messages = [SystemMessage(content="Research the audience."), HumanMessage(content="persona and product")]
+    results = []
+    callers = [
+        threading.Thread(target=lambda: results.append(
+            invoke_structured("audience_insight_node", "audience_insight", AudienceInsight, messages)
+        ))
+        for _ in range(4)
+    ]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join(10)
+
+    assert len(results) == 4 and len(plans) == 1
+    assert sum(result.coalesced for result in results) == 3
+    assert len({result.response.model_dump_json() for result in results}) == 1
+    get_llm_registry().clear()
@@ -0,0 +1,49 @@
+# Import libraries
+from src.agent.state import AgentState, AdPlatform, SingleVariation, collect_variations
+from src.agent.graph import build_variation_graph
+from benchmarks.samples import sample_processed_state
+
+
+def _variation(name: str, draft) -> SingleVariation:
+    return SingleVariation(variation_name=name, variation_type="focus", base_script_comparison="", ad_script_variation=draft)
+
+
+def test_reducer_adds_branch_results_and_ignores_repeated_writes():
+    draft = sample_processed_state(AdPlatform.instagram_reels, refinements=0).script_draft
+    a, b = _variation("A", draft), _variation("B", draft)
+
+    collected = collect_variations(collect_variations([], [a]), [b])
+    assert [v.variation_name for v in collected] == ["A", "B"]
+
+    # A node returning the whole state writes the collected list back
+    assert [v.variation_name for v in collect_variations(collected, collected)] == ["A", "B"]
+
+
+def test_reducer_replaces_a_rerun_branch_and_resets_on_empty_update():
+    draft = sample_processed_state(AdPlatform.instagram_reels, refinements=0).script_draft
+    first, rerun = _variation("A", draft), _variation("A", draft).model_copy(update={"variation_iteration_count": 2})
+
+    collected = collect_variations([first], [rerun])
+    assert len(collected) == 1 and collected[0].variation_iteration_count == 2
+    assert collect_variations(collected, []) == []
+
+
+def test_two_variants_give_exactly_two_results(fake_llm):
+    base = sample_processed_state(AdPlatform.instagram_reels, refinements=1, seed=1)
+
+    result = AgentState.model_validate(build_variation_graph(variation_count=2).invoke(base))
+
+    assert [v.variation_name for v in result.variation_results] == ["Pain Point Variant", "Aspiration Variant"]
+    assert result.single_variation_result in result.variation_results
+    branch_tokens = sum(v.total_llm_tokens for v in result.variation_results)
+    assert result.total_llm_tokens == base.total_llm_tokens + branch_tokens
+
+
+def test_rerunning_on_a_collected_result_starts_a_new_list(fake_llm):
+    base = sample_processed_state(AdPlatform.instagram_reels, refinements=1, seed=1)
+    graph = build_variation_graph(variation_count=2)
+
+    first = AgentState.model_validate(graph.invoke(base))
+    second = AgentState.model_validate(graph.invoke(first))
+
+    assert len(second.variation_results) == 2